@@ -0,0 +1,196 @@
+"""
+Benchmark of the websocket traffic of a simulation.
+
+A simulation is recorded once, then its messages are encoded into websocket
+frames with every compression setting, reporting the bytes on the wire and the
+CPU time spent by the server. The time to import the engine in a fresh
+interpreter is checked against a budget first, since every worker process pays
+it. Run ``python benchmark.py --help`` for options.
+"""
+
+import argparse
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+from websockets.frames import OP_BINARY, OP_TEXT, Frame
+
+from universe.compression import ThresholdPerMessageDeflate
+from universe.engine import run
+from universe.update import UpdateType
+from universe.worker import Message, join_messages, stream_callback
+
+# The slowest cold import of the engine allowed, in milliseconds. It measures
+# 65 to 70 ms with asyncio on a developer machine, the budget leaves a margin of
+# about 70% for slower CI machines
+IMPORT_BUDGET = 120
+# The number of fresh interpreters the median import time is taken from
+IMPORT_RUNS = 5
+
+# name, window bits, memory level, threshold, no context takeover
+SETTINGS = [
+    ("deflate 15/8", 15, 8, 0, False),
+    ("deflate 12/5", 12, 5, 0, False),
+    ("deflate 12/5 >=128B", 12, 5, 128, False),
+    ("deflate 10/4 >=128B", 10, 4, 128, False),
+    ("deflate 12/5 no context", 12, 5, 0, True),
+]
+
+
+async def record(config: dict) -> List[List[Message]]:
+    """
+    Record the messages sent to a client, grouped by round.
+
+    :param config: The configuration of the simulation.
+    :type config: dict
+    :return: The messages of every round.
+    :rtype: List[List[Message]]
+    """
+    rounds: List[List[Message]] = [[]]
+
+    async def send(message: Message):
+        rounds[-1].append(message)
+
+    stream = stream_callback(config, send)
+
+    async def callback(update_type, ant=None, target=None, state=None):
+        if update_type == UpdateType.SIMULATION_CURRENT_ROUND:
+            rounds.append([])
+        await stream(update_type, ant, target, state)
+
+    await run(config, callback)
+    return rounds
+
+
+def encode(messages: List[Message], setting) -> tuple:
+    """
+    Encode messages into websocket frames as the server does.
+
+    :param messages: The messages.
+    :type messages: List[Message]
+    :param setting: The compression setting, None for no compression.
+    :type setting: Optional[tuple]
+    :return: The number of bytes on the wire and the CPU time in seconds.
+    :rtype: tuple
+    """
+    extensions = []
+    if setting is not None:
+        _, window_bits, memory_level, threshold, no_context_takeover = setting
+        extensions.append(
+            ThresholdPerMessageDeflate(
+                False,
+                no_context_takeover,
+                15,
+                window_bits,
+                {"memLevel": memory_level},
+                threshold=threshold,
+            )
+        )
+    size = 0
+    start = time.process_time()
+    for message in messages:
+        if isinstance(message, str):
+            frame = Frame(OP_TEXT, message.encode())
+        else:
+            frame = Frame(OP_BINARY, message)
+        size += len(frame.serialize(mask=False, extensions=extensions))
+    return size, time.process_time() - start
+
+
+def import_time(module: str, runs: int = IMPORT_RUNS) -> float:
+    """
+    Measure the cumulative time to import a module in fresh interpreters.
+
+    A cold import varies with the load of the machine, so the median of several
+    interpreters is reported.
+
+    :param module: The name of the module.
+    :type module: str
+    :param runs: The number of interpreters, defaults to :data:`IMPORT_RUNS`.
+    :type runs: int
+    :return: The median import time in milliseconds.
+    :rtype: float
+    """
+    times = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        # import time: self [us] | cumulative | imported package
+        for line in result.stderr.splitlines():
+            _, cumulative, name = line.rsplit("|", 2)
+            if name.strip() == module and cumulative.strip().isdigit():
+                times.append(int(cumulative) / 1000)
+                break
+        else:
+            raise ValueError(f"No import time for {module}")
+    return statistics.median(times)
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seed", default="1", help="seed of the simulation")
+    parser.add_argument("--rounds", type=int, default=200, help="number of rounds")
+    parser.add_argument("--size", type=int, default=150, help="width and height")
+    parser.add_argument(
+        "--import-runs",
+        type=int,
+        default=IMPORT_RUNS,
+        help="number of fresh interpreters the median import time is taken from",
+    )
+    parser.add_argument(
+        "--import-budget",
+        type=float,
+        default=IMPORT_BUDGET,
+        help="maximum median import time of universe.engine in milliseconds",
+    )
+    arguments = parser.parse_args()
+
+    elapsed = import_time("universe.engine", arguments.import_runs)
+    print(
+        f"import universe.engine: {elapsed:.1f} ms (budget {arguments.import_budget:g} ms)"
+    )
+    if elapsed > arguments.import_budget:
+        sys.exit("universe.engine exceeds its import budget")
+
+    rounds = asyncio.run(
+        record(
+            {
+                "seed": arguments.seed,
+                "rounds": arguments.rounds,
+                "tps": 0,
+                "boundary": {"width": arguments.size, "height": arguments.size},
+            }
+        )
+    )
+    unbatched = [message for messages in rounds for message in messages]
+    batched = [
+        message
+        for current_round, messages in enumerate(rounds)
+        for message in join_messages(current_round, messages)
+    ]
+
+    raw, _ = encode(unbatched, None)
+    print(f"{len(unbatched)} messages, {raw} bytes uncompressed\n")
+    print(
+        f"{'setting':<26}{'batched':<9}{'messages':>9}{'bytes':>12}{'ratio':>8}"
+        f"{'CPU ms':>9}"
+    )
+    for setting in [None, *SETTINGS]:
+        for name, messages in (("no", unbatched), ("yes", batched)):
+            size, cpu = encode(messages, setting)
+            print(
+                f"{setting[0] if setting else 'off':<26}{name:<9}{len(messages):>9}"
+                f"{size:>12}{size / raw:>8.3f}{cpu * 1000:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,65 +1,111 @@
 import asyncio
-import http.server
 import json
-import socketserver
-import threading
+import os
 from concurrent.futures import ThreadPoolExecutor
 
-import keyboard
 from websockets import ConnectionClosedError, ConnectionClosedOK
 from websockets.server import serve
 
-from universe.ants import Ant
+from universe.compression import CompressionProtocol, compression_extensions
+from universe.config import SimulationConfig
 from universe.engine import run
+from universe.sessions import MAX_BOUNDARY_SIZE, SessionManager
+from universe.static import StaticFiles
 from universe.update import Update, UpdateType
+from universe.viewport import Viewport
 
 HTTP_PORT = 80
 
+# permessage-deflate settings of the websocket server, see compression_extensions
+COMPRESSION = {
+    "window_bits": 12,
+    "memory_level": 5,
+    "threshold": 128,
+    "no_context_takeover": False,
+}
 
-def start_http_server():
-    """Start a simple HTTP server to serve the frontend."""
-    http_handler = http.server.SimpleHTTPRequestHandler
+# The configuration keys a client may send with SIMULATION_START, the others
+# write files, start processes or are set by the server
+CLIENT_KEYS = {
+    "seed",
+    "boundary",
+    "rounds",
+    "tps",
+    "species",
+    "nests",
+    "ants",
+    "objects",
+    "max_ants",
+    "max_objects",
+    "rules",
+    "pheromones",
+    "heatmap",
+    "raster",
+    "stop",
+    "nest_field",
+    "compact_json",
+    "publish_hz",
+}
 
-    with socketserver.TCPServer(("", HTTP_PORT), http_handler) as httpd:
-        print(
-            f"Serving HTTP server at port {HTTP_PORT} - http://localhost:{HTTP_PORT} for local deployment"
-        )
-        httpd.serve_forever()
+# The simulations of every connection
+sessions = SessionManager()
+
+
+def client_config(config: SimulationConfig, data) -> SimulationConfig:
+    """
+    Apply the configuration sent by a client to a copy of a configuration.
+
+    :param config: The configuration built by the previous commands.
+    :type config: SimulationConfig
+    :param data: The configuration keys sent by the client.
+    :type data: dict
+    :return: The updated copy.
+    :rtype: SimulationConfig
+    :raises ValueError: If the configuration is invalid or sets a key reserved
+        to the server.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("The configuration must be an object")
+    reserved = set(data) - CLIENT_KEYS
+    if reserved:
+        raise ValueError(f"Configuration keys not allowed: {sorted(reserved)}")
+    config = config.copy(**data)
+    if max(config.width, config.height) > MAX_BOUNDARY_SIZE:
+        raise ValueError("The boundary is too large")
+    return config
 
 
 async def handler(websocket):
     """
     Handle the websocket connection.
 
+    The simulations are admitted by the session manager and run in worker
+    processes, this coroutine only passes the commands of the client on.
+
     :param websocket: The websocket connection.
     :type websocket: websockets.WebSocketServerProtocol
     """
-    running_task = None
+    session = None
 
-    async def callback(
-        update_type: UpdateType, entity: Ant | None = None, target=None, state=None
-    ):
+    async def send(message):
         """
-        Send the update to the client.
-
-        :param update_type: The update type.
-        :type update_type: UpdateType
-        :param entity: The entity.
-        :type entity: Ant | None
-        :param target: The target.
-        :type target: Any
-        :param state: The state.
-        :type state: Any
+        Send a message to the client, ignoring closed connections.
+
+        :param message: The text or binary message.
+        :type message: str | bytes
         """
-        event = Update(update_type, entity, target, state).to_dict()
         try:
-            await websocket.send(json.dumps(event))
+            await websocket.send(message)
         except ConnectionClosedOK:
             pass
         except ConnectionClosedError:
             pass
 
-    config = {}
+    def running() -> bool:
+        """Return True if a simulation is queued or running."""
+        return session is not None and session.active
+
+    config = SimulationConfig()
     try:
         async for message in websocket:
             data = json.loads(message)
@@ -67,16 +113,75 @@ async def handler(websocket):
 
             print(UpdateType[data["type"]])
             if UpdateType[data["type"]] == UpdateType.SIMULATION_START:
-                if running_task:
+                if running():
                     print("Canceling running simulation")
-                    running_task.cancel()
-                config["pause"] = False
-                running_task = asyncio.create_task(run(config, callback))
+                    sessions.stop(session)
+                options = data.get("config", {})
+                if isinstance(options, dict):
+                    # The whole configuration may come with the start command
+                    options = {
+                        "nest_field": bool(data.get("nest_field", False)),
+                        "compact_json": bool(data.get("compact_json", False)),
+                        **options,
+                    }
+                try:
+                    config = client_config(config, options)
+                except ValueError as error:
+                    await websocket.send(
+                        json.dumps(
+                            {"type": "ERROR_INVALID_CONFIG", "message": str(error)}
+                        )
+                    )
+                    continue
+                config.pause = False
+                # The updates of a round are compressed together as one message
+                config.batch_messages = bool(websocket.extensions)
+                try:
+                    session = sessions.submit(config, send)
+                except ValueError:
+                    session = None
+                    await websocket.send(
+                        json.dumps({"type": "ERROR_SIMULATION_TOO_COSTLY"})
+                    )
+                    continue
+                if sessions.position(session) >= 0:
+                    await websocket.send(
+                        json.dumps(
+                            Update(
+                                UpdateType.SIMULATION_QUEUED,
+                                state={
+                                    "id": session.id,
+                                    "position": sessions.position(session),
+                                },
+                            ).to_dict()
+                        )
+                    )
+            elif UpdateType[data["type"]] == UpdateType.SIMULATION_STATUS:
+                await websocket.send(
+                    json.dumps(
+                        Update(
+                            UpdateType.SIMULATION_STATUS, state=sessions.status()
+                        ).to_dict()
+                    )
+                )
             elif UpdateType[data["type"]] == UpdateType.SIMULATION_SET_BOUNDARIES:
-                config["boundary"] = {"width": data["width"], "height": data["height"]}
+                boundary = {key: data.get(key) for key in ("width", "height")}
+                try:
+                    if not all(
+                        isinstance(size, int) and size <= MAX_BOUNDARY_SIZE
+                        for size in boundary.values()
+                    ):
+                        raise ValueError("The boundary is too large")
+                    config.update({"boundary": boundary})
+                except ValueError:
+                    await websocket.send(
+                        json.dumps({"type": "ERROR_INVALID_BOUNDARIES"})
+                    )
             elif UpdateType[data["type"]] == UpdateType.SIMULATION_SET_TPS:
                 if "tps" in data and isinstance(data["tps"], int) and data["tps"] > 0:
-                    config["tps"] = data["tps"]
+                    config.tps = data["tps"]
+                    if running():
+                        session.control(tps=data["tps"])
                 else:
                     await websocket.send(json.dumps({"type": "ERROR_INVALID_TPS"}))
             elif UpdateType[data["type"]] == UpdateType.SIMULATION_SET_ROUNDS:
@@ -85,43 +190,102 @@ async def handler(websocket):
                     and isinstance(data["rounds"], int)
                     and data["rounds"] > 0
                 ):
-                    config["rounds"] = data["rounds"]
+                    config.rounds = data["rounds"]
+                    if running():
+                        session.control(rounds=data["rounds"])
                 else:
                     await websocket.send(json.dumps({"type": "ERROR_INVALID_ROUNDS"}))
             elif UpdateType[data["type"]] == UpdateType.SIMULATION_END:
-                if running_task:
-                    running_task.cancel()
-                    running_task = None
+                if running():
+                    sessions.stop(session)
+                    session = None
                     await websocket.send(json.dumps({"type": "SIMULATION_END"}))
-                    config.clear()
+                    config = SimulationConfig()
                 else:
                     await websocket.send(
                         json.dumps({"type": "ERROR_SIMULATION_NOT_RUNNING"})
                     )
             elif UpdateType[data["type"]] == UpdateType.SIMULATION_PAUSE:
-                if running_task:
-                    config["pause"] = True
+                if running():
+                    session.control(pause=True)
                     await websocket.send(json.dumps({"type": "SIMULATION_PAUSE"}))
                 else:
                     await websocket.send(
                         json.dumps({"type": "ERROR_SIMULATION_NOT_RUNNING"})
                     )
             elif UpdateType[data["type"]] == UpdateType.SIMULATION_RESUME:
-                if running_task:
-                    config["pause"] = False
+                if running():
+                    session.control(pause=False)
                     await websocket.send(json.dumps({"type": "SIMULATION_RESUME"}))
                 else:
                     await websocket.send(
                         json.dumps({"type": "ERROR_SIMULATION_NOT_RUNNING"})
                     )
             elif UpdateType[data["type"]] == UpdateType.SIMULATION_SET_SEED:
-                config["seed"] = data["seed"]
+                try:
+                    config.update({"seed": data.get("seed")})
+                except ValueError as error:
+                    await websocket.send(
+                        json.dumps(
+                            {"type": "ERROR_INVALID_CONFIG", "message": str(error)}
+                        )
+                    )
+            elif UpdateType[data["type"]] == UpdateType.SIMULATION_SET_RASTER:
+                try:
+                    config.update(
+                        {
+                            "raster": {
+                                "width": data.get("width"),
+                                "height": data.get("height"),
+                                "every": data.get("every", 1),
+                            }
+                        }
+                    )
+                except ValueError:
+                    config.raster = None
+            elif UpdateType[data["type"]] == UpdateType.SIMULATION_SET_PUBLISH_HZ:
+                if (
+                    isinstance(data.get("hz"), (int, float))
+                    and not isinstance(data["hz"], bool)
+                    and data["hz"] > 0
+                ):
+                    config.publish_hz = data["hz"]
+                else:
+                    config.publish_hz = None
+            elif UpdateType[data["type"]] == UpdateType.SIMULATION_SET_HEATMAP:
+                try:
+                    config.update(
+                        {
+                            "heatmap": {
+                                "tile": data.get("tile"),
+                                "every": data.get("every", 1),
+                            }
+                        }
+                    )
+                except ValueError:
+                    config.heatmap = None
+            elif UpdateType[data["type"]] == UpdateType.SIMULATION_SET_VIEWPORT:
+                try:
+                    config.viewport = Viewport(
+                        data["x"],
+                        data["y"],
+                        data["width"],
+                        data["height"],
+                        data.get("zoom", 1.0),
+                    )
+                except (KeyError, TypeError, ValueError):
+                    config.viewport = None
+                if running():
+                    session.control(viewport=config.viewport)
             else:
                 print("Unknown command")
     except ConnectionClosedOK:
         pass
     except ConnectionClosedError:
         pass
+    finally:
+        if running():
+            sessions.stop(session)
 
 
 # This is a dummy function that does nothing and is used to replace the update_callback in the run function
@@ -140,12 +304,12 @@ def run_simulation(running_task, config):
     :param running_task: The running task.
     :type running_task: asyncio.Task
     :param config: The configuration.
-    :type config: dict
+    :type config: SimulationConfig
     """
     if running_task:
         print("Canceling running simulation")
         running_task.cancel()
-    config["pause"] = False
+    config.pause = False
     executor.submit(asyncio.run, run(config, do_nothing))
 
 
@@ -163,15 +327,18 @@ def stop_simulation(running_task):
 
 def start_console_mode():
     """Start the console mode."""
+    # The hotkeys hook the input devices, headless servers never load them
+    import keyboard
+
     print("Console mode started")
     keyboard.remove_hotkey("ctrl+shift+w")
     running_task = None
-    config = {}
+    config = SimulationConfig()
     keyboard.add_hotkey("ctrl+shift+s", run_simulation, args=(running_task, config))
     keyboard.add_hotkey("ctrl+shift+x", stop_simulation, args=(running_task,))
     keyboard.add_hotkey(
         "ctrl+shift+d",
-        lambda: config.update({"console_map": not config.get("console_map", False)}),
+        lambda: config.update({"console_map": not config.console_map}),
     )
     print("Press ctrl+shift+s to start simulation")
     print("Press ctrl+shift+x to stop simulation")
@@ -180,16 +347,28 @@ def start_console_mode():
 
 async def start_servers():
     """Start the HTTP and WebSocket servers."""
-    http_thread = threading.Thread(target=start_http_server, daemon=True)
+    static_files = StaticFiles(os.path.dirname(os.path.abspath(__file__)))
     try:
-        http_thread.start()
         print("Connect to ws://localhost:8765")
         # Allow to start the simulation without opening the browser
         # try:
         #     keyboard.add_hotkey("ctrl+shift+w", start_console_mode)
         # except OSError:
         #     print("Cannot start console mode, please run the application as an administrator")
-        async with serve(handler, "0.0.0.0", 8765):
+        # The frontend is answered by the HTTP hook of a second websockets server
+        async with serve(
+            handler, "0.0.0.0", HTTP_PORT, process_request=static_files.process_request
+        ), serve(
+            handler,
+            "0.0.0.0",
+            8765,
+            create_protocol=CompressionProtocol,
+            compression=None,
+            extensions=compression_extensions(**COMPRESSION),
+        ):
+            print(
+                f"Serving HTTP server at port {HTTP_PORT} - http://localhost:{HTTP_PORT} for local deployment"
+            )
             await asyncio.Future()  # run forever
     except asyncio.CancelledError:
         print("Server stopped")
@@ -2,7 +2,9 @@ import random
 import unittest
 from unittest.mock import AsyncMock
 
+from universe.ants import Species, get_species, register_species
 from universe.engine import run
+from universe.map import Area, Boundary, Nest, NestField, NestIndex, Position
 
 
 class TestRunFunction(unittest.IsolatedAsyncioTestCase):
@@ -35,5 +37,1158 @@ class TestRunFunction(unittest.IsolatedAsyncioTestCase):
             self.assertEqual(self.first_results[seed], result)
 
 
+class TestSpecies(unittest.IsolatedAsyncioTestCase):
+    async def test_run_with_custom_species(self):
+        try:
+            green = get_species("GreenAnt")
+        except ValueError:
+            green = register_species(Species("GreenAnt", "green", speed=2))
+        update_callback = AsyncMock()
+        await run(
+            {"seed": 1, "rounds": 10, "tps": 0, "species": ["RedAnt", "GreenAnt"]},
+            update_callback,
+        )
+        colors = {
+            call.args[1].species.color
+            for call in update_callback.call_args_list
+            if call.args and call.args[0].name == "ANT_SPAWN"
+        }
+        self.assertEqual(colors, {"red", green.color})
+
+    def test_unknown_species(self):
+        with self.assertRaises(ValueError):
+            get_species("PurpleAnt")
+
+    def test_pickled_species_join_the_registry(self):
+        import pickle
+
+        from universe.ants import SPECIES
+        from universe.ants.species import _SPECIES_BY_NAME
+
+        teal = register_species(Species("TealAnt", "teal"))
+        data = pickle.dumps(teal)
+        # As in a spawned process, which only registered the built-in species
+        SPECIES.remove(teal)
+        del _SPECIES_BY_NAME["TealAnt"]
+        restored = pickle.loads(data)
+        try:
+            self.assertIs(get_species("TealAnt"), restored)
+            self.assertEqual(restored.index, teal.index)
+            self.assertIn(restored, SPECIES)
+            self.assertEqual(
+                [species.index for species in SPECIES],
+                sorted(species.index for species in SPECIES),
+            )
+        finally:
+            # The other tests spawn every registered species
+            SPECIES.remove(restored)
+            del _SPECIES_BY_NAME["TealAnt"]
+
+
+class TestStatistics(unittest.TestCase):
+    def test_runs_with_other_species_share_the_header(self):
+        import csv
+        import os
+        import tempfile
+
+        from universe.ants import SPECIES, Ant
+        from universe.utils import HEADERS, save_statistics_to_csv
+
+        green = Species("green_stats", "green", "green")
+        ants = [Ant(Position(0, 0), SPECIES[0]), Ant(Position(1, 0), green)]
+        ants[1].alive = False
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "statistics.csv")
+            save_statistics_to_csv(ants, filename, 20, SPECIES[:2])
+            save_statistics_to_csv(ants, filename, 20, [SPECIES[0], green])
+            with open(filename, newline="") as csvfile:
+                rows = list(csv.reader(csvfile))
+        self.assertEqual(rows[0], HEADERS)
+        self.assertNotIn(HEADERS, rows[1:])
+        alive = {(row[1], row[2], row[3]) for row in rows[1:]}
+        self.assertEqual(
+            alive,
+            {
+                (SPECIES[0].name, "1", "0"),
+                (SPECIES[1].name, "0", "0"),
+                ("green_stats", "0", "1"),
+            },
+        )
+        self.assertEqual(len(rows), 5)
+
+
+class TestNestIndex(unittest.TestCase):
+    def test_lookups_match_linear_scan(self):
+        rng = random.Random(5)
+        boundary = Boundary()
+        nest_index = NestIndex(boundary)
+        nests = []
+        for _ in range(100):
+            x, y = rng.randint(0, 180), rng.randint(0, 180)
+            nest = Nest(Area(Position(x, y), Position(x + rng.randint(1, 19), y + 10)))
+            nests.append(nest)
+            nest_index.add(nest)
+        for _ in range(1000):
+            position = Position(rng.randint(0, 199), rng.randint(0, 199))
+            nearest = min(nests, key=lambda n: n.area.smallest_distance(position))
+            self.assertIs(nest_index.nearest(position)[0], nearest)
+            self.assertIs(
+                nest_index.nest_at(position),
+                next((n for n in nests if position in n), None),
+            )
+
+    def test_nest_field_steps_towards_nearest_nest(self):
+        boundary = Boundary()
+        boundary.set_boundary_by_width_height(60, 40)
+        nest_index = NestIndex(boundary)
+        nest_index.add(Nest(Area(Position(5, 5), Position(10, 12))))
+        nest_index.add(Nest(Area(Position(40, 20), Position(50, 30))))
+        nest_field = NestField(boundary, nest_index)
+        self.assertEqual(nest_field.direction(Position(7, 7)), (None, 0))
+        self.assertEqual(nest_field.nest_id(Position(59, 0)), 1)
+        self.assertEqual(nest_field.distance(Position(0, 0)), 10)
+        direction, steps = nest_field.direction(Position(20, 8))
+        self.assertEqual((direction.name, steps), ("WEST", 10))
+
+
+class TestPheromoneField(unittest.TestCase):
+    def test_diffusion_keeps_scent_and_creates_gradient(self):
+        from universe.map.pheromone import PheromoneField
+
+        boundary = Boundary()
+        boundary.set_boundary_by_width_height(20, 10)
+        pheromones = PheromoneField(boundary, 2, diffusion=0.5, evaporation=0.0)
+        pheromones.deposit_scent(1, Position(5, 5))
+        for _ in range(3):
+            pheromones.step()
+        self.assertAlmostEqual(float(pheromones.fields[1].sum()), 1.0, places=5)
+        self.assertEqual(pheromones.enemy_direction(2, Position(8, 5)).name, "WEST")
+        self.assertIsNone(pheromones.enemy_direction(1, Position(8, 5)))
+
+
+class TestRaster(unittest.IsolatedAsyncioTestCase):
+    async def test_frames_decode_to_rendered_pixels(self):
+        from universe.raster import ENCODING_RLE, FRAME_HEADER
+
+        frames = []
+
+        async def callback(update_type, entity=None, target=None, state=None):
+            if update_type.name == "RASTER_FRAME":
+                frames.append(state)
+
+        await run(
+            {
+                "seed": 2,
+                "rounds": 6,
+                "tps": 0,
+                "raster": {"width": 50, "height": 40, "every": 3},
+            },
+            callback,
+        )
+        self.assertEqual(len(frames), 2)
+        _, current_round, width, height, scale, encoding = FRAME_HEADER.unpack_from(
+            frames[-1]
+        )
+        self.assertEqual((current_round, width, height, scale), (6, 38, 38, 4))
+        self.assertEqual(encoding, ENCODING_RLE)
+        body = frames[-1][FRAME_HEADER.size :]
+        pixels = b"".join(
+            bytes([body[i + 1]]) * body[i] for i in range(0, len(body), 2)
+        )
+        self.assertEqual(len(pixels), width * height)
+        self.assertTrue(any(pixels))
+
+
+class TestViewport(unittest.IsolatedAsyncioTestCase):
+    async def test_only_updates_in_view_are_accepted(self):
+        from universe.viewport import Viewport
+
+        viewport = Viewport(0, 0, 40, 40, zoom=2)
+        sent = []
+        summaries = []
+
+        async def callback(update_type, entity=None, target=None, state=None):
+            if update_type.name == "VIEWPORT_SUMMARY":
+                summaries.append(state)
+            elif viewport.accepts(update_type, entity, target):
+                sent.append((update_type, entity, target))
+
+        await run(
+            {"seed": 1, "rounds": 5, "tps": 0, "viewport": viewport},
+            callback,
+        )
+        self.assertEqual(len(summaries), 5)
+        self.assertEqual(summaries[-1]["tile"], 8)
+        self.assertTrue(summaries[-1]["tiles"])
+        for x, y, _ in summaries[-1]["tiles"]:
+            self.assertFalse(x < 5 and y < 5)
+        for update_type, entity, target in sent:
+            position = getattr(entity or target, "position", None)
+            if position is not None and update_type.name != "ANT_MOVE":
+                self.assertIn(position, viewport.area)
+
+    async def test_summary_matches_rescan(self):
+        from universe.engine import initial_spawn
+        from universe.events import EventSink
+        from universe.universe import Universe
+        from universe.viewport import Viewport
+
+        universe = Universe()
+        universe.rng.set_seed(5)
+        viewport = Viewport(30, 20, 50, 40, zoom=2)
+
+        async def callback(update_type, ant=None, target=None, state=None):
+            viewport.accepts(update_type, ant, target)
+
+        events = EventSink()
+        initial_spawn(universe, events)
+        await events.flush(callback)
+        viewport.summarize(universe)
+        for _ in range(10):
+            for ant_row in list(universe.ants.values()):
+                for ant in ant_row:
+                    if ant.is_alive():
+                        ant.move(universe, events)
+                    if ant.is_alive():
+                        ant.process(universe, events)
+            await events.flush(callback)
+
+            counts = {}
+            for ant_row in universe.ants.values():
+                for ant in ant_row:
+                    if ant.alive and ant.position not in viewport.area:
+                        key = (ant.position.x // 8, ant.position.y // 8)
+                        counts[key] = counts.get(key, 0) + 1
+            self.assertEqual(
+                viewport.summarize(universe)["tiles"],
+                [[x, y, count] for (x, y), count in sorted(counts.items())],
+            )
+
+
+class TestHeatmap(unittest.IsolatedAsyncioTestCase):
+    async def test_incremental_counts_match_rescan(self):
+        from universe.engine import initial_spawn
+        from universe.events import EventSink
+        from universe.heatmap import FRAME_HEADER, ROLES, Heatmap
+        from universe.universe import Universe
+
+        universe = Universe()
+        universe.rng.set_seed(3)
+        heatmap = Heatmap(universe, 16)
+        callback = heatmap.observe(AsyncMock())
+        events = EventSink()
+        initial_spawn(universe, events)
+        await events.flush(callback)
+        for _ in range(10):
+            for ant_row in list(universe.ants.values()):
+                for ant in ant_row:
+                    if ant.is_alive():
+                        ant.move(universe, events)
+                    if ant.is_alive():
+                        ant.process(universe, events)
+            await events.flush(callback)
+        self.assertEqual(len(events), 0)
+
+        expected = [0] * len(heatmap.counts)
+        for ant_row in universe.ants.values():
+            for ant in ant_row:
+                if ant.alive:
+                    channel = universe.species.index(ant.species) * len(ROLES)
+                    channel += ROLES.index(ant.role)
+                    tile = ant.position.y // 16 * heatmap.tiles_x
+                    tile += ant.position.x // 16
+                    expected[channel * heatmap.tile_count + tile] += 1
+        for object_type, count in universe.objects.counts().items():
+            channel = heatmap.channels.index(object_type.name)
+            tiles = heatmap.counts[
+                channel * heatmap.tile_count : (channel + 1) * heatmap.tile_count
+            ]
+            self.assertEqual(sum(tiles), count)
+        ants = len(heatmap.channels) - 3
+        self.assertEqual(
+            list(heatmap.counts[: ants * heatmap.tile_count]),
+            expected[: ants * heatmap.tile_count],
+        )
+
+        frame = heatmap.encode(10)
+        self.assertEqual(
+            FRAME_HEADER.unpack_from(frame)[1:],
+            (10, 13, 13, 16, len(heatmap.channels)),
+        )
+        self.assertEqual(len(frame), FRAME_HEADER.size + 2 * len(heatmap.counts))
+
+        # The frames saturate, the counters stay exact
+        heatmap.counts[0] = 0x10000
+        frame = heatmap.encode(11)
+        self.assertEqual(frame[FRAME_HEADER.size : FRAME_HEADER.size + 2], b"\xff\xff")
+        heatmap.counts[0] -= 2
+        frame = heatmap.encode(12)
+        self.assertEqual(frame[FRAME_HEADER.size : FRAME_HEADER.size + 2], b"\xfe\xff")
+
+
+class TestTwoPhaseTick(unittest.IsolatedAsyncioTestCase):
+    async def test_moves_do_not_depend_on_the_split(self):
+        from unittest.mock import patch
+
+        from universe.ants import Ant
+        from universe.serializer import DEFAULT_SERIALIZER
+        from universe.update import UpdateType
+
+        async def record(two_phase, **options):
+            messages = []
+
+            async def callback(update_type, ant=None, target=None, state=None):
+                if update_type != UpdateType.SIMULATION_TPS:
+                    messages.append(
+                        DEFAULT_SERIALIZER.update(update_type, ant, target, state)
+                    )
+
+            Ant.NEXT_ID = 0
+            config = {"seed": 4, "rounds": 40, "tps": 0, "two_phase": two_phase}
+            await run({**config, **options}, callback)
+            return messages
+
+        expected = await record(True)
+        self.assertTrue(any('"ANT_MOVE"' in message for message in expected))
+        self.assertEqual(await record(True), expected)
+        with patch("universe.tick.MIN_PARALLEL_ANTS", 1):
+            self.assertEqual(await record({"workers": 2}), expected)
+
+        # The workers read the scents from the shared layers
+        expected = await record(True, pheromones=True)
+        with patch("universe.tick.MIN_PARALLEL_ANTS", 1):
+            self.assertEqual(await record({"workers": 2}, pheromones=True), expected)
+
+    def test_broken_pool_removes_the_layers(self):
+        from concurrent.futures.process import BrokenProcessPool
+        from multiprocessing import shared_memory
+        from unittest.mock import patch
+
+        from universe.engine import create_universe, initial_spawn
+        from universe.events import EventSink
+        from universe.tick import TwoPhaseTick, living_ants
+
+        class BrokenPool:
+            def __init__(self, *args, initargs, **kwargs):
+                names.append(initargs[1])
+
+            def submit(self, *args):
+                raise BrokenProcessPool("A child process terminated abruptly")
+
+            def shutdown(self, **kwargs):
+                pass
+
+        names = []
+        universe = create_universe({"seed": 3})
+        initial_spawn(universe, EventSink())
+        two_phase = TwoPhaseTick(workers=2)
+        with patch("concurrent.futures.ProcessPoolExecutor", BrokenPool), patch(
+            "universe.tick.MIN_PARALLEL_ANTS", 1
+        ):
+            for _ in range(2):
+                with self.assertRaises(RuntimeError):
+                    two_phase.sense(universe, living_ants(universe), 1)
+        two_phase.close()
+        self.assertEqual(len(names), 2)
+        for name in names:
+            with self.assertRaises(FileNotFoundError):
+                shared_memory.SharedMemory(name=name)
+
+
+class TestPartitionedEngine(unittest.IsolatedAsyncioTestCase):
+    async def test_partitions_are_deterministic(self):
+        from universe.ants import Ant
+        from universe.map import Boundary
+        from universe.partition import partition_rows
+        from universe.serializer import DEFAULT_SERIALIZER
+        from universe.update import UpdateType
+
+        boundary = Boundary()
+        boundary.set_boundary(0, 0, 50, 7)
+        rows = partition_rows(boundary, 3)
+        self.assertEqual(rows[0][0], 0)
+        self.assertEqual(rows[-1][1], 6)
+        for (_, last), (first, _) in zip(rows, rows[1:]):
+            self.assertEqual(first, last + 1)
+
+        async def record():
+            messages = []
+
+            async def callback(update_type, ant=None, target=None, state=None):
+                if update_type != UpdateType.SIMULATION_TPS:
+                    messages.append(
+                        DEFAULT_SERIALIZER.update(update_type, ant, target, state)
+                    )
+
+            Ant.NEXT_ID = 0
+            config = {
+                "seed": 4,
+                "rounds": 20,
+                "tps": 0,
+                "partitions": 2,
+                "boundary": {"width": 150, "height": 150},
+            }
+            result = await run(config, callback)
+            return result, messages
+
+        expected = await record()
+        self.assertTrue(any('"ANT_MOVE"' in message for message in expected[1]))
+        self.assertEqual(await record(), expected)
+
+    def test_ants_interact_across_borders(self):
+        import threading
+
+        from universe.ants import Ant
+        from universe.engine import create_universe
+        from universe.map import Direction
+        from universe.map.object import Object, ObjectType
+        from universe.map.object_grid import ObjectGrid
+        from universe.partition import Partition, partition_rows
+        from universe.update import UpdateType
+
+        universe = create_universe({"boundary": {"width": 30, "height": 30}})
+        objects = ObjectGrid(universe.boundary)
+        objects.spawn(Object(Position(2, 15), ObjectType.FOOD))
+        grids = (
+            memoryview(bytearray(900)),
+            memoryview(objects.types),
+            memoryview(objects.usages),
+        )
+
+        def partition(index, ants):
+            rows = partition_rows(universe.boundary, 2)[index]
+            start, end = rows[0] * 30, (rows[1] + 1) * 30
+            setup = {
+                "rows": rows,
+                "partitions": 2,
+                "boundary": universe.boundary,
+                "species": universe.species,
+                "rules": universe.rules,
+                "seed": 1,
+                "nests": [],
+                "nest_index": universe.nest_index,
+                "nest_field": None,
+                "object_types": objects.types[start:end],
+                "object_usages": objects.usages[start:end],
+                "ants": ants,
+                "next_id": 0,
+            }
+            return Partition(index, setup, grids, threading.Barrier(1))
+
+        own = Ant(Position(2, 14), universe.species[0])
+        own.position.direction = Direction.NORTH
+        enemy = Ant(Position(2, 15), universe.species[1])
+        health, food = own.health, own.food
+        south, north = partition(0, [own]), partition(1, [enemy])
+
+        moved = (UpdateType.ANT_MOVE, own, None, None)
+        events, _, _, consumed, _, _ = south.process([], [moved], [enemy], 0, 0, False)
+        # The held move update is delivered with the end of the tick
+        self.assertEqual(events[0][:2], moved[:2])
+        self.assertEqual(own.health, health - enemy.damage)
+        self.assertEqual(own.food, food + universe.rules.food_gain)
+        self.assertEqual(consumed, [(452, 1)])
+        # The ghost is not kept by the strip
+        self.assertEqual(south.universe.ants_count, 1)
+
+        _, objects_count = north.merge(consumed)
+        self.assertEqual(objects_count, 1)
+        self.assertEqual(
+            north.universe.objects.object_at(Position(2, 15)).usages_left, 2
+        )
+        events, objects_count = north.merge([(452, 5)])
+        self.assertEqual(objects_count, 0)
+        self.assertEqual(events[0][0], UpdateType.OBJECT_DESPAWN)
+
+    async def test_unsupported_options_are_rejected(self):
+        for options in ({"pheromones": {}}, {"raster": {}}, {"stop": {"empty": True}}):
+            with self.assertRaises(ValueError):
+                await run({"partitions": 2, "rounds": 1, **options}, AsyncMock())
+
+
+class TestSharedState(unittest.TestCase):
+    def test_reader_sees_published_state(self):
+        from universe.engine import create_universe, initial_spawn
+        from universe.events import EventSink
+        from universe.shared_state import SharedState, SharedStateReader
+
+        universe = create_universe({"seed": 3, "boundary": {"width": 60, "height": 40}})
+        initial_spawn(universe, EventSink())
+        ants = sorted(
+            (ant for ant_row in universe.ants.values() for ant in ant_row),
+            key=lambda ant: ant.id,
+        )
+        shared_state = SharedState(universe, capacity=len(ants))
+        reader = SharedStateReader(shared_state.name)
+        try:
+            self.assertEqual(reader.generation, 0)
+            shared_state.publish(universe, 7)
+            snapshot = reader.snapshot()
+            self.assertEqual(snapshot.generation, 2)
+            self.assertEqual(snapshot.round, 7)
+            self.assertEqual(snapshot.living, len(ants))
+            self.assertEqual(snapshot.boundary, (0, 0, 60, 40))
+            self.assertEqual(snapshot.object_types, bytes(universe.objects.types))
+            self.assertEqual(
+                sorted(snapshot.ants()),
+                [
+                    (
+                        ant.id,
+                        ant.position.x,
+                        ant.position.y,
+                        ant.health,
+                        ant.food,
+                        ant.species.index,
+                        ant.role.value,
+                        ant.position.direction.value // 90,
+                    )
+                    for ant in ants
+                ],
+            )
+
+            # Views into the block, released after the function
+            self.assertEqual(
+                reader.read(lambda state: len(list(state.ants()))), len(ants)
+            )
+            self.assertEqual(
+                reader.read(lambda state: state.object_types.tobytes()),
+                bytes(universe.objects.types),
+            )
+
+            ants[0].alive = False
+            shared_state.publish(universe, 8)
+            self.assertEqual(reader.snapshot().living, len(ants) - 1)
+        finally:
+            reader.close()
+            shared_state.close()
+
+    def test_failed_run_removes_the_block(self):
+        import asyncio
+
+        from universe.shared_state import SharedStateReader
+        from universe.update import UpdateType
+
+        names = []
+
+        async def callback(update_type, ant=None, target=None, state=None):
+            if update_type == UpdateType.SHARED_STATE:
+                names.append(state)
+            elif update_type == UpdateType.SIMULATION_CURRENT_ROUND and state == 3:
+                raise RuntimeError("Connection lost")
+
+        config = {"seed": 3, "rounds": 10, "tps": 0, "shared_state": True}
+        with self.assertRaises(RuntimeError):
+            asyncio.run(run(config, callback))
+        with self.assertRaises(FileNotFoundError):
+            SharedStateReader(names[0])
+
+
+class TestConsoleRenderer(unittest.IsolatedAsyncioTestCase):
+    async def test_only_changed_cells_are_drawn(self):
+        import asyncio
+        import io
+        import re
+
+        from universe.console import (
+            CLEAR,
+            HIDE_CURSOR,
+            SHOW_CURSOR,
+            ConsoleRenderer,
+            move,
+        )
+        from universe.engine import create_universe, initial_spawn
+        from universe.events import EventSink
+
+        universe = create_universe({"seed": 3, "boundary": {"width": 60, "height": 40}})
+        initial_spawn(universe, EventSink())
+        ants = [ant for ant_row in universe.ants.values() for ant in ant_row]
+        stream = io.StringIO()
+        renderer = ConsoleRenderer(universe.boundary, (80, 50), stream)
+
+        text = renderer.draw(universe)
+        self.assertTrue(text.startswith(HIDE_CURSOR + CLEAR))
+        self.assertEqual(stream.getvalue(), text)
+        self.assertEqual(renderer.draw(universe), "")
+
+        ant = next(ant for ant in ants if ant.position.x < 59)
+        old = (ant.position.y, ant.position.x)
+        ant.position.x += 1
+        text = renderer.draw(universe)
+        self.assertNotIn(CLEAR, text)
+        moves = {
+            (int(row) - 1, int(column) - 1)
+            for row, column in re.findall(r"\x1b\[(\d+);(\d+)H", text)
+        }
+        self.assertIn(old, moves)
+        self.assertLessEqual(moves, {old, (old[0], old[1] + 1), (renderer.rows, 0)})
+
+        small = ConsoleRenderer(universe.boundary, (20, 12), io.StringIO())
+        small.draw(universe)
+        frame = small.frame(universe)
+        self.assertEqual((small.scale, small.rows, small.columns), (4, 10, 15))
+        self.assertTrue(all(row < 10 and column < 15 for row, column in frame))
+        self.assertLess(len(frame), len(ants))
+
+        stream = io.StringIO()
+        watch = asyncio.create_task(
+            ConsoleRenderer(universe.boundary, (80, 50), stream).watch(
+                universe, lambda: True, fps=100
+            )
+        )
+        await asyncio.sleep(0.05)
+        watch.cancel()
+        await asyncio.wait([watch])
+        self.assertIn(CLEAR, stream.getvalue())
+        self.assertTrue(stream.getvalue().endswith(move(41, 0) + SHOW_CURSOR))
+
+
+class TestTrajectory(unittest.IsolatedAsyncioTestCase):
+    async def test_reader_returns_recorded_rounds(self):
+        import os
+        import tempfile
+
+        from universe.trajectory import TrajectoryReader
+        from universe.update import UpdateType
+
+        deaths = []
+
+        async def callback(update_type, ant=None, target=None, state=None):
+            if update_type == UpdateType.ANT_DEATH:
+                deaths.append(ant.id)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trajectory.bin")
+            await run({"seed": 5, "rounds": 30, "tps": 0, "trajectory": path}, callback)
+            reader = TrajectoryReader(path)
+            self.assertEqual(list(reader.rounds), list(range(1, 31)))
+            records = reader.range(1, 30)
+            self.assertEqual(len(records), len(reader.range_rounds(1, 30)))
+            for current_round in (1, 15, 30):
+                ids = reader.round(current_round)["id"]
+                self.assertTrue((ids[1:] > ids[:-1]).all())
+
+            ant_id = int(reader.round(10)["id"][0])
+            history = reader.ant(ant_id)
+            self.assertTrue((history["id"] == ant_id).all())
+            self.assertEqual(len(history), int((records["id"] == ant_id).sum()))
+            self.assertLessEqual(int((history["alive"] == 0).sum()), 1)
+            dead = records["id"][records["alive"] == 0].tolist()
+            self.assertEqual(len(dead), len(set(dead)))
+            self.assertLessEqual(set(dead), set(deaths))
+            # Ants born and killed in the same round are never recorded
+            for ant_id in set(deaths) - set(dead):
+                self.assertEqual(len(reader.ant(ant_id)), 0)
+            del reader, records, history
+
+
+class TestResultStore(unittest.IsolatedAsyncioTestCase):
+    async def test_queries_across_seeds(self):
+        from universe.results import ResultStore, RunResult
+
+        config = {"rounds": 3}
+        species = ["BlackAnt", "RedAnt"]
+        with ResultStore() as store:
+            store.add(RunResult("a", config, species, [(5, 5), (4, 6), (2, 9)]))
+            store.add(RunResult("b", config, species, [(5, 5), (0, 7), (0, 8)]))
+            store.add(RunResult("c", config, species, [(5, 5), (6, 3), (7, 3)]))
+            store.add(RunResult("d", config, species, [(5, 5), (5, 5), (4, 4)]))
+            store.add(RunResult("a", {"rounds": 2}, species, [(1, 0), (1, 0)]))
+
+            self.assertEqual(len(store), 5)
+            self.assertEqual(store.seeds(config), ["a", "b", "c", "d"])
+            self.assertEqual(store.wins(config), {"RedAnt": 2, "BlackAnt": 1, None: 1})
+            self.assertEqual(
+                store.top_seeds("RedAnt", config=config), [("b", 8), ("a", 7)]
+            )
+            self.assertEqual(store.top_seeds("BlackAnt", 1), [("c", 4)])
+            self.assertEqual(store.extinctions(3, config), [("b", 2)])
+            curves = store.population_curves("RedAnt", config)
+            self.assertEqual(curves.tolist()[1], [5, 7, 8])
+            self.assertEqual(
+                store.percentiles((50,), config=config).tolist(), [[10, 9.5, 9]]
+            )
+
+            # Storing a seed again replaces its run
+            store.add(RunResult("a", config, species, [(1, 0), (2, 0), (3, 0)]))
+            self.assertEqual(store.wins(config)["BlackAnt"], 2)
+            self.assertEqual(len(store), 5)
+
+    async def test_engine_stores_its_run(self):
+        import os
+        import tempfile
+
+        from universe.results import ResultStore
+
+        config = {"seed": 8, "rounds": 10, "tps": 0}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.db")
+            await run({**config, "results": path}, AsyncMock())
+            with ResultStore(path) as store:
+                self.assertEqual(store.seeds(config), ["8"])
+                self.assertEqual(store.population_curves(config=config).shape, (1, 10))
+
+    async def test_stop_conditions_keep_their_own_runs(self):
+        import os
+        import tempfile
+
+        from universe.results import ResultStore
+
+        config = {"seed": 8, "rounds": 10, "tps": 0}
+        steady = {**config, "stop": {"variance": 10**6, "window": 2}}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.db")
+            await run({**config, "results": path}, AsyncMock())
+            await run({**steady, "results": path}, AsyncMock())
+            with ResultStore(path) as store:
+                self.assertEqual(len(store), 2)
+                self.assertEqual(store.population_curves(config=config).shape, (1, 10))
+                self.assertLess(store.population_curves(config=steady).shape[1], 10)
+
+
+class TestSeedSearch(unittest.TestCase):
+    def test_parallel_search_finds_the_first_matches(self):
+        from universe.search import Extinction, PopulationAbove, search_seeds
+
+        config = {
+            "rounds": 40,
+            "boundary": {"width": 60, "height": 60},
+            "species": ["BlackAnt", "RedAnt"],
+        }
+        predicate = PopulationAbove(85, "BlackAnt", before=40)
+        expected = search_seeds(config, range(10), predicate, matches=2)
+        self.assertEqual([result.seed for result in expected], ["1", "3"])
+        self.assertTrue(all(result.round < 40 for result in expected))
+        found = search_seeds(config, range(10), predicate, matches=2, workers=2)
+        self.assertEqual(
+            [(result.seed, result.round) for result in found],
+            [(result.seed, result.round) for result in expected],
+        )
+
+        self.assertIsNone(Extinction("RedAnt", 10)(5, {"RedAnt": 3}))
+        self.assertTrue(Extinction("RedAnt", 10)(5, {"RedAnt": 0}))
+        self.assertFalse(Extinction("RedAnt", 10)(9, {"RedAnt": 3}))
+
+
+class TestStopConditions(unittest.IsolatedAsyncioTestCase):
+    def test_conditions(self):
+        from universe.stop import (
+            EMPTY,
+            EXTINCTION,
+            LOW_VARIANCE,
+            STEADY,
+            StopConditions,
+        )
+
+        self.assertEqual(StopConditions().check((0, 0)), EMPTY)
+        self.assertEqual(StopConditions().check((0, 4)), EXTINCTION)
+        self.assertIsNone(StopConditions(extinction=False).check((0, 4)))
+        self.assertIsNone(StopConditions().check((4,)))
+
+        steady = StopConditions(steady_rounds=2)
+        reasons = [steady.check(counts) for counts in [(3, 4), (3, 4), (3, 5)]]
+        reasons += [steady.check((3, 5)), steady.check((3, 5))]
+        self.assertEqual(reasons, [None, None, None, None, STEADY])
+
+        variance = StopConditions(variance=1, window=3)
+        reasons = [variance.check(counts) for counts in [(9, 9), (5, 4), (5, 5)]]
+        reasons.append(variance.check((4, 5)))
+        self.assertEqual(reasons, [None, None, None, LOW_VARIANCE])
+
+    async def test_run_ends_with_the_reason(self):
+        from universe.update import UpdateType
+
+        rounds = []
+        ends = []
+
+        async def callback(update_type, ant=None, target=None, state=None):
+            if update_type == UpdateType.SIMULATION_CURRENT_ROUND:
+                rounds.append(state)
+            elif update_type == UpdateType.SIMULATION_END:
+                ends.append(state)
+
+        config = {"seed": 2, "rounds": 50, "tps": 0}
+        await run({**config, "stop": {"variance": 1e9, "window": 5}}, callback)
+        self.assertEqual((rounds[-1], ends), (5, ["low_variance"]))
+        rounds.clear()
+        ends.clear()
+        await run(config, callback)
+        self.assertEqual((rounds[-1], ends), (50, [None]))
+
+
+class TestSimulationConfig(unittest.IsolatedAsyncioTestCase):
+    def test_validation_and_loading(self):
+        import json
+        import os
+        import tempfile
+
+        from universe.config import SimulationConfig
+        from universe.engine import create_universe, spawn
+        from universe.events import EventSink
+        from universe.results import config_key
+
+        for data in [
+            {"round": 5},
+            {"rounds": 0},
+            {"tps": "fast"},
+            {"boundary": {"width": 10}},
+            {"boundary": {"width": 20, "height": 100}},
+            {"species": ["PurpleAnt"]},
+            {"rules": {"soldier_odds": 2}},
+            {"rules": {"gravity": 1}},
+            {"rules": {"soldier_growth": -1}},
+            {"raster": {"width": 10}},
+            {"heatmap": {"tile": "x"}},
+            {"heatmap": {"tile": 0}},
+            {"pheromones": {"foo": 1}},
+            {"pheromones": {"diffusion": "a"}},
+            {"two_phase": {"workers": -1}},
+            {"shared_state": {"capacity": 0}},
+            {"stop": {"window": 1}},
+            {"stop": {"bogus": True}},
+            {"ants": 10**7},
+            {"objects": 10**7},
+            {"nests": 5000},
+            {"ants": 100, "max_ants": 50},
+        ]:
+            with self.assertRaises(ValueError, msg=data):
+                SimulationConfig.from_dict(data)
+        config = SimulationConfig(rounds=5)
+        with self.assertRaises(ValueError):
+            config.update({"rounds": 9, "pause": "yes"})
+        with self.assertRaisesRegex(ValueError, "at least 21"):
+            config.update({"boundary": {"width": 20, "height": 20}})
+        self.assertEqual(config.rounds, 5)
+
+        data = {
+            "seed": 4,
+            "boundary": {"width": 40, "height": 30},
+            "max_ants": 60,
+            "objects": 20,
+            "rules": {"object_usages": 5, "food_gain": 9, "queen_health": 120},
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "config.json")
+            with open(path, "w") as file:
+                json.dump(data, file)
+            config = SimulationConfig.load(path)
+        self.assertEqual(config_key(config), config_key(data))
+        self.assertEqual(config_key({}), config_key({"rounds": 200}))
+        self.assertEqual(
+            SimulationConfig.from_dict(config.to_dict()).model(), config.model()
+        )
+
+        universe = create_universe(config)
+        spawn(universe, EventSink(), config)
+        self.assertEqual((universe.boundary.width, universe.MAX_ANTS), (40, 60))
+        self.assertEqual(universe.rules.food_gain, 9)
+        self.assertEqual(len(universe.objects), 20)
+        self.assertEqual(max(universe.objects.usages), 5)
+        self.assertEqual({nest.queen.health for nest in universe.nests}, {120})
+
+    async def test_running_simulation_is_updated(self):
+        from universe.config import SimulationConfig
+        from universe.update import UpdateType
+
+        config = SimulationConfig(seed=2, rounds=50, tps=0)
+        rounds = []
+
+        async def callback(update_type, ant=None, target=None, state=None):
+            if update_type == UpdateType.SIMULATION_CURRENT_ROUND:
+                rounds.append(state)
+                if state == 2:
+                    config.update({"rounds": 4})
+
+        await run(config, callback)
+        self.assertEqual(rounds, [1, 2, 3, 4])
+
+    async def test_run_without_callback(self):
+        config = {"seed": 2, "rounds": 3, "tps": 0}
+        self.assertEqual(await run(config), await run(config, AsyncMock()))
+
+
+class TestPublisher(unittest.IsolatedAsyncioTestCase):
+    async def test_batches_coalesce_updates(self):
+        import json
+
+        from universe.ants import Ant
+        from universe.publisher import Publisher
+        from universe.update import UpdateType
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        publisher = Publisher(send, 30)
+        ant = Ant(Position(1, 1), get_species("BlackAnt"))
+        publisher.publish(UpdateType.ANT_SPAWN, ant)
+        for current_round in range(1, 4):
+            publisher.publish(UpdateType.SIMULATION_CURRENT_ROUND, state=current_round)
+            ant.position = Position(current_round, 1)
+            publisher.publish(UpdateType.ANT_MOVE, ant)
+            publisher.publish(UpdateType.SIMULATION_TPS, state=current_round * 10)
+            publisher.publish(UpdateType.RASTER_FRAME, state=bytes([current_round]))
+        await publisher.flush()
+        await publisher.flush()
+
+        self.assertEqual(len(sent), 2)
+        batch = json.loads(sent[0])
+        self.assertEqual(batch["type"], "SIMULATION_BATCH")
+        self.assertEqual(batch["state"]["round"], 3)
+        self.assertEqual(
+            [event["type"] for event in batch["state"]["events"]],
+            ["ANT_SPAWN", "ANT_MOVE", "SIMULATION_TPS"],
+        )
+        self.assertEqual(batch["state"]["events"][1]["ant"]["position"]["x"], 3)
+        self.assertEqual(batch["state"]["events"][2]["state"], 30)
+        self.assertEqual(sent[1], bytes([3]))
+
+
+class TestSerializer(unittest.IsolatedAsyncioTestCase):
+    async def test_output_matches_update_to_dict(self):
+        import json
+
+        from universe.publisher import FRAME_UPDATES
+        from universe.serializer import Serializer, encode_update
+        from universe.update import Update
+
+        compact = Serializer(compact=True)
+        targets = set()
+
+        async def callback(update_type, ant=None, target=None, state=None):
+            if update_type in FRAME_UPDATES:
+                return
+            update = Update(update_type, ant, target, state)
+            expected = json.dumps(update.to_dict())
+            self.assertEqual(encode_update(update), expected)
+            self.assertEqual(
+                json.loads(encode_update(update, compact)), json.loads(expected)
+            )
+            targets.add(type(target).__name__)
+
+        await run({"seed": 1, "rounds": 50, "tps": 0}, callback)
+        self.assertTrue({"Ant", "Object", "Nest", "NoneType"} <= targets)
+        batch = compact.batch(7, 1.5, ['{"a":1}', '{"b":2}'])
+        self.assertEqual(
+            json.loads(batch)["state"],
+            {"round": 7, "timestamp": 1.5, "events": [{"a": 1}, {"b": 2}]},
+        )
+
+
+class TestEventSink(unittest.IsolatedAsyncioTestCase):
+    async def test_updates_carry_the_state_at_delivery(self):
+        import json
+
+        from universe.ants import SPECIES, Ant
+        from universe.events import EventSink
+        from universe.map import Boundary, Direction
+        from universe.serializer import DEFAULT_SERIALIZER
+        from universe.update import UpdateType
+
+        boundary = Boundary()
+        boundary.set_boundary(0, 0, 20, 20)
+        ant = Ant(Position(5, 5), SPECIES[0])
+        enemy = Ant(Position(5, 6), SPECIES[1])
+        health = ant.health
+
+        events = EventSink(capacity=1)
+        ant.position.move(boundary, Direction.NORTH, 1)
+        events.emit(UpdateType.ANT_MOVE, ant)
+        enemy.attack(ant, events)
+        # Pushed back by a rock after the update was emitted
+        ant.position.move(boundary, Direction.NORTH, -1)
+        enemy.attack(ant, events)
+        self.assertEqual(len(events), 3)
+
+        messages = []
+
+        async def callback(update_type, ant=None, target=None, state=None):
+            messages.append(
+                json.loads(DEFAULT_SERIALIZER.update(update_type, ant, target, state))
+            )
+
+        await events.flush(callback)
+        self.assertEqual(len(events), 0)
+        self.assertEqual(
+            [message["type"] for message in messages],
+            ["ANT_MOVE", "ANT_ATTACK", "ANT_ATTACK"],
+        )
+        self.assertEqual(messages[0]["ant"]["position"], ant.position.to_dict())
+        self.assertEqual(ant.position.y, 5)
+        for message in messages[1:]:
+            self.assertEqual(message["target"]["health"], health - 2 * enemy.damage)
+
+
+class TestSimulationWorker(unittest.IsolatedAsyncioTestCase):
+    async def test_worker_streams_batches_and_stops(self):
+        import json
+
+        from universe.worker import SimulationWorker
+
+        worker = SimulationWorker({"seed": 1, "rounds": 5, "tps": 0})
+        worker.start()
+        messages = [
+            json.loads(message) async for batch in worker.batches() for message in batch
+        ]
+        self.assertTrue(worker.finished)
+        self.assertEqual(worker.process.exitcode, 0)
+        self.assertEqual(messages[0]["type"], "SIMULATION_START")
+        self.assertEqual(messages[-1]["type"], "SIMULATION_END")
+        rounds = [
+            m["state"] for m in messages if m["type"] == "SIMULATION_CURRENT_ROUND"
+        ]
+        self.assertEqual(rounds, [1, 2, 3, 4, 5])
+
+        worker = SimulationWorker({"seed": 1, "rounds": 100000, "tps": 5})
+        worker.start()
+        worker.control(tps=1000)
+        batches = 0
+        async for _ in worker.batches():
+            batches += 1
+            if batches == 3:
+                worker.stop()
+        self.assertLess(batches, 1000)
+        self.assertEqual(worker.process.exitcode, 0)
+
+    async def test_failed_simulation_ends_with_an_error(self):
+        import json
+        import queue
+        from unittest.mock import patch
+
+        from universe.config import SimulationConfig
+        from universe.update import UpdateType
+        from universe.worker import _simulate
+
+        async def fail(config, update_callback):
+            await update_callback(UpdateType.SIMULATION_START)
+            await update_callback(UpdateType.SIMULATION_CURRENT_ROUND, state=1)
+            raise KeyError("nest")
+
+        commands, events = queue.Queue(), queue.Queue()
+        with patch("universe.worker.run", fail):
+            await _simulate(SimulationConfig(), commands, events)
+        commands.put(None)
+        messages = []
+        while (batch := events.get_nowait()) is not None:
+            messages.extend(json.loads(message) for message in batch[2])
+        self.assertEqual(
+            [message["type"] for message in messages],
+            [
+                "SIMULATION_START",
+                "SIMULATION_CURRENT_ROUND",
+                "ERROR_SIMULATION_FAILED",
+                "SIMULATION_END",
+            ],
+        )
+        self.assertEqual(messages[2]["state"], "KeyError: 'nest'")
+
+
+class TestSessionManager(unittest.IsolatedAsyncioTestCase):
+    async def test_sessions_over_the_limits_are_queued(self):
+        import asyncio
+
+        from universe.sessions import SessionManager, SessionState, estimate_cost
+
+        config = {"seed": 1, "rounds": 3, "tps": 0}
+        manager = SessionManager(max_running=1, max_session_cost=estimate_cost(config))
+        messages = {1: [], 2: []}
+
+        def sender(session_id):
+            async def send(message):
+                messages[session_id].append(message)
+
+            return send
+
+        first = manager.submit(config, sender(1))
+        second = manager.submit(config, sender(2))
+        self.assertEqual(first.state, SessionState.RUNNING)
+        self.assertEqual(second.state, SessionState.QUEUED)
+        self.assertEqual(manager.position(second), 0)
+        status = manager.status()
+        self.assertEqual((status["running"], status["queued"]), (1, 1))
+        self.assertEqual(
+            [session["state"] for session in status["sessions"]],
+            ["RUNNING", "QUEUED"],
+        )
+        with self.assertRaises(ValueError):
+            manager.submit({**config, "rounds": 4}, sender(3))
+
+        while manager.sessions:
+            await asyncio.sleep(0.05)
+        self.assertTrue(messages[1][-1].startswith('{"type": "SIMULATION_END"'))
+        self.assertTrue(messages[2][-1].startswith('{"type": "SIMULATION_END"'))
+
+
+class TestStaticFiles(unittest.TestCase):
+    def test_files_are_compressed_and_revalidated(self):
+        import gzip
+        import os
+        from http import HTTPStatus
+
+        from universe.static import StaticFiles
+
+        static_files = StaticFiles(os.path.dirname(os.path.abspath(__file__)))
+        status, headers, body = static_files.process_request(
+            "/universe.js?seed=1", {"Accept-Encoding": "gzip, deflate"}
+        )
+        headers = dict(headers)
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        with open(os.path.join(os.path.dirname(__file__), "universe.js"), "rb") as file:
+            self.assertEqual(gzip.decompress(body), file.read())
+
+        status, _, body = static_files.process_request(
+            "/universe.js", {"If-None-Match": headers["ETag"]}
+        )
+        self.assertEqual((status, body), (HTTPStatus.NOT_MODIFIED, b""))
+        self.assertEqual(
+            static_files.process_request("/statistics.csv", {})[0],
+            HTTPStatus.NOT_FOUND,
+        )
+        self.assertIs(static_files.files["/"], static_files.files["/index.html"])
+
+
+class TestCompression(unittest.IsolatedAsyncioTestCase):
+    async def test_negotiation_and_threshold(self):
+        import websockets
+        from websockets.frames import OP_TEXT, Frame
+        from websockets.server import serve
+
+        from universe.compression import (
+            CompressionProtocol,
+            ThresholdPerMessageDeflate,
+            compression_extensions,
+        )
+
+        async def echo(websocket):
+            async for message in websocket:
+                await websocket.send(message)
+
+        async with serve(
+            echo,
+            "127.0.0.1",
+            0,
+            create_protocol=CompressionProtocol,
+            compression=None,
+            extensions=compression_extensions(window_bits=10, threshold=64),
+        ) as server:
+            port = server.sockets[0].getsockname()[1]
+            async with websockets.connect(f"ws://127.0.0.1:{port}/") as client:
+                self.assertEqual(len(client.extensions), 1)
+                await client.send("x" * 1000)
+                self.assertEqual(await client.recv(), "x" * 1000)
+            async with websockets.connect(
+                f"ws://127.0.0.1:{port}/?compression=off"
+            ) as client:
+                self.assertEqual(client.extensions, [])
+
+        extension = ThresholdPerMessageDeflate(False, False, 15, 10, threshold=64)
+        small = extension.encode(Frame(OP_TEXT, b"x" * 63))
+        self.assertFalse(small.rsv1)
+        large = extension.encode(Frame(OP_TEXT, b"x" * 64))
+        self.assertTrue(large.rsv1)
+        self.assertLess(len(large.data), 64)
+
+
 if __name__ == "__main__":
     unittest.main()
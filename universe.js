@@ -47,11 +47,22 @@ let applySettingsButtonDisabled = true;
 settingsRectangle.addEventListener("click", handleSettingsClick);
 document.addEventListener("DOMContentLoaded", adjustSettingsRectangleHeight);
 window.addEventListener("resize", handleResize);
+window.addEventListener("scroll", handleViewportChange);
 
 applySettingsButton.addEventListener("click", applySettings);
 
 let host = window.location.hostname;
 let seed = new URLSearchParams(window.location.search).get("seed") || "0";
+let showNestField = new URLSearchParams(window.location.search).get("overlay") === "nest_field";
+let rasterMode = new URLSearchParams(window.location.search).get("raster") === "1";
+let publishHz = parseFloat(new URLSearchParams(window.location.search).get("publish_hz")) || 0;
+let lastBatch = null;
+let compressionOff = new URLSearchParams(window.location.search).get("compression") === "off";
+let viewportMode = new URLSearchParams(window.location.search).get("viewport") === "1";
+let viewportSummary = null;
+let simulationFailed = false;
+let viewportTimer = null;
+const MAX_RASTER_SIZE = 512;
 // let ignoreMessages = false;
 
 updateLabel("uni-title-text", seed);
@@ -62,7 +73,8 @@ let reconnectAttempts = 0;
 const maxReconnectAttempts = 5;
 
 function setupWebSocket() {
-    websocket = new WebSocket(`ws://${host}:8765`);
+    websocket = new WebSocket(`ws://${host}:8765/${compressionOff ? "?compression=off" : ""}`);
+    websocket.binaryType = "arraybuffer";
 
     websocket.onopen = handleWebSocketOpen;
     websocket.onerror = handleWebSocketError;
@@ -119,6 +131,13 @@ function handleSettingsClick() {
     applySettingsButtonDisabled = false;
 }
 
+function handleViewportChange() {
+    if (!viewportMode) return;
+    // Send the visible cells once the scrolling settles
+    clearTimeout(viewportTimer);
+    viewportTimer = setTimeout(sendViewport, 200);
+}
+
 function adjustSettingsRectangleHeight() {
     settingsRectangle.style.height = `${canvas.height * (settingsRectangle.offsetWidth / canvas.width)}px`;
 }
@@ -129,6 +148,7 @@ function handleResize() {
     updateLabel("label-height", canvas.offsetHeight);
     applySettingsButton.disabled = false;
     applySettingsButtonDisabled = false;
+    handleViewportChange();
 }
 
 function applySettings() {
@@ -154,8 +174,9 @@ function applySettings() {
     sendWebSocketMessage({
         type: "SIMULATION_SET_SEED", seed: seed
     });
+    sendStreamSettings();
     sendWebSocketMessage({
-        type: "SIMULATION_START"
+        type: "SIMULATION_START", nest_field: showNestField
     });
 }
 
@@ -169,8 +190,9 @@ function handleWebSocketOpen() {
     sendWebSocketMessage({
         type: "SIMULATION_SET_SEED", seed: seed
     });
+    sendStreamSettings();
     sendWebSocketMessage({
-        type: "SIMULATION_START"
+        type: "SIMULATION_START", nest_field: showNestField
     });
 }
 
@@ -233,7 +255,14 @@ function processMessageQueue() {
     requestAnimationFrame(() => {
         while (messageQueue.length > 0) {
             const event = messageQueue.shift();
-            handleEvent(JSON.parse(event));
+            if (event instanceof ArrayBuffer) {
+                // Only raster frames ("MOAF") are drawn, heatmap frames are for dashboards
+                if (new Uint8Array(event, 0, 4)[3] === 0x46) {
+                    handleRasterFrame(event);
+                }
+            } else {
+                handleEvent(JSON.parse(event));
+            }
         }
         processingMessages = false;
     });
@@ -250,10 +279,17 @@ const handlers = {
     "SIMULATION_PAUSE": pauseSimulationHandler,
     "SIMULATION_RESUME": resumeSimulationHandler,
     "ERROR_SIMULATION_NOT_RUNNING": errorSimulationNotRunning,
+    "ERROR_SIMULATION_TOO_COSTLY": errorSimulationTooCostly,
+    "ERROR_SIMULATION_FAILED": errorSimulationFailed,
+    "SIMULATION_QUEUED": handleSimulationQueued,
     "NEST_SPAWN": handleNestSpawn,
+    "NEST_FIELD": handleNestField,
     "OBJECT_SPAWN": handleObjectSpawn,
     "OBJECT_DESPAWN": handleObjectDespawn,
-    "SIMULATION_CURRENT_ROUND": updateCurrentRound
+    "SIMULATION_CURRENT_ROUND": updateCurrentRound,
+    "RASTER_PALETTE": setRasterPalette,
+    "VIEWPORT_SUMMARY": handleViewportSummary,
+    "SIMULATION_BATCH": handleSimulationBatch
 };
 
 function handleEvent(data) {
@@ -338,7 +374,8 @@ function startSimulationHandler() {
 }
 
 function endSimulationHandler() {
-    stateElement.innerText = "Finished";
+    stateElement.innerText = simulationFailed ? "Failed" : "Finished";
+    simulationFailed = false;
     document.getElementById("websocket-error-notification").style.display = "none";
     document.getElementById("overload-notification").style.display = "none";
     blurOverlayElement.style.opacity = 0;
@@ -362,12 +399,58 @@ function errorSimulationNotRunning() {
     blurOverlayElement.style.opacity = 0;
 }
 
+function errorSimulationFailed({state}) {
+    // The SIMULATION_END following the error shows it
+    simulationFailed = true;
+    console.error(state);
+}
+
+function errorSimulationTooCostly() {
+    errorSimulationNotRunning();
+    stateElement.innerText = "Too costly";
+}
+
+function handleSimulationQueued({state}) {
+    stateElement.innerText = `Queued (${state.position + 1})`;
+}
+
 function handleNestSpawn({target}) {
     nests.push(target);
     nestCtx.fillStyle = "lightgray";
     nestCtx.fillRect(target.area.position_1.x * SCALE, target.area.position_1.y * SCALE, target.area.width * SCALE, target.area.height * SCALE);
 }
 
+function decodeUint16(base64) {
+    const bytes = Uint8Array.from(atob(base64), c => c.charCodeAt(0));
+    return new Uint16Array(bytes.buffer);
+}
+
+function handleNestField({target}) {
+    const nestIds = decodeUint16(target.nest_ids);
+    const image = new ImageData(target.width, target.height);
+    const colors = {};
+    for (let i = 0; i < nestIds.length; i++) {
+        if (!(nestIds[i] in colors)) {
+            colors[nestIds[i]] = [...hslToRgb(((nestIds[i] * 137) % 360) / 360, 0.6, 0.5), 40];
+        }
+        image.data.set(colors[nestIds[i]], i * 4);
+    }
+    const fieldCanvas = document.createElement("canvas");
+    fieldCanvas.width = target.width;
+    fieldCanvas.height = target.height;
+    fieldCanvas.getContext("2d").putImageData(image, 0, 0);
+    nestCtx.imageSmoothingEnabled = false;
+    nestCtx.drawImage(fieldCanvas, target.position_1.x * SCALE, target.position_1.y * SCALE, target.width * SCALE, target.height * SCALE);
+}
+
+function hslToRgb(h, s, l) {
+    const f = n => {
+        const k = (n + h * 12) % 12;
+        return Math.round(255 * (l - s * Math.min(l, 1 - l) * Math.max(-1, Math.min(k - 3, 9 - k, 1))));
+    };
+    return [f(0), f(8), f(4)];
+}
+
 function handleObjectSpawn({target}) {
     objects.push(target);
     ctx.fillStyle = objectTypeColors[target.type];
@@ -383,10 +466,74 @@ function clearObject(target) {
     ctx.clearRect(target.position.x * SCALE, target.position.y * SCALE, scales.maxFloorHalf, scales.maxFloorHalf);
 }
 
+let rasterPalette = [];
+
+function setRasterPalette({state}) {
+    const scratch = document.createElement("canvas").getContext("2d");
+    rasterPalette = state.map(color => {
+        if (color === "transparent") return [0, 0, 0, 0];
+        scratch.fillStyle = color;
+        const hex = scratch.fillStyle;
+        return [1, 3, 5].map(i => parseInt(hex.substr(i, 2), 16)).concat(255);
+    });
+}
+
+function handleRasterFrame(buffer) {
+    // Header: magic, round, width, height, scale, encoding
+    const view = new DataView(buffer);
+    const round = view.getUint32(4, true);
+    const width = view.getUint16(8, true);
+    const height = view.getUint16(10, true);
+    const scale = view.getUint16(12, true);
+    const encoding = view.getUint8(14);
+    const body = new Uint8Array(buffer, 15);
+    const image = new ImageData(width, height);
+    let pixel = 0;
+    const put = (value, count) => {
+        const color = rasterPalette[value] || [0, 0, 0, 0];
+        for (let i = 0; i < count; i++, pixel++) {
+            image.data.set(color, pixel * 4);
+        }
+    };
+    if (encoding === 1) {
+        for (let i = 0; i + 1 < body.length; i += 2) {
+            put(body[i + 1], body[i]);
+        }
+    } else {
+        body.forEach(value => put(value, 1));
+    }
+    const frameCanvas = document.createElement("canvas");
+    frameCanvas.width = width;
+    frameCanvas.height = height;
+    frameCanvas.getContext("2d").putImageData(image, 0, 0);
+    ctx.clearRect(0, 0, canvas.width, canvas.height);
+    ctx.imageSmoothingEnabled = false;
+    ctx.drawImage(frameCanvas, 0, 0, width * scale * SCALE, height * scale * SCALE);
+    roundElement.innerText = round.toString();
+}
+
 function updateCurrentRound({state}) {
     roundElement.innerText = state.toString();
 }
 
+function handleViewportSummary({state}) {
+    // Ants outside the viewport are only counted per tile
+    viewportSummary = state;
+}
+
+function handleSimulationBatch({state}) {
+    // A batch holds the updates of every round since the previous one
+    for (const event of state.events) {
+        handleEvent(event);
+    }
+    updateCurrentRound({state: state.round});
+    if (lastBatch && state.timestamp > lastBatch.timestamp) {
+        const rate = (state.round - lastBatch.round) / (state.timestamp - lastBatch.timestamp);
+        updateTps({state: Math.round(rate)});
+    }
+    lastBatch = {round: state.round, timestamp: state.timestamp};
+}
+
 // Simulation Control
 function startSimulation() {
     // ignoreMessages = true;
@@ -418,8 +565,9 @@ function startSimulation() {
     sendWebSocketMessage({
         type: "SIMULATION_SET_SEED", seed: seed
     });
+    sendStreamSettings();
     sendWebSocketMessage({
-        type: "SIMULATION_START"
+        type: "SIMULATION_START", nest_field: showNestField
     });
 }
 
@@ -466,6 +614,37 @@ function handleRoundsInput() {
     });
 }
 
+function sendStreamSettings() {
+    sendWebSocketMessage({
+        type: "SIMULATION_SET_RASTER",
+        width: rasterMode ? Math.min(Math.floor(canvas.width / SCALE), MAX_RASTER_SIZE) : 0,
+        height: rasterMode ? Math.min(Math.floor(canvas.height / SCALE), MAX_RASTER_SIZE) : 0
+    });
+    sendWebSocketMessage({type: "SIMULATION_SET_PUBLISH_HZ", hz: publishHz});
+    sendViewport();
+    lastBatch = null;
+}
+
+function sendViewport() {
+    if (!viewportMode || websocket.readyState !== WebSocket.OPEN) return;
+    // The cells of the canvas inside the window
+    const rect = canvas.getBoundingClientRect();
+    const left = Math.max(0, -rect.left);
+    const top = Math.max(0, -rect.top);
+    const right = Math.min(rect.width, window.innerWidth - rect.left);
+    const bottom = Math.min(rect.height, window.innerHeight - rect.top);
+    const x = Math.floor(left / SCALE);
+    const y = Math.floor(top / SCALE);
+    sendWebSocketMessage({
+        type: "SIMULATION_SET_VIEWPORT",
+        x: x,
+        y: y,
+        width: Math.max(1, Math.ceil(right / SCALE) - x),
+        height: Math.max(1, Math.ceil(bottom / SCALE) - y),
+        zoom: SCALE
+    });
+}
+
 function sendWebSocketMessage(message) {
     if (websocket.readyState === WebSocket.OPEN) {
         websocket.send(JSON.stringify(message));
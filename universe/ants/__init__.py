@@ -1,5 +1,14 @@
-__all__ = ["Ant", "BlackAnt", "RedAnt"]
+__all__ = [
+    "Ant",
+    "BlackAnt",
+    "RedAnt",
+    "Species",
+    "SPECIES",
+    "get_species",
+    "register_species",
+]
 
 from .ant import Ant
 from .black_ant import BlackAnt
 from .red_ant import RedAnt
+from .species import SPECIES, Species, get_species, register_species
@@ -1,12 +1,19 @@
 import enum
-from abc import abstractmethod
-from typing import TYPE_CHECKING, Callable, List
+from typing import TYPE_CHECKING, List, Optional, Union
 
-from universe.map import Direction, Object, Position
+from universe.map import Direction, Position
 from universe.update import UpdateType
 
+from .species import Species
+
 if TYPE_CHECKING:
+    import random
+
+    from universe.config import Rules
+    from universe.events import EventSink
     from universe.map.boundary import Boundary
+    from universe.rng import RNG
+    from universe.tick import Snapshot
     from universe.universe import Universe
 
 
@@ -24,6 +31,8 @@ class Ant:
 
     :var id: The ID of the ant.
     :type id: int
+    :var species: The species of the ant.
+    :type species: Species
     :var role: The role of the ant.
     :type role: Role
     :var health: The health of the ant.
@@ -41,25 +50,34 @@ class Ant:
     """
 
     NEXT_ID = 0
+    species: Species = None
     role: Role = Role.WORKER
-    health = 50
-    food = 60
-    damage = 10
-    speed = 3
+    health: int
+    food: int
+    damage: int
+    speed: int
     position: Position = None
     alive = True
 
-    def __init__(self, position: Position):
+    def __init__(self, position: Position, species: Optional[Species] = None):
         """
         Initialize the ant.
 
         :param position: The position of the ant.
         :type position: Position
+        :param species: The species of the ant, defaults to the species of the class.
+        :type species: Optional[Species]
         """
 
         self.id = Ant.NEXT_ID
         Ant.NEXT_ID += 1
         self.position = position
+        if species is not None:
+            self.species = species
+        self.health = self.species.health
+        self.food = self.species.food
+        self.damage = self.species.damage
+        self.speed = self.species.speed
 
     def __str__(self) -> str:
         """Return the string representation of the ant."""
@@ -80,92 +98,213 @@ class Ant:
             if self.position.can_move(boundary, direction)
         ]
 
-    @abstractmethod
-    async def move(self, universe: "Universe", update_callback: Callable):
+    def move(self, universe: "Universe", events: "EventSink"):
         """
         Move the ant in the universe.
 
-        This method should be implemented by the subclasses.
+        :param universe: The universe.
+        :type universe: Universe
+        :param events: The sink of the updates.
+        :type events: EventSink
+        """
+        move = self.decide_move(universe, universe.rng)
+        if move is not None:
+            self.apply_move(universe, move, events)
+
+    def decide_move(
+        self,
+        view: Union["Universe", "Snapshot"],
+        rng: Union["RNG", "random.Random"],
+    ) -> Optional[dict]:
+        """
+        Choose the next move of the ant without changing anything.
+
+        The move is chosen at random from a weighted list: one random step, cells
+        with enemies or consumable objects in sight weighted by the species and,
+        for a queen, steps towards the nearest nest. When the universe has a
+        pheromone field, the ant follows the scent of enemies and food instead of
+        looking at every cell in sight.
+
+        :param view: The universe, or a snapshot of it.
+        :type view: Union[Universe, Snapshot]
+        :param rng: The random number generator of the decision.
+        :type rng: Union[RNG, random.Random]
+        :return: The keyword arguments of :meth:`Position.move`, or None if the
+            ant cannot move.
+        :rtype: Optional[dict]
+        """
+        available_directions = self.available_directions(view.boundary)
+        if not available_directions:
+            return None
+        species = self.species
+        # Combine direction and distance into a single choice
+        moves = [
+            {
+                "direction": rng.choice(available_directions),
+                "distance": rng.randint(0, self.speed),
+            }
+        ]
+
+        if self.role == Role.QUEEN:
+            direction_to_nest, steps = view.nest_field.direction(self.position)
+            if direction_to_nest is not None:
+                moves.extend(
+                    [
+                        {
+                            "direction": direction_to_nest,
+                            "distance": min(steps, self.speed),
+                        }
+                    ]
+                    * species.nest_bias
+                )
+
+        pheromones = view.pheromones
+        if pheromones is None:
+            food_cells = view.objects.consumable_cells(self.position, self.speed)
+            x, y = self.position.x, self.position.y
+            for dx in range(-self.speed, self.speed + 1):
+                for dy in range(-self.speed, self.speed + 1):
+                    if not dx and not dy:
+                        continue
+                    key = (x + dx, y + dy)
+                    weight = 0
+                    if view.has_enemy(key, species):
+                        weight += species.enemy_weight
+                    if key in food_cells:
+                        weight += species.object_weight
+                    if weight:
+                        moves.extend([{"new_position": Position(*key)}] * weight)
+        else:
+            # Follow the scent instead of scanning every cell in sight
+            enemy_direction = pheromones.enemy_direction(
+                species.index + 1, self.position
+            )
+            if enemy_direction is not None:
+                moves.extend(
+                    [
+                        {
+                            "direction": enemy_direction,
+                            "distance": rng.randint(1, self.speed),
+                        }
+                    ]
+                    * species.enemy_weight
+                )
+            food_direction = pheromones.food_direction(self.position)
+            if food_direction is not None:
+                moves.extend(
+                    [
+                        {
+                            "direction": food_direction,
+                            "distance": rng.randint(1, self.speed),
+                        }
+                    ]
+                    * species.object_weight
+                )
+        return rng.choice(moves)
+
+    def apply_move(self, universe: "Universe", move: dict, events: "EventSink"):
+        """
+        Apply a move chosen by :meth:`decide_move`.
+
+        The ant leaves its scent behind when the universe has a pheromone field,
+        eats or starves, and dies when its health runs out.
 
         :param universe: The universe.
         :type universe: Universe
-        :param update_callback: The callback function to update the state.
-        :type update_callback: Callable
+        :param move: The keyword arguments of :meth:`Position.move`.
+        :type move: dict
+        :param events: The sink of the updates.
+        :type events: EventSink
         """
-        pass
+        self.position.move(universe.boundary, **move)
+        pheromones = universe.pheromones
+        if pheromones is not None:
+            pheromones.deposit_scent(self.species.index + 1, self.position)
+        if self.food > 0:
+            self.food -= 1
+        else:
+            self.health -= 1
+            if self.health <= 0:
+                self.die(events)
+                return  # When the ant dies, it should not move
+        events.emit(UpdateType.ANT_MOVE, self)
 
-    async def __promote(self, update_callback: Callable, silent=False):
+    def __promote(self, events: "EventSink", rules: "Rules", silent=False):
         """
         Promote the ant to the next role.
 
-        :param update_callback: The callback function to update the state.
-        :type update_callback: Callable
+        :param events: The sink of the updates.
+        :type events: EventSink
+        :param rules: The rules of the universe.
+        :type rules: Rules
         :param silent: Whether to suppress the update, defaults to False.
         :type silent: bool
         """
         if self.role == Role.WORKER:
             self.role = Role.SOLDIER
-            self.health = round(self.health * 1.5)
-            self.damage = round(self.damage * 1.5)
-            self.speed = round(self.speed * 1.5)
+            self.health = round(self.health * rules.soldier_growth)
+            self.damage = round(self.damage * rules.soldier_growth)
+            self.speed = round(self.speed * rules.soldier_growth)
         elif self.role == Role.SOLDIER:
             self.role = Role.QUEEN
-            self.health *= 3
-            self.damage *= 4
-            self.speed = 2
+            self.health = round(self.health * rules.queen_health_growth)
+            self.damage = round(self.damage * rules.queen_damage_growth)
+            self.speed = rules.promoted_queen_speed
         else:
             raise ValueError("Cannot promote a queen")
         if not silent:
-            await update_callback(UpdateType.ANT_PROMOTE, self)
+            events.emit(UpdateType.ANT_PROMOTE, self)
 
-    async def set_role(self, role: Role, update_callback: Callable):
+    def set_role(self, role: Role, events: "EventSink", rules: "Rules"):
         """
         Set the role of the ant.
 
         :param role: The role to set.
         :type role: Role
-        :param update_callback: The callback function to update the state.
-        :type update_callback: Callable
+        :param events: The sink of the updates.
+        :type events: EventSink
+        :param rules: The rules of the universe.
+        :type rules: Rules
         """
         self.role = role
         if role == Role.SOLDIER:
-            self.health = 45
-            self.damage = 15
-            self.speed = 4
+            self.health = rules.soldier_health
+            self.damage = rules.soldier_damage
+            self.speed = rules.soldier_speed
         elif role == Role.QUEEN:
-            self.health = 90
-            self.food = 25
-            self.damage = 40
-            self.speed = 1
-        await update_callback(UpdateType.ANT_PROMOTE, self)
+            self.health = rules.queen_health
+            self.food = rules.queen_food
+            self.damage = rules.queen_damage
+            self.speed = rules.queen_speed
+        events.emit(UpdateType.ANT_PROMOTE, self)
 
-    async def attack(self, other: "Ant", update_callback: Callable):
+    def attack(self, other: "Ant", events: "EventSink"):
         """
         Attack another ant.
 
         :param other: The ant to attack.
         :type other: Ant
-        :param update_callback: The callback function to update the state.
-        :type update_callback: Callable
+        :param events: The sink of the updates.
+        :type events: EventSink
         """
         other.health -= self.damage
-        await update_callback(UpdateType.ANT_ATTACK, self, other)
+        events.emit(UpdateType.ANT_ATTACK, self, other)
         if other.health <= 0:
-            await other.die(update_callback)
+            other.die(events)
 
-    async def die(self, update_callback: Callable):
+    def die(self, events: "EventSink"):
         """
         Kill the ant.
 
-        :param update_callback: The callback function to update the state.
-        :type update_callback: Callable
+        :param events: The sink of the updates.
+        :type events: EventSink
         """
         self.alive = False
         self.health = 0
         self.food = 0
         self.damage = 0
         self.speed = 0
-        await update_callback(UpdateType.ANT_DEATH, self)
+        events.emit(UpdateType.ANT_DEATH, self)
 
     def is_alive(self) -> bool:
         """
@@ -176,11 +315,11 @@ class Ant:
         """
         return self.alive
 
-    async def spawn_ants(
+    def spawn_ants(
         self,
         universe: "Universe",
         max_count: int,
-        update_callback: Callable,
+        events: "EventSink",
     ):
         """
         Spawn new ants for the queen.
@@ -189,22 +328,27 @@ class Ant:
         :type universe: Universe
         :param max_count: The maximum number of ants to spawn.
         :type max_count: int
-        :param update_callback: The callback function to update the state.
-        :type update_callback: Callable
+        :param events: The sink of the updates.
+        :type events: EventSink
         """
         if universe.ants_count < universe.MAX_ANTS:
             for _ in range(
                 universe.rng.choice([universe.rng.randint(0, max_count), 0, 0, 0, 0])
             ):
                 for direction in self.available_directions(universe.boundary):
+                    # The calculated positions are cached and shared, but every
+                    # ant moves its own position in place
                     new_position = self.position.calculate_new_position(
                         universe.boundary, direction, 1
                     )
-                    new_ant = type(self)(new_position)
-                    if universe.rng.random() < 0.05:
-                        await new_ant.__promote(update_callback, silent=True)
-                        if universe.rng.random() < 0.02:
-                            neighbors_20 = self.position.get_neighbors(5)
+                    new_position = Position(new_position.x, new_position.y)
+                    new_ant = type(self)(new_position, self.species)
+                    if universe.rng.random() < universe.rules.soldier_odds:
+                        new_ant.__promote(events, universe.rules, silent=True)
+                        if universe.rng.random() < universe.rules.queen_odds:
+                            neighbors_20 = self.position.get_neighbors(
+                                universe.rules.brood_radius
+                            )
                             same_color_queen_in_20_count = len(
                                 [
                                     ant
@@ -212,86 +356,87 @@ class Ant:
                                     for ant in universe.ants.get(
                                         (position.x, position.y), []
                                     )
-                                    if type(ant) is type(self)
+                                    if ant.species is self.species
                                 ]
                             )
-                            if same_color_queen_in_20_count < 3:
-                                await new_ant.__promote(update_callback, silent=True)
+                            if (
+                                same_color_queen_in_20_count
+                                < universe.rules.queen_crowd
+                            ):
+                                new_ant.__promote(events, universe.rules, silent=True)
 
                     universe.ants[(new_ant.position.x, new_ant.position.y)].append(
                         new_ant
                     )
                     universe.ants_count += 1
-                    await update_callback(UpdateType.ANT_SPAWN, new_ant)
+                    events.emit(UpdateType.ANT_SPAWN, new_ant)
 
-    async def process(
+    def process(
         self,
         universe: "Universe",
-        update_callback: Callable,
+        events: "EventSink",
     ):
         """
         Process the ant.
 
         :param universe: The universe.
         :type universe: Universe
-        :param update_callback: The callback function to update the state.
-        :type update_callback: Callable
+        :param events: The sink of the updates.
+        :type events: EventSink
         """
         front_position = self.position.calculate_new_position(
             universe.boundary, self.position.direction, 1
         )
 
-        targets = (
-            universe.ants.get((self.position.x, self.position.y), [])
-            + universe.ants.get((front_position.x, front_position.y), [])
-            + universe.objects.get((self.position.x, self.position.y), [])
-            + universe.objects.get((front_position.x, front_position.y), [])
+        targets = universe.ants.get(
+            (self.position.x, self.position.y), []
+        ) + universe.ants.get((front_position.x, front_position.y), [])
+        object_positions = (
+            Position(self.position.x, self.position.y),
+            front_position,
         )
 
         for entity in targets:
-            if issubclass(type(entity), Ant):
-                if entity.is_alive():
-                    if type(entity) is not type(self):
-                        await entity.attack(self, update_callback)
-                else:
-                    if entity.role == Role.SOLDIER and self.role == Role.WORKER:
-                        await self.__promote(update_callback)
-                    elif entity.role == Role.QUEEN and self.role == Role.SOLDIER:
-                        await self.__promote(update_callback)
-            elif issubclass(type(entity), Object):
-                await entity.interact(universe.boundary, self, update_callback)
-                if (
-                    entity.usages_left <= 0
-                    and entity
-                    in universe.objects[(entity.position.x, entity.position.y)]
-                ):
-                    universe.objects[(entity.position.x, entity.position.y)].remove(
-                        entity
-                    )
-                    universe.objects_count -= 1
-                    await update_callback(UpdateType.OBJECT_DESPAWN, target=entity)
+            if entity.is_alive():
+                if entity.species is not self.species:
+                    entity.attack(self, events)
+            else:
+                if entity.role == Role.SOLDIER and self.role == Role.WORKER:
+                    self.__promote(events, universe.rules)
+                elif entity.role == Role.QUEEN and self.role == Role.SOLDIER:
+                    self.__promote(events, universe.rules)
+
+        for position in object_positions:
+            entity = universe.objects.object_at(position)
+            if entity is None:
+                continue
+            entity.interact(universe.boundary, self, events, universe.rules)
+            if universe.objects.update(entity):
+                if universe.pheromones is not None:
+                    universe.pheromones.set_source(entity.position, False)
+                events.emit(UpdateType.OBJECT_DESPAWN, target=entity)
 
         if self.role is Role.QUEEN:
             # check if queen is in nest
-            for nest in universe.nests:
-                if self.position in nest.area:
-                    if self.food < 10:
-                        self.food += 2
-                    if self.health < 90:
-                        self.health += 3
-                    neighbors_5 = self.position.get_neighbors(5)
-                    same_color_ants_in_5_count = len(
-                        [
-                            ant
-                            for position in neighbors_5
-                            for ant in universe.ants.get((position.x, position.y), [])
-                            if type(ant) is type(self)
-                        ]
-                    )
-                    nest.queen = self
-                    if same_color_ants_in_5_count < 20:
-                        await self.spawn_ants(universe, 3, update_callback)
-                    break
+            nest = universe.nest_index.nest_at(self.position)
+            if nest is not None:
+                rules = universe.rules
+                if self.food < rules.nest_food_limit:
+                    self.food += rules.nest_food_gain
+                if self.health < rules.nest_health_limit:
+                    self.health += rules.nest_health_gain
+                neighbors_5 = self.position.get_neighbors(rules.brood_radius)
+                same_color_ants_in_5_count = len(
+                    [
+                        ant
+                        for position in neighbors_5
+                        for ant in universe.ants.get((position.x, position.y), [])
+                        if ant.species is self.species
+                    ]
+                )
+                nest.queen = self
+                if same_color_ants_in_5_count < rules.brood_crowd:
+                    self.spawn_ants(universe, rules.brood_size, events)
 
     def to_dict(self):
         """
@@ -303,10 +448,7 @@ class Ant:
         return {
             "id": self.id,
             "role": self.role.name,
-            "color": {
-                "BlackAnt": "black",
-                "RedAnt": "red",
-            }[type(self).__name__],
+            "color": self.species.color,
             "health": self.health,
             "damage": self.damage,
             "speed": self.speed,
@@ -0,0 +1,202 @@
+from typing import Dict, List
+
+
+class Species:
+    """
+    Class describing an ant species.
+
+    A species holds the data-driven parameters shared by every ant of a colony,
+    so that adding a new colony does not require a new :class:`Ant` subclass.
+
+    :var name: The unique name of the species.
+    :type name: str
+    :var color: The color used by the frontend.
+    :type color: str
+    :var console_color: The termcolor color used by the console map.
+    :type console_color: str
+    :var health: The initial health of a worker.
+    :type health: int
+    :var food: The initial food of a worker.
+    :type food: int
+    :var damage: The initial damage of a worker.
+    :type damage: int
+    :var speed: The initial speed of a worker.
+    :type speed: int
+    :var enemy_weight: The move weight of a visible cell occupied by an enemy ant.
+    :type enemy_weight: int
+    :var object_weight: The move weight of a visible cell with food or water.
+    :type object_weight: int
+    :var nest_bias: The number of extra moves towards the nest added for a queen.
+    :type nest_bias: int
+    :var spawn_weight: The number of ants spawned per spawn cycle at start.
+    :type spawn_weight: int
+    :var index: The index of the species in the registry.
+    :type index: int
+    """
+
+    __slots__ = (
+        "name",
+        "color",
+        "console_color",
+        "health",
+        "food",
+        "damage",
+        "speed",
+        "enemy_weight",
+        "object_weight",
+        "nest_bias",
+        "spawn_weight",
+        "index",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        color: str,
+        console_color: str = "white",
+        health: int = 50,
+        food: int = 60,
+        damage: int = 10,
+        speed: int = 3,
+        enemy_weight: int = 2,
+        object_weight: int = 2,
+        nest_bias: int = 7,
+        spawn_weight: int = 1,
+    ):
+        """
+        Initialize the species.
+
+        :param name: The unique name of the species.
+        :type name: str
+        :param color: The color used by the frontend.
+        :type color: str
+        :param console_color: The termcolor color used by the console map.
+        :type console_color: str
+        :param health: The initial health of a worker.
+        :type health: int
+        :param food: The initial food of a worker.
+        :type food: int
+        :param damage: The initial damage of a worker.
+        :type damage: int
+        :param speed: The initial speed of a worker.
+        :type speed: int
+        :param enemy_weight: The move weight of a cell occupied by an enemy ant.
+        :type enemy_weight: int
+        :param object_weight: The move weight of a cell with food or water.
+        :type object_weight: int
+        :param nest_bias: The number of extra moves towards the nest for a queen.
+        :type nest_bias: int
+        :param spawn_weight: The number of ants spawned per spawn cycle at start.
+        :type spawn_weight: int
+        """
+        self.name = name
+        self.color = color
+        self.console_color = console_color
+        self.health = health
+        self.food = food
+        self.damage = damage
+        self.speed = speed
+        self.enemy_weight = enemy_weight
+        self.object_weight = object_weight
+        self.nest_bias = nest_bias
+        self.spawn_weight = spawn_weight
+        self.index = -1
+
+    def __repr__(self) -> str:
+        """Return a formal string representation of the species."""
+        return f"Species({self.name!r})"
+
+    def __reduce_ex__(self, protocol):
+        """
+        Pickle a registered species by name.
+
+        Ants sent to another process then keep sharing the registered species,
+        which is compared by identity. A species registered at run time is
+        added to the registry of the other process with the same index, and to
+        :data:`SPECIES` in the order of the indexes.
+        """
+        if _SPECIES_BY_NAME.get(self.name) is self:
+            state = tuple(getattr(self, name) for name in self.__slots__)
+            return _restore_species, (self.name, state)
+        return super().__reduce_ex__(protocol)
+
+
+SPECIES: List[Species] = []
+_SPECIES_BY_NAME: Dict[str, Species] = {}
+
+
+def register_species(species: Species) -> Species:
+    """
+    Register a species so it can be used in simulations.
+
+    :param species: The species to register.
+    :type species: Species
+    :return: The registered species.
+    :rtype: Species
+    :raises ValueError: If a species with the same name is already registered.
+    """
+    if species.name in _SPECIES_BY_NAME:
+        raise ValueError(f"Species already registered: {species.name}")
+    species.index = len(SPECIES)
+    SPECIES.append(species)
+    _SPECIES_BY_NAME[species.name] = species
+    return species
+
+
+def _restore_species(name: str, state: tuple) -> Species:
+    """Get a pickled species from the registry, registering it if needed."""
+    try:
+        return _SPECIES_BY_NAME[name]
+    except KeyError:
+        species = Species.__new__(Species)
+        for attribute, value in zip(Species.__slots__, state):
+            setattr(species, attribute, value)
+        # The species of the other process may arrive in any order
+        position = len(SPECIES)
+        while position and SPECIES[position - 1].index > species.index:
+            position -= 1
+        SPECIES.insert(position, species)
+        _SPECIES_BY_NAME[name] = species
+        return species
+
+
+def get_species(name: str) -> Species:
+    """
+    Get a registered species by its name.
+
+    :param name: The name of the species.
+    :type name: str
+    :return: The species.
+    :rtype: Species
+    :raises ValueError: If the species is not registered.
+    """
+    try:
+        return _SPECIES_BY_NAME[name]
+    except KeyError:
+        raise ValueError(f"Unknown species: {name}") from None
+
+
+BLACK = register_species(
+    Species(
+        "BlackAnt",
+        color="black",
+        console_color="blue",
+        enemy_weight=2,
+        object_weight=2,
+        nest_bias=7,
+        spawn_weight=2,
+    )
+)
+RED = register_species(
+    Species(
+        "RedAnt",
+        color="red",
+        console_color="red",
+        health=40,
+        damage=15,
+        speed=4,
+        enemy_weight=4,
+        object_weight=2,
+        nest_bias=6,
+    )
+)
@@ -0,0 +1,171 @@
+from typing import List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from websockets.extensions.base import Extension, ServerExtensionFactory
+from websockets.extensions.permessage_deflate import (
+    PerMessageDeflate,
+    ServerPerMessageDeflateFactory,
+)
+from websockets.frames import OP_BINARY, OP_TEXT, Frame
+from websockets.legacy.server import WebSocketServerProtocol
+from websockets.typing import ExtensionParameter
+
+DEFAULT_WINDOW_BITS = 12
+DEFAULT_MEMORY_LEVEL = 5
+DEFAULT_THRESHOLD = 128
+
+
+class ThresholdPerMessageDeflate(PerMessageDeflate):
+    """
+    Per-message deflate extension leaving small messages uncompressed.
+
+    Compressing a few bytes costs more CPU than it saves on the wire, so single
+    frame messages shorter than the threshold are sent as they are, which the
+    extension allows for any message.
+
+    :var threshold: The size in bytes from which messages are compressed.
+    :type threshold: int
+    """
+
+    def __init__(self, *args, threshold: int = DEFAULT_THRESHOLD, **kwargs):
+        """
+        Initialize the extension.
+
+        :param args: The arguments of :class:`PerMessageDeflate`.
+        :param threshold: The size in bytes from which messages are compressed.
+        :type threshold: int
+        :param kwargs: The keyword arguments of :class:`PerMessageDeflate`.
+        """
+        super().__init__(*args, **kwargs)
+        self.threshold = threshold
+
+    def encode(self, frame: Frame) -> Frame:
+        """
+        Encode an outgoing frame.
+
+        :param frame: The frame.
+        :type frame: Frame
+        :return: The compressed frame, or the frame itself if it is too small.
+        :rtype: Frame
+        """
+        if (
+            frame.fin
+            and frame.opcode in (OP_TEXT, OP_BINARY)
+            and len(frame.data) < self.threshold
+        ):
+            return frame
+        return super().encode(frame)
+
+
+class CompressionFactory(ServerPerMessageDeflateFactory):
+    """
+    Server-side factory negotiating :class:`ThresholdPerMessageDeflate`.
+
+    :var threshold: The size in bytes from which messages are compressed.
+    :type threshold: int
+    """
+
+    def __init__(self, threshold: int = DEFAULT_THRESHOLD, **kwargs):
+        """
+        Initialize the factory.
+
+        :param threshold: The size in bytes from which messages are compressed.
+        :type threshold: int
+        :param kwargs: The keyword arguments of
+            :class:`ServerPerMessageDeflateFactory`.
+        """
+        super().__init__(**kwargs)
+        self.threshold = threshold
+
+    def process_request_params(
+        self,
+        params: Sequence[ExtensionParameter],
+        accepted_extensions: Sequence[Extension],
+    ) -> Tuple[List[ExtensionParameter], PerMessageDeflate]:
+        """
+        Negotiate the parameters requested by a client.
+
+        :param params: The parameters requested by the client.
+        :type params: Sequence[ExtensionParameter]
+        :param accepted_extensions: The extensions accepted so far.
+        :type accepted_extensions: Sequence[Extension]
+        :return: The parameters of the response and the extension.
+        :rtype: Tuple[List[ExtensionParameter], PerMessageDeflate]
+        """
+        response_params, extension = super().process_request_params(
+            params, accepted_extensions
+        )
+        return response_params, ThresholdPerMessageDeflate(
+            extension.remote_no_context_takeover,
+            extension.local_no_context_takeover,
+            extension.remote_max_window_bits,
+            extension.local_max_window_bits,
+            extension.compress_settings,
+            threshold=self.threshold,
+        )
+
+
+def compression_extensions(
+    window_bits: int = DEFAULT_WINDOW_BITS,
+    memory_level: int = DEFAULT_MEMORY_LEVEL,
+    threshold: int = DEFAULT_THRESHOLD,
+    no_context_takeover: bool = False,
+) -> List[ServerExtensionFactory]:
+    """
+    Create the extensions of a websockets server compressing its messages.
+
+    :param window_bits: The base two logarithm of the compression window, 8-15.
+        Larger windows compress repetitive updates better and cost more memory.
+    :type window_bits: int
+    :param memory_level: The zlib memory level, 1-9.
+    :type memory_level: int
+    :param threshold: The size in bytes from which messages are compressed.
+    :type threshold: int
+    :param no_context_takeover: Whether every message is compressed on its own,
+        which saves memory per connection and costs ratio.
+    :type no_context_takeover: bool
+    :return: The extensions, to pass as ``extensions`` with ``compression=None``.
+    :rtype: List[ServerExtensionFactory]
+    :raises ValueError: If a setting is out of range.
+    """
+    if not 1 <= memory_level <= 9:
+        raise ValueError("memory_level must be between 1 and 9")
+    return [
+        CompressionFactory(
+            threshold=threshold,
+            server_no_context_takeover=no_context_takeover,
+            server_max_window_bits=window_bits,
+            client_max_window_bits=window_bits,
+            compress_settings={"memLevel": memory_level},
+        )
+    ]
+
+
+class CompressionProtocol(WebSocketServerProtocol):
+    """
+    Server protocol letting a client opt out of compression.
+
+    Connecting with ``?compression=off`` in the URL skips the negotiation of
+    every extension, e.g. for viewers on a LAN where CPU matters more than
+    bandwidth.
+    """
+
+    def process_extensions(
+        self,
+        headers,
+        available_extensions: Optional[Sequence[ServerExtensionFactory]],
+    ) -> Tuple[Optional[str], List[Extension]]:
+        """
+        Negotiate the extensions, unless the client disabled compression.
+
+        :param headers: The headers of the request.
+        :type headers: websockets.datastructures.Headers
+        :param available_extensions: The extensions of the server.
+        :type available_extensions: Optional[Sequence[ServerExtensionFactory]]
+        :return: The extensions header of the response and the extensions.
+        :rtype: Tuple[Optional[str], List[Extension]]
+        """
+        query = parse_qs(urlsplit(self.path).query)
+        if query.get("compression") == ["off"]:
+            available_extensions = None
+        return super().process_extensions(headers, available_extensions)
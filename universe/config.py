@@ -0,0 +1,752 @@
+import copy
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from universe.viewport import Viewport
+
+DEFAULT_SIZE = 150
+DEFAULT_ROUNDS = 200
+DEFAULT_TPS = 20
+DEFAULT_MAX_ANTS = 500
+DEFAULT_MAX_OBJECTS = 500
+DEFAULT_CONSOLE_FPS = 10
+DEFAULT_HEATMAP_TILE = 8
+# The smallest side of a boundary, the nests span up to 20 cells
+MIN_BOUNDARY_SIZE = 21
+
+# The configuration keys which change the outcome of a seed
+MODEL_KEYS = (
+    "boundary",
+    "species",
+    "nests",
+    "rounds",
+    "stop",
+    "pheromones",
+    "two_phase",
+    "ants",
+    "objects",
+    "max_ants",
+    "max_objects",
+    "rules",
+)
+
+
+def _is_number(value: Any) -> bool:
+    """Return True for the ints and floats, which booleans are not."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_int(value: Any) -> bool:
+    """Return True for the ints, which booleans are not."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class Rules:
+    """
+    Class holding the numbers of the model which the ants read while they play.
+
+    :var soldier_odds: The odds of a spawned ant to be promoted to soldier.
+    :type soldier_odds: float
+    :var queen_odds: The odds of a spawned soldier to be promoted again to queen.
+    :type queen_odds: float
+    :var food_gain: The food an ant gets from a food object.
+    :type food_gain: int
+    :var water_food: The food an ant gets from a water object.
+    :type water_food: int
+    :var water_health: The health an ant gets from a water object.
+    :type water_health: int
+    :var rock_damage: The health an ant loses bumping into a rock.
+    :type rock_damage: int
+    :var object_usages: The number of usages of a spawned object.
+    :type object_usages: int
+    :var soldier_health: The health of an ant made a soldier.
+    :type soldier_health: int
+    :var soldier_damage: The damage of an ant made a soldier.
+    :type soldier_damage: int
+    :var soldier_speed: The speed of an ant made a soldier.
+    :type soldier_speed: int
+    :var queen_health: The health of an ant made a queen.
+    :type queen_health: int
+    :var queen_food: The food of an ant made a queen.
+    :type queen_food: int
+    :var queen_damage: The damage of an ant made a queen.
+    :type queen_damage: int
+    :var queen_speed: The speed of an ant made a queen.
+    :type queen_speed: int
+    :var soldier_growth: The factor of the health, damage and speed of a worker
+        promoted to soldier.
+    :type soldier_growth: float
+    :var queen_health_growth: The factor of the health of a soldier promoted to
+        queen.
+    :type queen_health_growth: float
+    :var queen_damage_growth: The factor of the damage of a soldier promoted to
+        queen.
+    :type queen_damage_growth: float
+    :var promoted_queen_speed: The speed of a soldier promoted to queen.
+    :type promoted_queen_speed: int
+    :var nest_food_limit: The food below which a queen in its nest is fed.
+    :type nest_food_limit: int
+    :var nest_food_gain: The food a queen gets per round in its nest.
+    :type nest_food_gain: int
+    :var nest_health_limit: The health below which a queen in its nest heals.
+    :type nest_health_limit: int
+    :var nest_health_gain: The health a queen gets per round in its nest.
+    :type nest_health_gain: int
+    :var brood_size: The most ants a queen spawns per direction and round.
+    :type brood_size: int
+    :var brood_radius: The radius of the neighborhood counted around a queen.
+    :type brood_radius: int
+    :var brood_crowd: The ants of its species in the neighborhood from which a
+        queen stops spawning.
+    :type brood_crowd: int
+    :var queen_crowd: The ants of its species in the neighborhood from which a
+        spawned soldier is not promoted to queen.
+    :type queen_crowd: int
+    """
+
+    def __init__(
+        self,
+        soldier_odds: float = 0.05,
+        queen_odds: float = 0.02,
+        food_gain: int = 7,
+        water_food: int = 5,
+        water_health: int = 3,
+        rock_damage: int = 1,
+        object_usages: int = 3,
+        soldier_health: int = 45,
+        soldier_damage: int = 15,
+        soldier_speed: int = 4,
+        queen_health: int = 90,
+        queen_food: int = 25,
+        queen_damage: int = 40,
+        queen_speed: int = 1,
+        soldier_growth: float = 1.5,
+        queen_health_growth: float = 3,
+        queen_damage_growth: float = 4,
+        promoted_queen_speed: int = 2,
+        nest_food_limit: int = 10,
+        nest_food_gain: int = 2,
+        nest_health_limit: int = 90,
+        nest_health_gain: int = 3,
+        brood_size: int = 3,
+        brood_radius: int = 5,
+        brood_crowd: int = 20,
+        queen_crowd: int = 3,
+    ):
+        """
+        Initialize the rules.
+
+        :param soldier_odds: The odds of a spawned ant to be promoted to soldier.
+        :type soldier_odds: float
+        :param queen_odds: The odds of a spawned soldier to become a queen.
+        :type queen_odds: float
+        :param food_gain: The food an ant gets from a food object.
+        :type food_gain: int
+        :param water_food: The food an ant gets from a water object.
+        :type water_food: int
+        :param water_health: The health an ant gets from a water object.
+        :type water_health: int
+        :param rock_damage: The health an ant loses bumping into a rock.
+        :type rock_damage: int
+        :param object_usages: The number of usages of a spawned object.
+        :type object_usages: int
+        :param soldier_health: The health of an ant made a soldier.
+        :type soldier_health: int
+        :param soldier_damage: The damage of an ant made a soldier.
+        :type soldier_damage: int
+        :param soldier_speed: The speed of an ant made a soldier.
+        :type soldier_speed: int
+        :param queen_health: The health of an ant made a queen.
+        :type queen_health: int
+        :param queen_food: The food of an ant made a queen.
+        :type queen_food: int
+        :param queen_damage: The damage of an ant made a queen.
+        :type queen_damage: int
+        :param queen_speed: The speed of an ant made a queen.
+        :type queen_speed: int
+        :param soldier_growth: The factor of the health, damage and speed of a
+            worker promoted to soldier.
+        :type soldier_growth: float
+        :param queen_health_growth: The factor of the health of a soldier
+            promoted to queen.
+        :type queen_health_growth: float
+        :param queen_damage_growth: The factor of the damage of a soldier
+            promoted to queen.
+        :type queen_damage_growth: float
+        :param promoted_queen_speed: The speed of a soldier promoted to queen.
+        :type promoted_queen_speed: int
+        :param nest_food_limit: The food below which a queen in its nest is fed.
+        :type nest_food_limit: int
+        :param nest_food_gain: The food a queen gets per round in its nest.
+        :type nest_food_gain: int
+        :param nest_health_limit: The health below which a queen in its nest
+            heals.
+        :type nest_health_limit: int
+        :param nest_health_gain: The health a queen gets per round in its nest.
+        :type nest_health_gain: int
+        :param brood_size: The most ants a queen spawns per direction and round.
+        :type brood_size: int
+        :param brood_radius: The radius of the neighborhood counted around a
+            queen.
+        :type brood_radius: int
+        :param brood_crowd: The ants of its species in the neighborhood from
+            which a queen stops spawning.
+        :type brood_crowd: int
+        :param queen_crowd: The ants of its species in the neighborhood from
+            which a spawned soldier is not promoted to queen.
+        :type queen_crowd: int
+        :raises ValueError: If an odd is not a probability, another number is
+            negative or the usages do not fit the object grid.
+        """
+        for name, value in (("soldier_odds", soldier_odds), ("queen_odds", queen_odds)):
+            if not _is_number(value) or not 0 <= value <= 1:
+                raise ValueError(f"{name} must be between 0 and 1")
+        for name, value in (
+            ("food_gain", food_gain),
+            ("water_food", water_food),
+            ("water_health", water_health),
+            ("rock_damage", rock_damage),
+            ("soldier_health", soldier_health),
+            ("soldier_damage", soldier_damage),
+            ("soldier_speed", soldier_speed),
+            ("queen_health", queen_health),
+            ("queen_food", queen_food),
+            ("queen_damage", queen_damage),
+            ("queen_speed", queen_speed),
+            ("promoted_queen_speed", promoted_queen_speed),
+            ("nest_food_limit", nest_food_limit),
+            ("nest_food_gain", nest_food_gain),
+            ("nest_health_limit", nest_health_limit),
+            ("nest_health_gain", nest_health_gain),
+            ("brood_size", brood_size),
+            ("brood_radius", brood_radius),
+            ("brood_crowd", brood_crowd),
+            ("queen_crowd", queen_crowd),
+        ):
+            if not _is_int(value) or value < 0:
+                raise ValueError(f"{name} must be a non-negative integer")
+        for name, value in (
+            ("soldier_growth", soldier_growth),
+            ("queen_health_growth", queen_health_growth),
+            ("queen_damage_growth", queen_damage_growth),
+        ):
+            if not _is_number(value) or value < 0:
+                raise ValueError(f"{name} must be a non-negative number")
+        # The object grid keeps the usages of a cell in a byte
+        if not _is_int(object_usages) or not 0 < object_usages <= 0xFF:
+            raise ValueError("object_usages must be an integer between 1 and 255")
+        self.soldier_odds = soldier_odds
+        self.queen_odds = queen_odds
+        self.food_gain = food_gain
+        self.water_food = water_food
+        self.water_health = water_health
+        self.rock_damage = rock_damage
+        self.object_usages = object_usages
+        self.soldier_health = soldier_health
+        self.soldier_damage = soldier_damage
+        self.soldier_speed = soldier_speed
+        self.queen_health = queen_health
+        self.queen_food = queen_food
+        self.queen_damage = queen_damage
+        self.queen_speed = queen_speed
+        self.soldier_growth = soldier_growth
+        self.queen_health_growth = queen_health_growth
+        self.queen_damage_growth = queen_damage_growth
+        self.promoted_queen_speed = promoted_queen_speed
+        self.nest_food_limit = nest_food_limit
+        self.nest_food_gain = nest_food_gain
+        self.nest_health_limit = nest_health_limit
+        self.nest_health_gain = nest_health_gain
+        self.brood_size = brood_size
+        self.brood_radius = brood_radius
+        self.brood_crowd = brood_crowd
+        self.queen_crowd = queen_crowd
+
+    def to_dict(self) -> Dict[str, Union[int, float]]:
+        """
+        Convert the rules to a dictionary.
+
+        :return: The keyword arguments of the rules.
+        :rtype: Dict[str, Union[int, float]]
+        """
+        return dict(vars(self))
+
+
+def _positive_int(key: str, value: Any) -> int:
+    if not _is_int(value) or value <= 0:
+        raise ValueError(f"{key} must be a positive integer")
+    return value
+
+
+def _boundary_size(key: str, value: Any) -> int:
+    if not _is_int(value) or value < MIN_BOUNDARY_SIZE:
+        raise ValueError(f"{key} must be an integer of at least {MIN_BOUNDARY_SIZE}")
+    return value
+
+
+def _non_negative_int(key: str, value: Any) -> int:
+    if not _is_int(value) or value < 0:
+        raise ValueError(f"{key} must be a non-negative integer")
+    return value
+
+
+def _optional_positive_int(key: str, value: Any) -> Optional[int]:
+    return None if value is None else _positive_int(key, value)
+
+
+def _non_negative_number(key: str, value: Any) -> Union[int, float]:
+    if not _is_number(value) or value < 0:
+        raise ValueError(f"{key} must be a non-negative number")
+    return value
+
+
+def _positive_number(key: str, value: Any) -> Union[int, float]:
+    if not _is_number(value) or value <= 0:
+        raise ValueError(f"{key} must be a positive number")
+    return value
+
+
+def _optional_positive_number(key: str, value: Any) -> Optional[Union[int, float]]:
+    return None if value is None else _positive_number(key, value)
+
+
+def _flag(key: str, value: Any) -> bool:
+    if not isinstance(value, bool):
+        raise ValueError(f"{key} must be a boolean")
+    return value
+
+
+def _option(key: str, value: Any) -> Optional[dict]:
+    # Disabled by None or False, enabled with the defaults by True
+    if value is None or value is False:
+        return None
+    if value is True:
+        return {}
+    if not isinstance(value, dict):
+        raise ValueError(f"{key} must be a boolean or an object")
+    return dict(value)
+
+
+def _path(key: str, value: Any) -> Optional[str]:
+    if value is None or value is False:
+        return None
+    if not isinstance(value, str) or not value:
+        raise ValueError(f"{key} must be a path")
+    return value
+
+
+def _seed(key: str, value: Any) -> Union[str, int, float]:
+    if not isinstance(value, str) and not _is_number(value):
+        raise ValueError(f"{key} must be a string or a number")
+    return value
+
+
+def _species(key: str, value: Any) -> Optional[List[str]]:
+    # The registry is loaded by the engine anyway, not by this module
+    from universe.ants import get_species
+
+    if value is None:
+        return None
+    if not isinstance(value, (list, tuple)) or not value:
+        raise ValueError(f"{key} must be a list of species names")
+    for name in value:
+        get_species(name)
+    return list(value)
+
+
+def _known(key: str, value: dict, allowed: Tuple[str, ...]) -> None:
+    unknown = set(value) - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown {key} keys: {sorted(unknown)}")
+
+
+def _probability(key: str, value: Any) -> Union[int, float]:
+    if not _is_number(value) or not 0 <= value <= 1:
+        raise ValueError(f"{key} must be between 0 and 1")
+    return value
+
+
+def _pheromones(key: str, value: Any) -> Optional[dict]:
+    value = _option(key, value)
+    if value is not None:
+        _known(key, value, ("diffusion", "evaporation", "deposit"))
+        for name in ("diffusion", "evaporation"):
+            if name in value:
+                _probability(f"{key}.{name}", value[name])
+        if "deposit" in value:
+            _non_negative_number(f"{key}.deposit", value["deposit"])
+    return value
+
+
+def _two_phase(key: str, value: Any) -> Optional[dict]:
+    value = _option(key, value)
+    if value is not None:
+        _known(key, value, ("workers",))
+        _non_negative_int(f"{key}.workers", value.get("workers", 0))
+    return value
+
+
+def _heatmap(key: str, value: Any) -> Optional[dict]:
+    value = _option(key, value)
+    if value is not None:
+        _known(key, value, ("tile", "every"))
+        _positive_int(f"{key}.tile", value.get("tile", DEFAULT_HEATMAP_TILE))
+        _positive_int(f"{key}.every", value.get("every", 1))
+    return value
+
+
+def _raster(key: str, value: Any) -> Optional[dict]:
+    value = _option(key, value)
+    if value is not None:
+        _known(key, value, ("width", "height", "every"))
+        _positive_int(f"{key}.width", value.get("width"))
+        _positive_int(f"{key}.height", value.get("height"))
+        _positive_int(f"{key}.every", value.get("every", 1))
+    return value
+
+
+def _shared_state(key: str, value: Any) -> Optional[dict]:
+    value = _option(key, value)
+    if value is not None:
+        _known(key, value, ("capacity", "name"))
+        _optional_positive_int(f"{key}.capacity", value.get("capacity"))
+        name = value.get("name")
+        if name is not None and (not isinstance(name, str) or not name):
+            raise ValueError(f"{key}.name must be a name")
+    return value
+
+
+def _stop(key: str, value: Any) -> Optional[dict]:
+    value = _option(key, value)
+    if value is not None:
+        _known(
+            key, value, ("empty", "extinction", "steady_rounds", "variance", "window")
+        )
+        for name in ("empty", "extinction"):
+            if name in value:
+                _flag(f"{key}.{name}", value[name])
+        _non_negative_int(f"{key}.steady_rounds", value.get("steady_rounds", 0))
+        if value.get("variance") is not None:
+            _non_negative_number(f"{key}.variance", value["variance"])
+        window = value.get("window", 50)
+        if not _is_int(window) or window < 2:
+            raise ValueError(f"{key}.window must be an integer of at least 2")
+    return value
+
+
+def _rules(key: str, value: Any) -> Rules:
+    if isinstance(value, Rules):
+        return value
+    if not isinstance(value, dict):
+        raise ValueError(f"{key} must be an object")
+    try:
+        return Rules(**value)
+    except TypeError as error:
+        raise ValueError(f"{key}: {error}") from None
+
+
+def _viewport(key: str, value: Any) -> Optional["Viewport"]:
+    from universe.viewport import Viewport
+
+    if value is not None and not isinstance(value, Viewport):
+        raise ValueError(f"{key} must be a viewport")
+    return value
+
+
+def _check_populations(values: Dict[str, Any]) -> None:
+    # The initial populations are bounded by the limits, which bound the cost
+    for key, limit in (("ants", "max_ants"), ("nests", "max_ants")):
+        if values[key] is not None and values[key] > values[limit]:
+            raise ValueError(f"{key} must not exceed {limit}")
+    if values["objects"] is not None and values["objects"] > values["max_objects"]:
+        raise ValueError("objects must not exceed max_objects")
+
+
+# The check of every configuration key, returning the value to keep
+VALIDATORS: Dict[str, Callable[[str, Any], Any]] = {
+    "seed": _seed,
+    "rounds": _positive_int,
+    "tps": _non_negative_number,
+    "species": _species,
+    "nests": _optional_positive_int,
+    "ants": _optional_positive_int,
+    "objects": _optional_positive_int,
+    "max_ants": _positive_int,
+    "max_objects": _positive_int,
+    "rules": _rules,
+    "partitions": _non_negative_int,
+    "pheromones": _pheromones,
+    "two_phase": _two_phase,
+    "heatmap": _heatmap,
+    "raster": _raster,
+    "shared_state": _shared_state,
+    "stop": _stop,
+    "trajectory": _path,
+    "results": _path,
+    "statistics": _path,
+    "viewport": _viewport,
+    "pause": _flag,
+    "nest_field": _flag,
+    "console_map": _flag,
+    "console_fps": _positive_number,
+    "publish_hz": _optional_positive_number,
+    "compact_json": _flag,
+    "batch_messages": _flag,
+}
+
+
+class SimulationConfig:
+    """
+    Class representing the validated configuration of a simulation.
+
+    A configuration is checked once, when it is built or updated, and the engine
+    compiles it into the universe before the first round, so the rounds only
+    read attributes. The dictionary form uses the same keys, except the
+    boundary which is an object of its width and height. The pause, TPS, rounds,
+    viewport and console map may be updated while the simulation runs.
+
+    :var seed: The seed of the random number generator.
+    :type seed: Union[str, int, float]
+    :var width: The width of the boundary.
+    :type width: int
+    :var height: The height of the boundary.
+    :type height: int
+    :var rounds: The number of rounds.
+    :type rounds: int
+    :var tps: The maximum number of ticks per second, 0 for no limit.
+    :type tps: Union[int, float]
+    :var species: The names of the species, all the registered ones if None.
+    :type species: Optional[List[str]]
+    :var nests: The number of nests, one per species if None.
+    :type nests: Optional[int]
+    :var ants: The number of ants spawned at first, drawn from the size of the
+        boundary if None.
+    :type ants: Optional[int]
+    :var objects: The number of objects spawned at first, drawn from the size of
+        the boundary if None.
+    :type objects: Optional[int]
+    :var max_ants: The population above which the queens stop spawning.
+    :type max_ants: int
+    :var max_objects: The number of objects above which none spawns.
+    :type max_objects: int
+    :var rules: The numbers of the model read by the ants.
+    :type rules: Rules
+    :var partitions: The number of worker processes, in this process below two.
+    :type partitions: int
+    :var pheromones: The options of the pheromone layer, disabled if None.
+    :type pheromones: Optional[dict]
+    :var two_phase: The options of the two-phase tick, disabled if None.
+    :type two_phase: Optional[dict]
+    :var heatmap: The tile and period of the heatmap, disabled if None.
+    :type heatmap: Optional[dict]
+    :var raster: The width, height and period of the raster, disabled if None.
+    :type raster: Optional[dict]
+    :var shared_state: The options of the shared world state, disabled if None.
+    :type shared_state: Optional[dict]
+    :var stop: The options of the stop conditions, disabled if None.
+    :type stop: Optional[dict]
+    :var trajectory: The path of the trajectory file, disabled if None.
+    :type trajectory: Optional[str]
+    :var results: The path of the result database, disabled if None.
+    :type results: Optional[str]
+    :var statistics: The path of the statistics CSV file, disabled if None.
+    :type statistics: Optional[str]
+    :var viewport: The viewport of the client, everything is sent if None.
+    :type viewport: Optional[Viewport]
+    :var pause: Whether the simulation is paused.
+    :type pause: bool
+    :var nest_field: Whether to send the nest field.
+    :type nest_field: bool
+    :var console_map: Whether to draw the ants in the terminal.
+    :type console_map: bool
+    :var console_fps: The maximum frame rate of the console map.
+    :type console_fps: float
+    :var publish_hz: The rate of the batched updates, every update is sent at
+        once if None.
+    :type publish_hz: Optional[float]
+    :var compact_json: Whether to send the compact serialization.
+    :type compact_json: bool
+    :var batch_messages: Whether to join the messages of a round.
+    :type batch_messages: bool
+    """
+
+    seed: Union[str, int, float]
+    width: int
+    height: int
+    rounds: int
+    tps: Union[int, float]
+    species: Optional[List[str]]
+    nests: Optional[int]
+    ants: Optional[int]
+    objects: Optional[int]
+    max_ants: int
+    max_objects: int
+    rules: Rules
+    partitions: int
+    pheromones: Optional[dict]
+    two_phase: Optional[dict]
+    heatmap: Optional[dict]
+    raster: Optional[dict]
+    shared_state: Optional[dict]
+    stop: Optional[dict]
+    trajectory: Optional[str]
+    results: Optional[str]
+    statistics: Optional[str]
+    viewport: Optional["Viewport"]
+    pause: bool
+    nest_field: bool
+    console_map: bool
+    console_fps: float
+    publish_hz: Optional[float]
+    compact_json: bool
+    batch_messages: bool
+
+    def __init__(self, **values):
+        """
+        Initialize a configuration, the keys left out keep their defaults.
+
+        :param values: The configuration keys, as in the dictionary form.
+        :raises ValueError: If a key is unknown or a value is invalid.
+        """
+        self.seed = "0"
+        self.width = self.height = DEFAULT_SIZE
+        self.rounds = DEFAULT_ROUNDS
+        self.tps = DEFAULT_TPS
+        self.species = None
+        self.nests = None
+        self.ants = None
+        self.objects = None
+        self.max_ants = DEFAULT_MAX_ANTS
+        self.max_objects = DEFAULT_MAX_OBJECTS
+        self.rules = Rules()
+        self.partitions = 0
+        self.pheromones = None
+        self.two_phase = None
+        self.heatmap = None
+        self.raster = None
+        self.shared_state = None
+        self.stop = None
+        self.trajectory = None
+        self.results = None
+        self.statistics = "statistics.csv"
+        self.viewport = None
+        self.pause = False
+        self.nest_field = False
+        self.console_map = False
+        self.console_fps = DEFAULT_CONSOLE_FPS
+        self.publish_hz = None
+        self.compact_json = False
+        self.batch_messages = False
+        self.update(values)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SimulationConfig":
+        """
+        Build a configuration from its dictionary form.
+
+        :param data: The configuration keys, e.g. decoded from a message.
+        :type data: dict
+        :return: The configuration.
+        :rtype: SimulationConfig
+        :raises ValueError: If a key is unknown or a value is invalid.
+        """
+        if not isinstance(data, dict):
+            raise ValueError("The configuration must be an object")
+        return cls(**data)
+
+    @classmethod
+    def load(cls, path: str) -> "SimulationConfig":
+        """
+        Load a configuration from a JSON file.
+
+        :param path: The path of the file.
+        :type path: str
+        :return: The configuration.
+        :rtype: SimulationConfig
+        :raises ValueError: If the file is not a valid configuration.
+        """
+        import json
+
+        with open(path, encoding="utf-8") as file:
+            return cls.from_dict(json.load(file))
+
+    @classmethod
+    def coerce(cls, config: Union["SimulationConfig", dict]) -> "SimulationConfig":
+        """
+        Get the configuration of a dictionary, a configuration is kept as it is.
+
+        :param config: The configuration or its dictionary form.
+        :type config: Union[SimulationConfig, dict]
+        :return: The configuration.
+        :rtype: SimulationConfig
+        :raises ValueError: If a key is unknown or a value is invalid.
+        """
+        if isinstance(config, cls):
+            return config
+        return cls.from_dict(config)
+
+    def update(self, changes: dict) -> None:
+        """
+        Change keys of the configuration, none is changed if one is invalid.
+
+        The initial ants and nests may not exceed ``max_ants``, nor the initial
+        objects ``max_objects``.
+
+        :param changes: The configuration keys to change.
+        :type changes: dict
+        :raises ValueError: If a key is unknown or a value is invalid.
+        """
+        if not isinstance(changes, dict):
+            raise ValueError("The configuration must be an object")
+        values: Dict[str, Any] = {}
+        for key, value in changes.items():
+            if key == "boundary":
+                if not isinstance(value, dict):
+                    raise ValueError("boundary must be an object")
+                values["width"] = _boundary_size("boundary.width", value.get("width"))
+                values["height"] = _boundary_size(
+                    "boundary.height", value.get("height")
+                )
+                continue
+            validate = VALIDATORS.get(key)
+            if validate is None:
+                raise ValueError(f"Unknown configuration key: {key}")
+            values[key] = validate(key, value)
+        _check_populations({**vars(self), **values})
+        for key, value in values.items():
+            setattr(self, key, value)
+
+    def copy(self, **changes) -> "SimulationConfig":
+        """
+        Copy the configuration with changed keys.
+
+        :param changes: The configuration keys to change.
+        :return: The copy.
+        :rtype: SimulationConfig
+        :raises ValueError: If a key is unknown or a value is invalid.
+        """
+        config = copy.copy(self)
+        config.update(changes)
+        return config
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the configuration to its dictionary form.
+
+        :return: Every configuration key.
+        :rtype: Dict[str, Any]
+        """
+        data = {key: getattr(self, key) for key in VALIDATORS}
+        data["boundary"] = {"width": self.width, "height": self.height}
+        data["rules"] = self.rules.to_dict()
+        return data
+
+    def model(self) -> Dict[str, Any]:
+        """
+        Get the keys which change the outcome of a seed.
+
+        :return: The :data:`MODEL_KEYS` of the dictionary form.
+        :rtype: Dict[str, Any]
+        """
+        data = self.to_dict()
+        return {key: data[key] for key in MODEL_KEYS}
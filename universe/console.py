@@ -0,0 +1,239 @@
+import asyncio
+import math
+import shutil
+import sys
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, TextIO, Tuple
+
+from termcolor import colored
+
+if TYPE_CHECKING:
+    from universe.ants import Species
+    from universe.map.boundary import Boundary
+    from universe.universe import Universe
+
+DEFAULT_FPS = 10
+
+# Glyphs of the cells holding several ants, from sparse to crowded
+DENSITY = "░▒▓█"
+EMPTY = " "
+# Background of the cells shared by several species
+CONTESTED = "on_yellow"
+
+CLEAR = "\x1b[2J\x1b[H"
+HIDE_CURSOR = "\x1b[?25l"
+SHOW_CURSOR = "\x1b[?25h"
+CLEAR_LINE = "\x1b[K"
+
+Cell = Tuple[int, int]
+
+
+def move(row: int, column: int) -> str:
+    """
+    Get the ANSI sequence moving the cursor to a cell of the terminal.
+
+    :param row: The row, from 0.
+    :type row: int
+    :param column: The column, from 0.
+    :type column: int
+    :return: The escape sequence.
+    :rtype: str
+    """
+    return f"\x1b[{row + 1};{column + 1}H"
+
+
+class ConsoleRenderer:
+    """
+    Class drawing the ants of the universe in a terminal.
+
+    The boundary is downsampled to the terminal, every character covering a
+    square of ``scale`` cells. A character holding a single ant shows its
+    direction, one holding several shows a density glyph, in the console color
+    of the most numerous species. The previous frame is kept, so drawing a frame
+    only writes the characters that changed, each run of them after one cursor
+    move.
+
+    :var boundary: The boundary of the universe.
+    :type boundary: Boundary
+    :var scale: The cells along each axis covered by a character.
+    :type scale: int
+    :var rows: The rows of the map.
+    :type rows: int
+    :var columns: The columns of the map.
+    :type columns: int
+    """
+
+    def __init__(
+        self,
+        boundary: "Boundary",
+        size: Optional[Tuple[int, int]] = None,
+        stream: Optional[TextIO] = None,
+    ):
+        """
+        Initialize the renderer of a boundary.
+
+        :param boundary: The boundary of the universe.
+        :type boundary: Boundary
+        :param size: The columns and lines of the terminal, defaults to the size of
+            the terminal at every frame.
+        :type size: Optional[Tuple[int, int]]
+        :param stream: The terminal, defaults to the standard output.
+        :type stream: Optional[TextIO]
+        """
+        self.boundary = boundary
+        self.scale = 1
+        self.rows = 0
+        self.columns = 0
+        self.__size = size
+        self.__stream = stream if stream is not None else sys.stdout
+        self.__terminal: Optional[Tuple[int, int]] = None
+        self.__frame: Dict[Cell, str] = {}
+        self.__status = ""
+        self.__styles: Dict[Tuple[str, str, Optional[str]], str] = {}
+
+    def frame(self, universe: "Universe") -> Dict[Cell, str]:
+        """
+        Compute the characters of the occupied cells of the map.
+
+        :param universe: The universe.
+        :type universe: Universe
+        :return: The colored character of every occupied row and column.
+        :rtype: Dict[Tuple[int, int], str]
+        """
+        origin = self.boundary.position_1
+        scale = self.scale
+        cells: Dict[Cell, Dict["Species", int]] = {}
+        arrows: Dict[Cell, str] = {}
+        for ant_row in universe.ants.values():
+            for ant in ant_row:
+                if not ant.alive:
+                    continue
+                cell = (
+                    (ant.position.y - origin.y) // scale,
+                    (ant.position.x - origin.x) // scale,
+                )
+                counts = cells.setdefault(cell, {})
+                counts[ant.species] = counts.get(ant.species, 0) + 1
+                arrows[cell] = ant.position.direction.to_arrow()
+
+        area = scale * scale
+        frame: Dict[Cell, str] = {}
+        for cell, counts in cells.items():
+            count = sum(counts.values())
+            species = max(counts, key=counts.get)
+            if count == 1 and scale == 1:
+                glyph = arrows[cell]
+            else:
+                glyph = DENSITY[
+                    min(len(DENSITY) - 1, (count - 1) * len(DENSITY) // area)
+                ]
+            frame[cell] = self.__style(
+                glyph, species.console_color, CONTESTED if len(counts) > 1 else None
+            )
+        return frame
+
+    def draw(self, universe: "Universe") -> str:
+        """
+        Draw the changes of the universe since the previous frame.
+
+        The whole map is drawn again when the terminal was resized.
+
+        :param universe: The universe.
+        :type universe: Universe
+        :return: The characters written to the terminal.
+        :rtype: str
+        """
+        output: List[str] = []
+        terminal = self.__size or tuple(shutil.get_terminal_size())
+        if terminal != self.__terminal:
+            self.__resize(terminal)
+            output.append(HIDE_CURSOR + CLEAR)
+
+        frame = self.frame(universe)
+        changed = [
+            cell for cell, text in frame.items() if self.__frame.get(cell) != text
+        ]
+        changed.extend(cell for cell in self.__frame if cell not in frame)
+        changed.sort()
+        cursor: Optional[Cell] = None
+        for cell in changed:
+            if cell != cursor:
+                output.append(move(*cell))
+            output.append(frame.get(cell, EMPTY))
+            cursor = (cell[0], cell[1] + 1)
+        self.__frame = frame
+
+        status = " ".join(
+            f"{species.name}: {count}"
+            for species, count in zip(universe.species, universe.populations())
+        )
+        if status != self.__status:
+            output.append(f"{move(self.rows, 0)}{status}{CLEAR_LINE}")
+            self.__status = status
+
+        text = "".join(output)
+        if text:
+            self.__stream.write(text)
+            self.__stream.flush()
+        return text
+
+    async def watch(
+        self,
+        universe: "Universe",
+        enabled: Callable[[], bool],
+        fps: float = DEFAULT_FPS,
+    ) -> None:
+        """
+        Draw the universe at a capped frame rate until cancelled.
+
+        The frames are drawn between the ticks, whatever the tick rate. The whole
+        map is drawn again when the renderer is enabled after being disabled.
+
+        :param universe: The universe.
+        :type universe: Universe
+        :param enabled: Whether to draw, checked before every frame.
+        :type enabled: Callable[[], bool]
+        :param fps: The maximum number of frames per second.
+        :type fps: float
+        """
+        try:
+            while True:
+                if enabled():
+                    self.draw(universe)
+                elif self.__terminal is not None:
+                    self.close()
+                await asyncio.sleep(1 / fps)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Move the cursor below the map and show it again."""
+        if self.__terminal is None:
+            return
+        self.__stream.write(f"{move(self.rows + 1, 0)}{SHOW_CURSOR}")
+        self.__stream.flush()
+        self.__terminal = None
+        self.__frame = {}
+        self.__status = ""
+
+    def __resize(self, terminal: Tuple[int, int]) -> None:
+        """Fit the map to the terminal, keeping a line for the status."""
+        columns, lines = terminal
+        self.__terminal = terminal
+        self.scale = max(
+            1,
+            math.ceil(self.boundary.width / max(1, columns)),
+            math.ceil(self.boundary.height / max(1, lines - 2)),
+        )
+        self.columns = math.ceil(self.boundary.width / self.scale)
+        self.rows = math.ceil(self.boundary.height / self.scale)
+        self.__frame = {}
+        self.__status = ""
+
+    def __style(self, glyph: str, color: str, on_color: Optional[str]) -> str:
+        """Color a glyph, the few combinations are colored once."""
+        key = (glyph, color, on_color)
+        text = self.__styles.get(key)
+        if text is None:
+            text = colored(glyph, color=color, on_color=on_color, force_color=True)
+            self.__styles[key] = text
+        return text
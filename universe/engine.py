@@ -1,85 +1,38 @@
 import asyncio
 from datetime import datetime
-from typing import Callable, Optional
+from typing import TYPE_CHECKING, Callable, Optional, Union
 
-from termcolor import colored
-
-from universe.ants import BlackAnt, RedAnt
+from universe.ants import SPECIES, Ant, Species, get_species
 from universe.ants.ant import Role
+from universe.config import DEFAULT_HEATMAP_TILE, SimulationConfig
+from universe.events import EventSink
+from universe.map.area import Area
 from universe.map.nest import Nest
+from universe.map.nest_field import NestField
+from universe.map.nest_index import NestIndex
 from universe.map.object import Object, ObjectType
+from universe.map.object_grid import ObjectGrid
 from universe.map.position import Direction, Position
 from universe.universe import Universe
 from universe.update import UpdateType
 from universe.utils import save_statistics_to_csv
 
-DEFAULT_SIZE = 150
-
-DEFAULT_ROUNDS = 200
-
-ANTS = 150
-OBJECTS = 150
-
-DEFAULT_TPS = 20
-
-
-def __print_map(ants, boundary) -> None:
-    """
-    Print the map of the universe.
-
-    :param ants: A list of ants.
-    :type ants: list
-    :param boundary: The boundary of the universe.
-    :type boundary: Boundary
-    """
-    width = boundary.width
-    height = boundary.height
-
-    grid = [["_" for _ in range(width)] for _ in range(height)]
-
-    color_map = {
-        BlackAnt: "blue",
-        RedAnt: "red",
-    }
-
-    for ant in ants:
-        x, y = (
-            ant.position.x - boundary.position_1.x,
-            ant.position.y - boundary.position_1.y,
-        )
-        if grid[y][x] == "_":
-            grid[y][x] = colored(
-                ant.position.direction.to_arrow(),
-                color=color_map[type(ant)],
-                force_color=True,
-            )
-        else:
-            grid[y][x] = colored(
-                ant.position.direction.to_arrow(),
-                color=color_map[type(ant)],
-                on_color="on_yellow",
-                force_color=True,
-            )
-
-    for row in grid:
-        print("".join(row))
-    print("\n")
+if TYPE_CHECKING:
+    from universe.tick import TwoPhaseTick
 
 
-async def create_ant(
-    ant_type: type, universe: Universe, update_callback: Callable
-) -> None:
+def create_ant(species: Species, universe: Universe, events: EventSink) -> None:
     """
     Helper function to create an ant and append it to ants list.
 
-    :param ant_type: The type of the ant.
-    :type ant_type: type
+    :param species: The species of the ant.
+    :type species: Species
     :param universe: The universe.
     :type universe: Universe
-    :param update_callback: The callback function to update the frontend.
-    :type update_callback: Callable
+    :param events: The sink of the updates.
+    :type events: EventSink
     """
-    new_ant = ant_type(
+    new_ant = Ant(
         Position(
             universe.rng.randint(
                 universe.boundary.position_1.x, universe.boundary.position_2.x
@@ -88,160 +41,181 @@ async def create_ant(
                 universe.boundary.position_1.y, universe.boundary.position_2.y
             ),
             universe.rng.choice(list(Direction)),
-        )
+        ),
+        species,
     )
     universe.ants[(new_ant.position.x, new_ant.position.y)].append(new_ant)
     universe.ants_count += 1
-    await update_callback(UpdateType.ANT_SPAWN, new_ant)
+    events.emit(UpdateType.ANT_SPAWN, new_ant)
 
 
-async def __create_random_object(universe: Universe, update_callback: Callable) -> None:
+def create_random_object(
+    universe: Universe, events: EventSink, area: Optional[Area] = None
+) -> None:
     """
-    Helper function to create an object and append it to objects list.
+    Helper function to create an object and place it in the object grid.
+
+    Nothing is spawned if the drawn cell is already taken.
 
     :param universe: The universe.
     :type universe: Universe
-    :param update_callback: The callback function to update the frontend.
-    :type update_callback: Callable
+    :param events: The sink of the updates.
+    :type events: EventSink
+    :param area: The area of the drawn cell, defaults to the boundary.
+    :type area: Optional[Area]
     """
+    area = area or universe.boundary
     new_object = Object(
         Position(
-            universe.rng.randint(
-                universe.boundary.position_1.x, universe.boundary.position_2.x
-            ),
-            universe.rng.randint(
-                universe.boundary.position_1.y, universe.boundary.position_2.y
-            ),
+            universe.rng.randint(area.position_1.x, area.position_2.x),
+            universe.rng.randint(area.position_1.y, area.position_2.y),
         ),
         universe.rng.choice(
             [ObjectType.ROCK] + [ObjectType.FOOD] * 6 + [ObjectType.WATER] * 4
         ),
     )
-    universe.objects[(new_object.position.x, new_object.position.y)].append(new_object)
-    universe.objects_count += 1
-    await update_callback(UpdateType.OBJECT_SPAWN, target=new_object)
+    new_object.usages_left = universe.rules.object_usages
+    if not universe.objects.spawn(new_object):
+        return
+    if (
+        universe.pheromones is not None
+        and new_object.object_type is not ObjectType.ROCK
+    ):
+        universe.pheromones.set_source(new_object.position, True)
+    events.emit(UpdateType.OBJECT_SPAWN, target=new_object)
 
 
-async def initial_spawn(
+def initial_spawn(
     universe: Universe,
-    update_callback: Callable,
+    events: EventSink,
+    nests: Optional[int] = None,
+    ants: Optional[int] = None,
+    objects: Optional[int] = None,
 ) -> None:
     """
     Initial spawn of ants, nests and objects in the universe.
 
+    Every nest is assigned a species in turn and gets its own queen. The ants
+    spawn in whole cycles of the spawn weights of the species.
+
     :param universe: The universe.
     :type universe: Universe
-    :param update_callback: The callback function to update the frontend.
-    :type update_callback: Callable
+    :param events: The sink of the updates.
+    :type events: EventSink
+    :param nests: The number of nests, defaults to one nest per species.
+    :type nests: Optional[int]
+    :param ants: The number of ants, drawn from the size of the boundary if None.
+    :type ants: Optional[int]
+    :param objects: The number of objects, drawn from the size of the boundary
+        if None.
+    :type objects: Optional[int]
     """
-    for _ in range(
-        universe.rng.randint(100, max(universe.boundary.size() // 500, 123)) // 3
-    ):
-        await create_ant(BlackAnt, universe, update_callback)
-        await create_ant(BlackAnt, universe, update_callback)
-        await create_ant(RedAnt, universe, update_callback)
-    nest_1 = Nest(Nest.generate_random_nest_area(universe))
-    await update_callback(UpdateType.NEST_SPAWN, target=nest_1)
-    nest_2 = Nest(
-        Nest.generate_random_nest_area(universe, min_distance_from=nest_1.area)
-    )
-    await update_callback(UpdateType.NEST_SPAWN, target=nest_2)
-
-    queen_1 = BlackAnt(
-        Position(
-            universe.rng.randint(nest_1.area.position_1.x, nest_1.area.position_2.x),
-            universe.rng.randint(nest_1.area.position_1.y, nest_1.area.position_2.y),
-            Direction.NORTH,
+    spawn_cycle = [
+        species for species in universe.species for _ in range(species.spawn_weight)
+    ]
+    if ants is None:
+        ants = universe.rng.randint(100, max(universe.boundary.size() // 500, 123))
+    for _ in range(ants // len(spawn_cycle)):
+        for species in spawn_cycle:
+            create_ant(species, universe, events)
+
+    universe.nest_index = NestIndex(universe.boundary)
+    for index in range(nests if nests is not None else len(universe.species)):
+        nest = Nest(
+            Nest.generate_random_nest_area(universe, nest_index=universe.nest_index),
+            universe.species[index % len(universe.species)],
         )
-    )
-    queen_2 = RedAnt(
-        Position(
-            universe.rng.randint(nest_2.area.position_1.x, nest_2.area.position_2.x),
-            universe.rng.randint(nest_2.area.position_1.y, nest_2.area.position_2.y),
-            Direction.NORTH,
+        universe.add_nest(nest)
+        events.emit(UpdateType.NEST_SPAWN, target=nest)
+    universe.nest_field = NestField(universe.boundary, universe.nest_index)
+
+    for nest in universe.nests:
+        nest.queen = Ant(
+            Position(
+                universe.rng.randint(nest.area.position_1.x, nest.area.position_2.x),
+                universe.rng.randint(nest.area.position_1.y, nest.area.position_2.y),
+                Direction.NORTH,
+            ),
+            nest.species,
         )
-    )
-
-    await queen_1.set_role(Role.QUEEN, update_callback)
-    nest_1.queen = queen_1
-    await queen_2.set_role(Role.QUEEN, update_callback)
-    nest_2.queen = queen_2
+        nest.queen.set_role(Role.QUEEN, events, universe.rules)
+        universe.ants[(nest.queen.position.x, nest.queen.position.y)].append(nest.queen)
 
-    universe.nests.append(nest_1)
-    universe.nests.append(nest_2)
-    universe.ants[(queen_1.position.x, queen_1.position.y)].append(queen_1)
-    universe.ants[(queen_2.position.x, queen_2.position.y)].append(queen_2)
+    if objects is None:
+        objects = universe.rng.randint(75, max(universe.boundary.size() // 500, 100))
+    for _ in range(objects):
+        create_random_object(universe, events)
 
-    for _ in range(universe.rng.randint(75, max(universe.boundary.size() // 500, 100))):
-        await __create_random_object(universe, update_callback)
 
-
-async def run(config: dict, update_callback: Optional[Callable] = None) -> int:
+def create_universe(config: Union[SimulationConfig, dict]) -> Universe:
     """
-    Run the simulation.
+    Create the universe of a simulation, before anything spawns.
+
+    The limits and rules of the configuration are compiled into the universe.
 
     :param config: The configuration of the simulation.
-    :type config: dict
-    :param update_callback: The callback function to update the frontend.
-    :type update_callback: Optional[Callable]
+    :type config: Union[SimulationConfig, dict]
+    :return: The universe with its species, seed, boundary and layers.
+    :rtype: Universe
+    :raises ValueError: If the configuration is invalid.
     """
-
-    tps = config.get("tps", DEFAULT_TPS)
-    pause = 1 / tps if tps > 0 else 0
-    rounds = config.get("rounds", DEFAULT_ROUNDS)
+    config = SimulationConfig.coerce(config)
     universe = Universe()
-
-    await update_callback(UpdateType.SIMULATION_START)
-    universe.rng.set_seed(config.get("seed", "0"))
-    if (
-        "boundary" in config
-        and "width" in config["boundary"]
-        and "height" in config["boundary"]
-    ):
-        universe.boundary.set_boundary_by_width_height(
-            config["boundary"]["width"], config["boundary"]["height"]
+    if config.species is not None:
+        universe.species = [get_species(name) for name in config.species]
+
+    universe.rng.set_seed(config.seed)
+    universe.boundary.set_boundary_by_width_height(config.width, config.height)
+    universe.objects = ObjectGrid(universe.boundary)
+    universe.MAX_ANTS = config.max_ants
+    universe.MAX_OBJECTS = config.max_objects
+    universe.rules = config.rules
+    if config.pheromones is not None:
+        # numpy is only needed when the pheromone layer is enabled
+        from universe.map.pheromone import PheromoneField
+
+        universe.pheromones = PheromoneField(
+            universe.boundary, len(SPECIES), **config.pheromones
         )
-    else:
-        universe.boundary.set_boundary_by_size(DEFAULT_SIZE)
-        print("No boundary size provided, using default size.")
-    # print(
-    #     f"universe.boundary: \n-x: {universe.boundary.position_1.x}\n-y: {universe.boundary.position_1.y}\nx: {universe.boundary.position_2.x}\ny: {universe.boundary.position_2.y}\n"
-    # )
+    return universe
 
-    await initial_spawn(universe, update_callback)
 
-    await update_callback(UpdateType.SIMULATION_SET_TPS, state=tps)
-    last_timestamp = datetime.now()
+def spawn(universe: Universe, events: EventSink, config: SimulationConfig) -> None:
+    """
+    Initial spawn of a universe with the counts of a configuration.
 
-    current_round = 1
+    :param universe: The universe.
+    :type universe: Universe
+    :param events: The sink of the updates.
+    :type events: EventSink
+    :param config: The configuration of the simulation.
+    :type config: SimulationConfig
+    """
+    initial_spawn(universe, events, config.nests, config.ants, config.objects)
 
-    while rounds >= current_round:
-        while config.get("pause", False):
-            await asyncio.sleep(0.1)
-            last_timestamp = datetime.now()
-        if "tps" in config and config.get("tps", 20) != tps:
-            tps = config.get("tps", 20)
-            pause = 1 / tps if tps > 0 else 0
-        if "rounds" in config and config.get("rounds", 200) != rounds:
-            rounds = config.get("rounds", 200)
-
-        if current_round % 20 == 0:
-            save_statistics_to_csv(
-                [ant for ant_row in universe.ants.values() for ant in ant_row],
-                "statistics.csv",
-                current_round,
-            )
-        while config.get("pause", False):
-            await asyncio.sleep(1)
-            last_timestamp = datetime.now()
-        await update_callback(UpdateType.SIMULATION_CURRENT_ROUND, state=current_round)
 
+def play_round(
+    universe: Universe, events: EventSink, two_phase: Optional["TwoPhaseTick"] = None
+) -> None:
+    """
+    Play the ants and the objects of a round.
+
+    :param universe: The universe.
+    :type universe: Universe
+    :param events: The sink of the updates.
+    :type events: EventSink
+    :param two_phase: The two-phase tick, the ants play one by one if None.
+    :type two_phase: Optional[TwoPhaseTick]
+    """
+    if two_phase is not None:
+        two_phase.tick(universe, events)
+    else:
         for ant_row in list(universe.ants.values()):
             for ant in ant_row:
                 if ant.is_alive():
-                    await ant.move(universe, update_callback)
+                    ant.move(universe, events)
                 if ant.is_alive():
-                    await ant.process(universe, update_callback)
+                    ant.process(universe, events)
                 if (
                     not ant.is_alive()
                     and ant in universe.ants[(ant.position.x, ant.position.y)]
@@ -249,38 +223,227 @@ async def run(config: dict, update_callback: Optional[Callable] = None) -> int:
                     universe.ants[(ant.position.x, ant.position.y)].remove(ant)
                     universe.ants_count -= 1
 
-        if universe.objects_count < universe.MAX_OBJECTS:
-            for _ in range(
-                universe.rng.randint(0, max(universe.boundary.size() // 2000, 10))
-            ):
-                await __create_random_object(universe, update_callback)
+    if universe.pheromones is not None:
+        universe.pheromones.step()
 
-        temp_tps = round(
-            1 / (datetime.now() - last_timestamp).total_seconds()
-            if (datetime.now() - last_timestamp).total_seconds() > 0
-            else 0
-        )
-        if temp_tps == 0 or temp_tps > tps:
-            temp_tps = tps
-        await update_callback(UpdateType.SIMULATION_TPS, state=temp_tps)
-        pause_time = (
-            pause - (datetime.now() - last_timestamp).total_seconds()
-            if pause - (datetime.now() - last_timestamp).total_seconds() > 0
-            else 0
-        )
-        if pause_time > 0:
-            await asyncio.sleep(pause_time)
+    if len(universe.objects) < universe.MAX_OBJECTS:
+        for _ in range(
+            universe.rng.randint(0, max(universe.boundary.size() // 2000, 10))
+        ):
+            create_random_object(universe, events)
+
+
+async def ignore_update(*args, **kwargs) -> None:
+    """Drop an update, the callback of the runs without a frontend."""
+
+
+async def run(
+    config: Union[SimulationConfig, dict], update_callback: Optional[Callable] = None
+) -> int:
+    """
+    Run the simulation.
+
+    A dictionary is validated into a new configuration, the running simulation
+    is controlled by updating a :class:`SimulationConfig` passed in.
+
+    :param config: The configuration of the simulation.
+    :type config: Union[SimulationConfig, dict]
+    :param update_callback: The callback function to update the frontend, the
+        updates are dropped if None.
+    :type update_callback: Optional[Callable]
+    :raises ValueError: If the configuration is invalid.
+    """
+    config = SimulationConfig.coerce(config)
+    if update_callback is None:
+        update_callback = ignore_update
+    if config.partitions > 1:
+        # Only very large boundaries are worth the worker processes
+        from universe.partition import run_partitioned
+
+        return await run_partitioned(config, update_callback)
+
+    tps = config.tps
+    pause = 1 / tps if tps > 0 else 0
+    universe = create_universe(config)
+    await update_callback(UpdateType.SIMULATION_START)
+    # print(
+    #     f"universe.boundary: \n-x: {universe.boundary.position_1.x}\n-y: {universe.boundary.position_1.y}\nx: {universe.boundary.position_2.x}\ny: {universe.boundary.position_2.y}\n"
+    # )
+
+    two_phase = None
+    shared_state = None
+    trajectory = None
+    console = None
+    try:
+        heatmap = None
+        heatmap_every = 1
+        if config.heatmap is not None:
+            from universe.heatmap import Heatmap
+
+            heatmap = Heatmap(
+                universe, config.heatmap.get("tile", DEFAULT_HEATMAP_TILE)
+            )
+            heatmap_every = max(1, config.heatmap.get("every", 1))
+            update_callback = heatmap.observe(update_callback)
+            await update_callback(UpdateType.HEATMAP_CHANNELS, state=heatmap.channels)
+
+        if config.two_phase is not None:
+            # Ants decide from a snapshot, then the moves are resolved in id order
+            from universe.tick import TwoPhaseTick
+
+            two_phase = TwoPhaseTick(**config.two_phase)
+
+        # The model appends its updates to the sink, they are delivered once per tick
+        events = EventSink()
+        spawn(universe, events, config)
+        await events.flush(update_callback)
+        if config.nest_field:
+            await update_callback(UpdateType.NEST_FIELD, target=universe.nest_field)
+
+        if config.shared_state is not None:
+            # Other processes read the world state from the block, named in the update
+            from universe.shared_state import SharedState
+
+            shared_state = SharedState(universe, **config.shared_state)
+            shared_state.publish(universe, 0)
+            await update_callback(UpdateType.SHARED_STATE, state=shared_state.name)
+
+        if config.trajectory is not None:
+            # numpy is only needed when the trajectories are recorded
+            from universe.trajectory import TrajectoryRecorder
+
+            trajectory = TrajectoryRecorder(config.trajectory)
+
+        run_result = None
+        if config.results is not None:
+            # numpy is only needed when the results are stored
+            from universe.results import ResultStore, RunResult
+
+            run_result = RunResult(
+                config.seed, config, [species.name for species in universe.species]
+            )
+
+        stop_conditions = None
+        if config.stop is not None:
+            # Sweeps skip the rounds after the outcome is settled
+            from universe.stop import StopConditions
+
+            stop_conditions = StopConditions(**config.stop)
+        stop_reason = None
+
+        rasterizer = None
+        raster_every = 1
+        if config.raster is not None:
+            from universe.raster import Rasterizer
+
+            rasterizer = Rasterizer(
+                universe, config.raster["width"], config.raster["height"]
+            )
+            raster_every = config.raster.get("every", 1)
+            await update_callback(UpdateType.RASTER_PALETTE, state=rasterizer.palette())
+
+        await update_callback(UpdateType.SIMULATION_SET_TPS, state=tps)
         last_timestamp = datetime.now()
 
-        if config.get("console_map", False):
-            __print_map(
-                [ant for ant_row in universe.ants.values() for ant in ant_row],
-                universe.boundary,
+        current_round = 1
+
+        while config.rounds >= current_round:
+            while config.pause:
+                await asyncio.sleep(0.1)
+                last_timestamp = datetime.now()
+            if config.tps != tps:
+                tps = config.tps
+                pause = 1 / tps if tps > 0 else 0
+
+            if config.statistics is not None and current_round % 20 == 0:
+                save_statistics_to_csv(
+                    [ant for ant_row in universe.ants.values() for ant in ant_row],
+                    config.statistics,
+                    current_round,
+                    universe.species,
+                )
+            while config.pause:
+                await asyncio.sleep(1)
+                last_timestamp = datetime.now()
+            await update_callback(
+                UpdateType.SIMULATION_CURRENT_ROUND, state=current_round
             )
 
-        current_round += 1
+            play_round(universe, events, two_phase)
+            await events.flush(update_callback)
+            if shared_state is not None:
+                shared_state.publish(universe, current_round)
+            if trajectory is not None:
+                trajectory.record(universe, current_round)
+            if run_result is not None:
+                run_result.observe(universe)
+            if stop_conditions is not None:
+                stop_reason = stop_conditions.check(universe.populations())
+
+            if rasterizer is not None and current_round % raster_every == 0:
+                await update_callback(
+                    UpdateType.RASTER_FRAME,
+                    state=rasterizer.encode(rasterizer.render(), current_round),
+                )
+            if config.viewport is not None:
+                await update_callback(
+                    UpdateType.VIEWPORT_SUMMARY,
+                    state=config.viewport.summarize(universe),
+                )
+
+            if heatmap is not None and current_round % heatmap_every == 0:
+                await update_callback(
+                    UpdateType.HEATMAP_FRAME, state=heatmap.encode(current_round)
+                )
+
+            temp_tps = round(
+                1 / (datetime.now() - last_timestamp).total_seconds()
+                if (datetime.now() - last_timestamp).total_seconds() > 0
+                else 0
+            )
+            if temp_tps == 0 or temp_tps > tps:
+                temp_tps = tps
+            await update_callback(UpdateType.SIMULATION_TPS, state=temp_tps)
+            pause_time = (
+                pause - (datetime.now() - last_timestamp).total_seconds()
+                if pause - (datetime.now() - last_timestamp).total_seconds() > 0
+                else 0
+            )
+            if pause_time > 0:
+                await asyncio.sleep(pause_time)
+            else:
+                # Let the publisher and the connection run between fast ticks
+                await asyncio.sleep(0)
+            last_timestamp = datetime.now()
 
+            if console is None and config.console_map:
+                # The map is drawn at its own frame rate, the ticks never wait for it
+                from universe.console import ConsoleRenderer
+
+                console = asyncio.create_task(
+                    ConsoleRenderer(universe.boundary).watch(
+                        universe, lambda: config.console_map, config.console_fps
+                    )
+                )
+
+            if stop_reason is not None:
+                break
+            current_round += 1
+    finally:
+        # A cancelled or failed run releases its processes and shared memory too
+        if console is not None:
+            console.cancel()
+            await asyncio.wait([console])
+        if two_phase is not None:
+            two_phase.close()
+        if shared_state is not None:
+            shared_state.close()
+        if trajectory is not None:
+            trajectory.close()
+
+    if run_result is not None:
+        with ResultStore(config.results) as store:
+            store.add(run_result)
     print("Game over!")
-    await update_callback(UpdateType.SIMULATION_END)
-    config.clear()
+    await update_callback(UpdateType.SIMULATION_END, state=stop_reason)
     return universe.rng.randint(0, 1000)
@@ -0,0 +1,97 @@
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Tuple
+
+from universe.update import UpdateType
+
+if TYPE_CHECKING:
+    from universe.ants import Ant
+
+Event = Tuple[UpdateType, Optional["Ant"], Optional[Any], Optional[Any]]
+
+# Initial number of updates a sink holds before its buffer grows
+DEFAULT_CAPACITY = 1024
+
+
+class EventSink:
+    """
+    Class collecting the updates of the model during a tick.
+
+    Model code appends its updates synchronously, so ant actions are plain
+    function calls instead of coroutines, and the engine delivers them in order
+    to the update callback once per tick. The updates are written to a buffer
+    allocated once and reused every tick, it doubles when a tick fills it.
+
+    The updates carry the live ants and objects, which are serialized with
+    their state at delivery time, at the end of the tick. This is part of the
+    protocol: an ``ANT_MOVE`` holds the position where the ant ends the tick and
+    an ``ANT_ATTACK`` the health left after every attack of the tick, whatever
+    happened to the ant after the update was emitted.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        """
+        Initialize an empty sink.
+
+        :param capacity: The number of updates of the initial buffer.
+        :type capacity: int
+        """
+        self.__events: List[Optional[Event]] = [None] * max(1, capacity)
+        self.__count = 0
+
+    def __len__(self) -> int:
+        """Return the number of pending updates."""
+        return self.__count
+
+    def emit(
+        self,
+        update_type: UpdateType,
+        ant: Optional["Ant"] = None,
+        target: Optional[Any] = None,
+        state: Optional[Any] = None,
+    ) -> None:
+        """
+        Append an update.
+
+        :param update_type: The type of the update.
+        :type update_type: UpdateType
+        :param ant: The ant involved in the update.
+        :type ant: Optional[Ant]
+        :param target: The target of the update.
+        :type target: Optional[Any]
+        :param state: The state of the update.
+        :type state: Optional[Any]
+        """
+        if self.__count == len(self.__events):
+            self.__events.extend([None] * len(self.__events))
+        self.__events[self.__count] = (update_type, ant, target, state)
+        self.__count += 1
+
+    def __clear(self) -> None:
+        """Forget the pending updates, the buffer does not keep their ants."""
+        self.__events[: self.__count] = [None] * self.__count
+        self.__count = 0
+
+    def drain(self) -> List[Event]:
+        """
+        Take the pending updates.
+
+        :return: The updates in the order they were emitted.
+        :rtype: List[Event]
+        """
+        events = self.__events[: self.__count]
+        self.__clear()
+        return events
+
+    async def flush(self, update_callback: Callable) -> None:
+        """
+        Deliver the pending updates to an update callback.
+
+        :param update_callback: The callback function to update the frontend.
+        :type update_callback: Callable
+        """
+        events = self.__events
+        try:
+            for index in range(self.__count):
+                update_type, ant, target, state = events[index]
+                await update_callback(update_type, ant, target, state)
+        finally:
+            self.__clear()
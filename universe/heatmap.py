@@ -0,0 +1,207 @@
+import math
+import struct
+import sys
+from array import array
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from universe.ants.ant import Role
+from universe.map.object import ObjectType
+from universe.update import UpdateType
+
+if TYPE_CHECKING:
+    from universe.ants import Ant
+    from universe.map.position import Position
+    from universe.universe import Universe
+
+FRAME_MAGIC = b"MOAH"
+# magic, round, tiles along x, tiles along y, tile size, channels
+FRAME_HEADER = struct.Struct("<4sIHHHH")
+
+ROLES = list(Role)
+OBJECT_TYPES = list(ObjectType)
+
+
+class Heatmap:
+    """
+    Class aggregating the population of the universe into square tiles.
+
+    Every tile holds one counter per channel: one channel per species and role,
+    followed by one channel per object type. The counters are updated from the
+    updates of the simulation as they are emitted, so building a frame never scans
+    the ants or the object grid. The counters are exact unsigned 32-bit integers,
+    only the frames saturate them at the 16-bit maximum.
+
+    :var tile_size: The size in cells of a tile along each axis.
+    :type tile_size: int
+    :var tiles_x: The number of tiles along the x-axis.
+    :type tiles_x: int
+    :var tiles_y: The number of tiles along the y-axis.
+    :type tiles_y: int
+    :var channels: The names of the channels.
+    :type channels: List[str]
+    :var counts: The counters, indexed by channel, tile y and tile x.
+    :type counts: array
+    """
+
+    def __init__(self, universe: "Universe", tile_size: int):
+        """
+        Initialize an empty heatmap for a universe.
+
+        :param universe: The universe, its species and boundary must be set.
+        :type universe: Universe
+        :param tile_size: The size in cells of a tile along each axis.
+        :type tile_size: int
+        :raises ValueError: If the tile size is not positive.
+        """
+        if tile_size <= 0:
+            raise ValueError("The tile size must be positive")
+        boundary = universe.boundary
+        self.origin = boundary.position_1
+        self.tile_size = tile_size
+        self.tiles_x = math.ceil(boundary.width / tile_size)
+        self.tiles_y = math.ceil(boundary.height / tile_size)
+        self.__species_channels = {
+            species: index * len(ROLES)
+            for index, species in enumerate(universe.species)
+        }
+        self.__object_channels = {
+            object_type: len(universe.species) * len(ROLES) + index
+            for index, object_type in enumerate(OBJECT_TYPES)
+        }
+        self.channels = [
+            f"{species.name}.{role.name}"
+            for species in universe.species
+            for role in ROLES
+        ] + [object_type.name for object_type in OBJECT_TYPES]
+        self.counts = array("I", [0]) * (len(self.channels) * self.tile_count)
+        # Counter index of every ant in the heatmap, by ant id
+        self.__ants: Dict[int, int] = {}
+
+    @property
+    def tile_count(self) -> int:
+        """Return the number of tiles of a channel."""
+        return self.tiles_x * self.tiles_y
+
+    def __tile(self, position: "Position") -> int:
+        """Return the index of the tile of a position."""
+        tile_x = (position.x - self.origin.x) // self.tile_size
+        tile_y = (position.y - self.origin.y) // self.tile_size
+        return tile_y * self.tiles_x + tile_x
+
+    def __ant_counter(self, ant: "Ant") -> Optional[int]:
+        """Return the counter index of an ant, None for unknown species."""
+        channel = self.__species_channels.get(ant.species)
+        if channel is None:
+            return None
+        channel += ROLES.index(ant.role)
+        return channel * self.tile_count + self.__tile(ant.position)
+
+    def __add(self, counter: int, delta: int) -> None:
+        """Add to a counter, which never goes below zero."""
+        self.counts[counter] = max(0, self.counts[counter] + delta)
+
+    def apply(
+        self,
+        update_type: UpdateType,
+        ant: Optional["Ant"] = None,
+        target: Optional[Any] = None,
+    ) -> None:
+        """
+        Update the counters for an update of the simulation.
+
+        :param update_type: The type of the update.
+        :type update_type: UpdateType
+        :param ant: The ant involved in the update.
+        :type ant: Optional[Ant]
+        :param target: The target of the update.
+        :type target: Optional[Any]
+        """
+        if update_type in (
+            UpdateType.ANT_SPAWN,
+            UpdateType.ANT_MOVE,
+            UpdateType.ANT_PROMOTE,
+        ):
+            if not ant.alive:
+                return
+            counter = self.__ant_counter(ant)
+            previous = self.__ants.get(ant.id)
+            if counter == previous or counter is None:
+                return
+            if previous is not None:
+                self.__add(previous, -1)
+            self.__ants[ant.id] = counter
+            self.__add(counter, 1)
+        elif update_type == UpdateType.ANT_DEATH:
+            previous = self.__ants.pop(ant.id, None)
+            if previous is not None:
+                self.__add(previous, -1)
+        elif update_type in (UpdateType.OBJECT_SPAWN, UpdateType.OBJECT_DESPAWN):
+            channel = self.__object_channels[target.object_type]
+            counter = channel * self.tile_count + self.__tile(target.position)
+            self.__add(counter, 1 if update_type == UpdateType.OBJECT_SPAWN else -1)
+
+    def observe(self, update_callback: Callable) -> Callable:
+        """
+        Wrap an update callback so every update also reaches the heatmap.
+
+        :param update_callback: The callback function to update the frontend.
+        :type update_callback: Callable
+        :return: The wrapped callback.
+        :rtype: Callable
+        """
+
+        async def callback(
+            update_type: UpdateType,
+            ant: Optional["Ant"] = None,
+            target: Optional[Any] = None,
+            state: Optional[Any] = None,
+        ):
+            self.apply(update_type, ant, target)
+            await update_callback(update_type, ant, target, state)
+
+        return callback
+
+    def tile_counts(self, x: int, y: int) -> List[int]:
+        """
+        Get the counters of a tile.
+
+        :param x: The x-index of the tile.
+        :type x: int
+        :param y: The y-index of the tile.
+        :type y: int
+        :return: The counter of every channel.
+        :rtype: List[int]
+        """
+        tile = y * self.tiles_x + x
+        return [
+            self.counts[channel * self.tile_count + tile]
+            for channel in range(len(self.channels))
+        ]
+
+    def encode(self, current_round: int) -> bytes:
+        """
+        Encode the counters as a binary message.
+
+        The header is followed by the counters as little-endian unsigned 16-bit
+        integers, channel by channel and row by row. A counter above 0xFFFF is
+        sent as 0xFFFF, the next frames send it exactly again once it drops.
+
+        :param current_round: The round of the frame.
+        :type current_round: int
+        :return: The encoded frame.
+        :rtype: bytes
+        """
+        counts = array("H", (min(count, 0xFFFF) for count in self.counts))
+        if sys.byteorder != "little":
+            counts.byteswap()
+        return (
+            FRAME_HEADER.pack(
+                FRAME_MAGIC,
+                current_round,
+                self.tiles_x,
+                self.tiles_y,
+                self.tile_size,
+                len(self.channels),
+            )
+            + counts.tobytes()
+        )
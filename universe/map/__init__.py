@@ -1,7 +1,21 @@
-__all__ = ["Area", "Boundary", "Nest", "Object", "ObjectType", "Position", "Direction"]
+__all__ = [
+    "Area",
+    "Boundary",
+    "Nest",
+    "NestField",
+    "NestIndex",
+    "Object",
+    "ObjectGrid",
+    "ObjectType",
+    "Position",
+    "Direction",
+]
 
 from .area import Area
 from .boundary import Boundary
 from .nest import Nest
+from .nest_field import NestField
+from .nest_index import NestIndex
 from .object import Object, ObjectType
+from .object_grid import ObjectGrid
 from .position import Direction, Position
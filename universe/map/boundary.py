@@ -19,7 +19,7 @@ class Boundary(Area):
         """
         super().__init__(Position(0, 0), Position(199, 199))
 
-    def __set_boundary(self, x: int, y: int, width: int, height: int) -> None:
+    def set_boundary(self, x: int, y: int, width: int, height: int) -> None:
         """
         Set the boundary with the given x, y, width, and height.
 
@@ -1,10 +1,12 @@
-from typing import TYPE_CHECKING, Optional, Type
+import math
+from typing import TYPE_CHECKING, Optional
 
 from .area import Area
 from .position import Position
 
 if TYPE_CHECKING:
-    from universe.ants import Ant
+    from universe.ants import Ant, Species
+    from universe.map.nest_index import NestIndex
     from universe.universe import Universe
 
 
@@ -16,18 +18,27 @@ class Nest:
     :type area: Area
     :var queen: The queen ant of the nest.
     :type queen: Ant
+    :var species: The species of the colony living in the nest.
+    :type species: Species
+    :var center: The center of the nest area.
+    :type center: Position
     """
 
     queen: "Ant" = None
+    species: "Species" = None
 
-    def __init__(self, area: Area):
+    def __init__(self, area: Area, species: Optional["Species"] = None):
         """
         Initialize the nest with the given area.
 
         :param area: The area of the nest.
         :type area: Area
+        :param species: The species of the colony living in the nest.
+        :type species: Optional[Species]
         """
         self.area = area
+        self.species = species
+        self.center = area.center()
 
     def __contains__(self, position: Position) -> bool:
         """
@@ -40,14 +51,16 @@ class Nest:
         """
         return position in self.area
 
-    def ants_type(self) -> Type["Ant"]:
+    def ants_type(self) -> Optional["Species"]:
         """
-        Get the type of the queen ant.
+        Get the species of the colony living in the nest.
 
-        :return: The type of the queen ant.
-        :rtype: Type[Ant]
+        :return: The species of the colony, or of the queen if it is not set.
+        :rtype: Optional[Species]
         """
-        return type(self.queen)
+        if self.species is None and self.queen is not None:
+            return self.queen.species
+        return self.species
 
     @staticmethod
     def generate_random_nest_area(
@@ -56,6 +69,7 @@ class Nest:
         size_to: int = 20,
         min_distance: int = 40,
         min_distance_from: Optional[Area] = None,
+        nest_index: Optional["NestIndex"] = None,
     ) -> Area:
         """
         Generate a random nest area.
@@ -70,9 +84,21 @@ class Nest:
         :type min_distance: int
         :param min_distance_from: The area to keep distance from.
         :type min_distance_from: Optional[Area]
+        :param nest_index: The index of the nests to keep distance from.
+        :type nest_index: Optional[NestIndex]
         :return: The generated nest area.
         :rtype: Area
         """
+
+        def distance(area: Area) -> float:
+            """Return the distance from the area to the nearest area to avoid."""
+            result = math.inf
+            if min_distance_from is not None:
+                result = area.smallest_distance(min_distance_from)
+            if nest_index is not None:
+                result = min(result, nest_index.nearest(area.center())[1])
+            return result
+
         propositions = []
         for _ in range(10):
             position_1 = Position(
@@ -90,17 +116,12 @@ class Nest:
                 position_1.y + universe.rng.randint(size_from, size_to),
             )
             area = Area(position_1, position_2)
-            if (
-                min_distance_from is None
-                or area.smallest_distance(min_distance_from) >= min_distance
-            ):
+            if distance(area) >= min_distance:
                 return area
             propositions.append(area)
         else:
             print("Could not find a suitable area, using area with largest distance.")
-            return max(
-                propositions, key=lambda a: a.smallest_distance(min_distance_from)
-            )
+            return max(propositions, key=distance)
 
     def to_dict(self) -> dict:
         """
@@ -111,5 +132,5 @@ class Nest:
         """
         return {
             "area": self.area.to_dict(),
-            "ants_type": self.ants_type().__name__,
+            "ants_type": self.ants_type().name if self.ants_type() else None,
         }
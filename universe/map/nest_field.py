@@ -0,0 +1,195 @@
+import base64
+import sys
+from array import array
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from .position import Direction, Position
+
+if TYPE_CHECKING:
+    from .boundary import Boundary
+    from .nest_index import NestIndex
+
+DIRECTIONS = list(Direction)
+IN_NEST = 0xFF
+
+
+class NestField:
+    """
+    Precomputed field of the nearest nest for every cell of the universe.
+
+    Nests never move once spawned, so the field is built once with a breadth-first
+    search over the boundary grid, starting from every nest cell at once. Queens
+    then find their way home with a table lookup.
+
+    :var boundary: The boundary of the universe.
+    :type boundary: Boundary
+    :var nest_ids: The id of the nearest nest for each cell.
+    :type nest_ids: array
+    :var distances: The number of steps to the nearest nest for each cell.
+    :type distances: array
+    :var directions: The index in :data:`DIRECTIONS` of the first step towards the
+        nearest nest for each cell, or :data:`IN_NEST` inside a nest.
+    :type directions: bytearray
+    :var runs: The number of steps that can be made in that direction while still
+        getting closer to the nest, capped at 255.
+    :type runs: bytearray
+    """
+
+    def __init__(self, boundary: "Boundary", nest_index: "NestIndex"):
+        """
+        Build the field for the nests of a nest index.
+
+        :param boundary: The boundary of the universe.
+        :type boundary: Boundary
+        :param nest_index: The index of the nests.
+        :type nest_index: NestIndex
+        """
+        self.boundary = boundary
+        width = boundary.width
+        size = width * boundary.height
+        self.nest_ids = array("H", bytes(2 * size))
+        self.distances = array("H", [0xFFFF]) * size
+        self.directions = bytearray([IN_NEST]) * size
+        self.runs = bytearray(size)
+
+        # Directions are stored for the step from the neighbour back to the cell
+        # being expanded, e.g. a cell reached by going WEST must step EAST.
+        steps = (
+            (-1, DIRECTIONS.index(Direction.EAST)),
+            (1, DIRECTIONS.index(Direction.WEST)),
+            (-width, DIRECTIONS.index(Direction.NORTH)),
+            (width, DIRECTIONS.index(Direction.SOUTH)),
+        )
+        frontier = [index for index, nest_id in enumerate(nest_index.cells) if nest_id]
+        for index in frontier:
+            self.nest_ids[index] = nest_index.cells[index] - 1
+            self.distances[index] = 0
+
+        distance = 0
+        nest_ids, distances, directions, runs = (
+            self.nest_ids,
+            self.distances,
+            self.directions,
+            self.runs,
+        )
+        while frontier:
+            distance += 1
+            next_frontier = []
+            for index in frontier:
+                x = index % width
+                for offset, direction in steps:
+                    if (offset == -1 and x == 0) or (offset == 1 and x == width - 1):
+                        continue
+                    neighbour = index + offset
+                    if neighbour < 0 or neighbour >= size:
+                        continue
+                    if distances[neighbour] != 0xFFFF:
+                        continue
+                    distances[neighbour] = min(distance, 0xFFFE)
+                    nest_ids[neighbour] = nest_ids[index]
+                    directions[neighbour] = direction
+                    runs[neighbour] = (
+                        min(runs[index] + 1, 0xFF)
+                        if directions[index] == direction
+                        else 1
+                    )
+                    next_frontier.append(neighbour)
+            frontier = next_frontier
+
+    @classmethod
+    def from_steps(
+        cls, boundary: "Boundary", directions: bytes, runs: bytes
+    ) -> "NestField":
+        """
+        Rebuild the steps towards the nests of a field, e.g. in another process.
+
+        Only :meth:`direction` is answered by the rebuilt field, the nest ids and
+        distances are left out.
+
+        :param boundary: The boundary of the universe.
+        :type boundary: Boundary
+        :param directions: The :attr:`directions` of the field.
+        :type directions: bytes
+        :param runs: The :attr:`runs` of the field.
+        :type runs: bytes
+        :return: The field.
+        :rtype: NestField
+        """
+        field = cls.__new__(cls)
+        field.boundary = boundary
+        field.nest_ids = array("H")
+        field.distances = array("H")
+        field.directions = bytearray(directions)
+        field.runs = bytearray(runs)
+        return field
+
+    def __index(self, position: Position) -> int:
+        """Return the index of the cell of a position."""
+        return (
+            (position.y - self.boundary.position_1.y) * self.boundary.width
+            + position.x
+            - self.boundary.position_1.x
+        )
+
+    def nest_id(self, position: Position) -> int:
+        """
+        Get the id of the nest nearest to a position.
+
+        :param position: The position, it must be within the boundary.
+        :type position: Position
+        :return: The id of the nearest nest in the nest index.
+        :rtype: int
+        """
+        return self.nest_ids[self.__index(position)]
+
+    def distance(self, position: Position) -> int:
+        """
+        Get the number of steps from a position to the nearest nest.
+
+        :param position: The position, it must be within the boundary.
+        :type position: Position
+        :return: The number of steps, zero inside a nest.
+        :rtype: int
+        """
+        return self.distances[self.__index(position)]
+
+    def direction(self, position: Position) -> Tuple[Optional[Direction], int]:
+        """
+        Get the direction towards the nearest nest from a position.
+
+        :param position: The position, it must be within the boundary.
+        :type position: Position
+        :return: The direction and the number of steps that can be made in it
+            while getting closer to the nest, or (None, 0) inside a nest.
+        :rtype: Tuple[Optional[Direction], int]
+        """
+        index = self.__index(position)
+        direction = self.directions[index]
+        if direction == IN_NEST:
+            return None, 0
+        return DIRECTIONS[direction], self.runs[index]
+
+    def to_dict(self) -> dict:
+        """
+        Convert the field to a dictionary for the frontend overlay.
+
+        The arrays are encoded as base64 little-endian unsigned 16-bit integers.
+
+        :return: The dictionary representation of the field.
+        :rtype: dict
+        """
+
+        def encode(values: array) -> str:
+            """Encode an array as base64 little-endian bytes."""
+            if sys.byteorder != "little":
+                values = array(values.typecode, values)
+                values.byteswap()
+            return base64.b64encode(values.tobytes()).decode("ascii")
+
+        return {
+            "position_1": self.boundary.position_1.to_dict(),
+            "width": self.boundary.width,
+            "height": self.boundary.height,
+            "nest_ids": encode(self.nest_ids),
+            "distances": encode(self.distances),
+        }
@@ -0,0 +1,134 @@
+import math
+from array import array
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from .position import Position
+
+if TYPE_CHECKING:
+    from .boundary import Boundary
+    from .nest import Nest
+
+
+class NestIndex:
+    """
+    Spatial index of the nests in the universe.
+
+    Nests never move once spawned, so the index is built incrementally while the
+    nests are spawned and then only queried. Point-in-nest queries are answered
+    by a grid holding the id of the nest covering every cell, nearest-nest queries
+    by a 2-d tree over the nest centers.
+
+    :var boundary: The boundary of the universe.
+    :type boundary: Boundary
+    :var nests: The indexed nests, the position in the list is the nest id.
+    :type nests: List[Nest]
+    :var cells: The id of the nest covering each cell plus one, zero for no nest.
+    :type cells: array
+    """
+
+    def __init__(self, boundary: "Boundary"):
+        """
+        Initialize an empty nest index.
+
+        :param boundary: The boundary of the universe.
+        :type boundary: Boundary
+        """
+        self.boundary = boundary
+        self.nests: List["Nest"] = []
+        self.cells = array("H", bytes(2 * boundary.width * boundary.height))
+        # 2-d tree nodes: [x, y, nest id, left child, right child]
+        self.__tree: List[list] = []
+
+    def __len__(self) -> int:
+        """Return the number of indexed nests."""
+        return len(self.nests)
+
+    def add(self, nest: "Nest") -> int:
+        """
+        Add a nest to the index.
+
+        Cells already covered by a previously added nest keep the older nest.
+
+        :param nest: The nest to add.
+        :type nest: Nest
+        :return: The id of the nest in the index.
+        :rtype: int
+        :raises ValueError: If the index is full.
+        """
+        if len(self.nests) >= 0xFFFF:
+            raise ValueError("Too many nests")
+        nest_id = len(self.nests)
+        self.nests.append(nest)
+
+        boundary = self.boundary
+        width = boundary.width
+        x_1 = max(nest.area.position_1.x, boundary.position_1.x) - boundary.position_1.x
+        x_2 = min(nest.area.position_2.x, boundary.position_2.x) - boundary.position_1.x
+        y_1 = max(nest.area.position_1.y, boundary.position_1.y) - boundary.position_1.y
+        y_2 = min(nest.area.position_2.y, boundary.position_2.y) - boundary.position_1.y
+        cells = self.cells
+        for y in range(y_1, y_2 + 1):
+            for index in range(y * width + x_1, y * width + x_2 + 1):
+                if not cells[index]:
+                    cells[index] = nest_id + 1
+
+        center = nest.center
+        node = [center.x, center.y, nest_id, None, None]
+        if not self.__tree:
+            self.__tree.append(node)
+            return nest_id
+        current, depth = self.__tree[0], 0
+        while True:
+            side = 4 if node[depth % 2] >= current[depth % 2] else 3
+            if current[side] is None:
+                current[side] = node
+                break
+            current, depth = current[side], depth + 1
+        self.__tree.append(node)
+        return nest_id
+
+    def nest_at(self, position: Position) -> Optional["Nest"]:
+        """
+        Get the nest covering a position.
+
+        :param position: The position, it must be within the boundary.
+        :type position: Position
+        :return: The nest covering the position or None.
+        :rtype: Optional[Nest]
+        """
+        nest_id = self.cells[
+            (position.y - self.boundary.position_1.y) * self.boundary.width
+            + position.x
+            - self.boundary.position_1.x
+        ]
+        return self.nests[nest_id - 1] if nest_id else None
+
+    def nearest(self, position: Position) -> Tuple[Optional["Nest"], float]:
+        """
+        Find the nest with the center nearest to a position.
+
+        Ties are broken in favour of the nest added first.
+
+        :param position: The position.
+        :type position: Position
+        :return: The nearest nest and the Euclidean distance to its center, or
+            (None, inf) if the index is empty.
+        :rtype: Tuple[Optional[Nest], float]
+        """
+        if not self.__tree:
+            return None, math.inf
+        best = [math.inf, -1]
+        x, y = position.x, position.y
+        stack = [(self.__tree[0], 0)]
+        while stack:
+            node, depth = stack.pop()
+            distance = (node[0] - x) ** 2 + (node[1] - y) ** 2
+            if distance < best[0] or (distance == best[0] and node[2] < best[1]):
+                best[0], best[1] = distance, node[2]
+            delta = (x, y)[depth % 2] - node[depth % 2]
+            near, far = (node[4], node[3]) if delta >= 0 else (node[3], node[4])
+            if far is not None and delta * delta <= best[0]:
+                stack.append((far, depth + 1))
+            if near is not None:
+                stack.append((near, depth + 1))
+        return self.nests[best[1]], math.sqrt(best[0])
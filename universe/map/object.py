@@ -1,10 +1,12 @@
 import enum
-from typing import TYPE_CHECKING, Callable
+from typing import TYPE_CHECKING
 
 from .position import Position
 
 if TYPE_CHECKING:
     from universe.ants import Ant
+    from universe.config import Rules
+    from universe.events import EventSink
     from universe.map.boundary import Boundary
 
 
@@ -49,8 +51,8 @@ class Object:
         """Return a formal string representation of the object."""
         return f"Object({self.position}, {self.object_type})"
 
-    async def interact(
-        self, boundary: "Boundary", ant: "Ant", update_callback: Callable
+    def interact(
+        self, boundary: "Boundary", ant: "Ant", events: "EventSink", rules: "Rules"
     ):
         """
         Interact with an ant.
@@ -59,18 +61,20 @@ class Object:
         :type boundary: Boundary
         :param ant: The ant to interact with.
         :type ant: Ant
-        :param update_callback: The callback function to update the state.
-        :type update_callback: Callable
+        :param events: The sink of the updates.
+        :type events: EventSink
+        :param rules: The gains and damages of the objects.
+        :type rules: Rules
         """
         if self.object_type == ObjectType.FOOD:
-            ant.food += 7
+            ant.food += rules.food_gain
         elif self.object_type == ObjectType.WATER:
-            ant.food += 5
-            ant.health += 3
+            ant.food += rules.water_food
+            ant.health += rules.water_health
         elif self.object_type == ObjectType.ROCK:
             if not self.position == ant.position:
                 return  # Cannot interact with the rock if the ant is not on the same position
-            ant.health -= 1
+            ant.health -= rules.rock_damage
             try:
                 ant.position.move(boundary, ant.position.direction, -1)
             except ValueError:
@@ -0,0 +1,188 @@
+from typing import TYPE_CHECKING, Dict, Optional, Set, Tuple
+
+from .object import Object, ObjectType
+from .position import Position
+
+if TYPE_CHECKING:
+    from .boundary import Boundary
+
+EMPTY = 0
+
+# Object type of every cell code, a code is the value of the object type plus one
+OBJECT_TYPES = [None] + sorted(ObjectType, key=lambda object_type: object_type.value)
+ROCK = ObjectType.ROCK.value + 1
+
+# Translation table marking the codes of consumable objects with 1
+_CONSUMABLE = bytes(
+    1 if object_type not in (None, ObjectType.ROCK) else 0
+    for object_type in OBJECT_TYPES + [None] * (256 - len(OBJECT_TYPES))
+)
+
+
+class ObjectGrid:
+    """
+    Class representing the object layer of the universe.
+
+    The objects are stored in dense grids sized to the boundary, one byte per cell
+    for the object type code and one for the usages left, so type checks, counts
+    and despawns never allocate. At most one object can be placed in a cell.
+
+    :var boundary: The boundary of the universe.
+    :type boundary: Boundary
+    :var types: The object type code of each cell, :data:`EMPTY` for no object.
+    :type types: bytearray
+    :var usages: The number of usages left of the object in each cell.
+    :type usages: bytearray
+    :var count: The number of objects in the grid.
+    :type count: int
+    """
+
+    def __init__(self, boundary: "Boundary"):
+        """
+        Initialize an empty object grid.
+
+        :param boundary: The boundary of the universe.
+        :type boundary: Boundary
+        """
+        self.boundary = boundary
+        self.types = bytearray(boundary.width * boundary.height)
+        self.usages = bytearray(boundary.width * boundary.height)
+        self.count = 0
+
+    def __len__(self) -> int:
+        """Return the number of objects in the grid."""
+        return self.count
+
+    def index(self, position: Position) -> int:
+        """
+        Get the index of the cell of a position.
+
+        :param position: The position.
+        :type position: Position
+        :return: The index of the cell, -1 if the position is out of the boundary.
+        :rtype: int
+        """
+        x = position.x - self.boundary.position_1.x
+        y = position.y - self.boundary.position_1.y
+        if 0 <= x < self.boundary.width and 0 <= y < self.boundary.height:
+            return y * self.boundary.width + x
+        return -1
+
+    def get(self, position: Position) -> Optional[ObjectType]:
+        """
+        Get the type of the object at a position.
+
+        :param position: The position.
+        :type position: Position
+        :return: The type of the object or None if there is no object.
+        :rtype: Optional[ObjectType]
+        """
+        index = self.index(position)
+        return OBJECT_TYPES[self.types[index]] if index >= 0 else None
+
+    def is_consumable(self, position: Position) -> bool:
+        """
+        Check if there is food or water at a position.
+
+        :param position: The position.
+        :type position: Position
+        :return: True if the object at the position is not a rock.
+        :rtype: bool
+        """
+        index = self.index(position)
+        return index >= 0 and self.types[index] not in (EMPTY, ROCK)
+
+    def consumable_cells(
+        self, position: Position, distance: int
+    ) -> Set[Tuple[int, int]]:
+        """
+        Find the cells with food or water within a square around a position.
+
+        The grid is scanned one row slice at a time instead of cell by cell.
+
+        :param position: The center of the square.
+        :type position: Position
+        :param distance: The Chebyshev distance from the center to the edge.
+        :type distance: int
+        :return: The (x, y) coordinates of the cells with food or water.
+        :rtype: Set[Tuple[int, int]]
+        """
+        boundary = self.boundary
+        x_1 = max(position.x - distance, boundary.position_1.x) - boundary.position_1.x
+        x_2 = min(position.x + distance, boundary.position_2.x) - boundary.position_1.x
+        y_1 = max(position.y - distance, boundary.position_1.y) - boundary.position_1.y
+        y_2 = min(position.y + distance, boundary.position_2.y) - boundary.position_1.y
+        cells = set()
+        for y in range(y_1, y_2 + 1):
+            start = y * boundary.width
+            row = self.types[start + x_1 : start + x_2 + 1].translate(_CONSUMABLE)
+            x = row.find(1)
+            while x >= 0:
+                cells.add((x_1 + x + boundary.position_1.x, y + boundary.position_1.y))
+                x = row.find(1, x + 1)
+        return cells
+
+    def object_at(self, position: Position) -> Optional[Object]:
+        """
+        Create an :class:`Object` describing the object at a position.
+
+        :param position: The position.
+        :type position: Position
+        :return: The object or None if there is no object.
+        :rtype: Optional[Object]
+        """
+        index = self.index(position)
+        if index < 0 or not self.types[index]:
+            return None
+        new_object = Object(
+            Position(position.x, position.y), OBJECT_TYPES[self.types[index]]
+        )
+        new_object.usages_left = self.usages[index]
+        return new_object
+
+    def spawn(self, new_object: Object) -> bool:
+        """
+        Place an object in the grid.
+
+        :param new_object: The object to place.
+        :type new_object: Object
+        :return: True if the object was placed, False if the cell is taken.
+        :rtype: bool
+        """
+        index = self.index(new_object.position)
+        if index < 0 or self.types[index]:
+            return False
+        self.types[index] = new_object.object_type.value + 1
+        self.usages[index] = max(0, min(new_object.usages_left, 0xFF))
+        self.count += 1
+        return True
+
+    def update(self, target: Object) -> bool:
+        """
+        Store the usages left of an object, despawning it if it is used up.
+
+        :param target: The object taken from the grid with :meth:`object_at`.
+        :type target: Object
+        :return: True if the object was despawned.
+        :rtype: bool
+        """
+        index = self.index(target.position)
+        if target.usages_left > 0:
+            self.usages[index] = min(target.usages_left, 0xFF)
+            return False
+        self.types[index] = EMPTY
+        self.usages[index] = 0
+        self.count -= 1
+        return True
+
+    def counts(self) -> Dict[ObjectType, int]:
+        """
+        Count the objects of every type.
+
+        :return: The number of objects of every type.
+        :rtype: Dict[ObjectType, int]
+        """
+        return {
+            object_type: self.types.count(object_type.value + 1)
+            for object_type in ObjectType
+        }
@@ -0,0 +1,181 @@
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+
+from .position import Direction, Position
+
+if TYPE_CHECKING:
+    from .boundary import Boundary
+
+FOOD_CHANNEL = 0
+
+# Offsets in (y, x) grid coordinates of a step in every direction
+_STEPS = (
+    (Direction.NORTH, 1, 0),
+    (Direction.EAST, 0, 1),
+    (Direction.SOUTH, -1, 0),
+    (Direction.WEST, 0, -1),
+)
+
+
+class PheromoneField:
+    """
+    Class representing the scent layer of the universe.
+
+    The field holds one float grid per channel: channel :data:`FOOD_CHANNEL` is the
+    scent of food and water, channel ``species.index + 1`` is the scent left by
+    the ants of a species. Every tick the whole field diffuses to the four
+    neighbouring cells and evaporates, computed as a vectorised stencil. Ants
+    follow the scent with constant time lookups of the neighbouring cells instead
+    of scanning every cell in sight.
+
+    :var boundary: The boundary of the universe.
+    :type boundary: Boundary
+    :var fields: The scent of every channel, indexed by channel, y and x.
+    :type fields: numpy.ndarray
+    :var total: The sum of the scent of every species, indexed by y and x.
+    :type total: numpy.ndarray
+    :var sources: The cells holding food or water, indexed by y and x.
+    :type sources: numpy.ndarray
+    :var diffusion: The fraction of the scent spreading to the neighbours per tick.
+    :type diffusion: float
+    :var evaporation: The fraction of the scent evaporating per tick.
+    :type evaporation: float
+    :var deposit: The amount of scent deposited by an ant or a food source per tick.
+    :type deposit: float
+    """
+
+    def __init__(
+        self,
+        boundary: "Boundary",
+        species_count: int,
+        diffusion: float = 0.2,
+        evaporation: float = 0.05,
+        deposit: float = 1.0,
+    ):
+        """
+        Initialize an empty pheromone field.
+
+        :param boundary: The boundary of the universe.
+        :type boundary: Boundary
+        :param species_count: The number of registered species.
+        :type species_count: int
+        :param diffusion: The fraction of the scent spreading per tick.
+        :type diffusion: float
+        :param evaporation: The fraction of the scent evaporating per tick.
+        :type evaporation: float
+        :param deposit: The amount of scent deposited per tick.
+        :type deposit: float
+        :raises ValueError: If the diffusion or evaporation is not within [0, 1].
+        """
+        if not 0 <= diffusion <= 1 or not 0 <= evaporation <= 1:
+            raise ValueError("Diffusion and evaporation must be within [0, 1]")
+        self.boundary = boundary
+        shape = (boundary.height, boundary.width)
+        self.fields = np.zeros((species_count + 1, *shape), dtype=np.float32)
+        self.total = np.zeros(shape, dtype=np.float32)
+        self.sources = np.zeros(shape, dtype=np.float32)
+        self.diffusion = diffusion
+        self.evaporation = evaporation
+        self.deposit = deposit
+
+    def deposit_scent(self, channel: int, position: Position) -> None:
+        """
+        Deposit scent at a position.
+
+        :param channel: The channel to deposit into.
+        :type channel: int
+        :param position: The position, it must be within the boundary.
+        :type position: Position
+        """
+        y = position.y - self.boundary.position_1.y
+        x = position.x - self.boundary.position_1.x
+        self.fields[channel, y, x] += self.deposit
+        if channel != FOOD_CHANNEL:
+            self.total[y, x] += self.deposit
+
+    def set_source(self, position: Position, active: bool) -> None:
+        """
+        Mark or unmark a position as a food source.
+
+        :param position: The position, it must be within the boundary.
+        :type position: Position
+        :param active: Whether the position holds food or water.
+        :type active: bool
+        """
+        y = position.y - self.boundary.position_1.y
+        x = position.x - self.boundary.position_1.x
+        self.sources[y, x] = 1.0 if active else 0.0
+
+    def step(self) -> None:
+        """Diffuse and evaporate the scent and let the food sources emit scent."""
+        fields = self.fields
+        padded = np.pad(fields, ((0, 0), (1, 1), (1, 1)), mode="edge")
+        neighbours = (
+            padded[:, :-2, 1:-1]
+            + padded[:, 2:, 1:-1]
+            + padded[:, 1:-1, :-2]
+            + padded[:, 1:-1, 2:]
+        )
+        fields *= (1.0 - self.diffusion) * (1.0 - self.evaporation)
+        fields += neighbours * (self.diffusion / 4 * (1.0 - self.evaporation))
+        fields[FOOD_CHANNEL] += self.sources * self.deposit
+        np.sum(fields[1:], axis=0, out=self.total)
+
+    def __strongest_direction(
+        self, position: Position, channel: Optional[int], exclude: Optional[int]
+    ) -> Optional[Direction]:
+        """
+        Find the neighbouring cell with the strongest scent.
+
+        :param position: The position.
+        :type position: Position
+        :param channel: The channel to follow or None for the sum of the species.
+        :type channel: Optional[int]
+        :param exclude: The channel to subtract from the sum of the species.
+        :type exclude: Optional[int]
+        :return: The direction of the strongest scent, None if no neighbour smells
+            stronger than the current cell.
+        :rtype: Optional[Direction]
+        """
+        field = self.total if channel is None else self.fields[channel]
+        excluded = self.fields[exclude] if exclude is not None else None
+        height, width = field.shape
+        y = position.y - self.boundary.position_1.y
+        x = position.x - self.boundary.position_1.x
+        best = field.item(y, x) - (excluded.item(y, x) if excluded is not None else 0)
+        best_direction = None
+        for direction, dy, dx in _STEPS:
+            if 0 <= y + dy < height and 0 <= x + dx < width:
+                value = field.item(y + dy, x + dx)
+                if excluded is not None:
+                    value -= excluded.item(y + dy, x + dx)
+                if value > best:
+                    best, best_direction = value, direction
+        return best_direction
+
+    def food_direction(self, position: Position) -> Optional[Direction]:
+        """
+        Find the direction of the strongest food scent around a position.
+
+        :param position: The position.
+        :type position: Position
+        :return: The direction or None if there is no gradient to follow.
+        :rtype: Optional[Direction]
+        """
+        return self.__strongest_direction(position, FOOD_CHANNEL, None)
+
+    def enemy_direction(
+        self, species_channel: int, position: Position
+    ) -> Optional[Direction]:
+        """
+        Find the direction of the strongest scent of other species around a position.
+
+        :param species_channel: The channel of the species of the ant.
+        :type species_channel: int
+        :param position: The position.
+        :type position: Position
+        :return: The direction or None if there is no gradient to follow.
+        :rtype: Optional[Direction]
+        """
+        return self.__strongest_direction(position, None, species_channel)
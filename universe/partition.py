@@ -0,0 +1,852 @@
+import asyncio
+import multiprocessing
+import queue
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
+
+from universe.ants import Ant
+from universe.config import SimulationConfig
+from universe.engine import create_random_object, create_universe, spawn
+from universe.events import Event, EventSink
+from universe.map.boundary import Boundary
+from universe.map.object import Object
+from universe.map.object_grid import ObjectGrid
+from universe.map.position import Position
+from universe.tick import living_ants, sense
+from universe.universe import Universe
+from universe.update import UpdateType
+from universe.utils import save_statistics_to_csv
+
+if TYPE_CHECKING:
+    from universe.ants import Species
+    from universe.config import Rules
+
+# The options which need the whole universe in one process
+UNSUPPORTED_OPTIONS = (
+    "raster",
+    "heatmap",
+    "viewport",
+    "pheromones",
+    "two_phase",
+    "shared_state",
+    "trajectory",
+    "results",
+    "stop",
+)
+
+# The ids of the ants spawned by a worker start at a multiple of this block
+ID_BLOCK = 1 << 32
+
+
+def partition_rows(boundary: Boundary, count: int) -> List[Tuple[int, int]]:
+    """
+    Split the rows of a boundary into strips of nearly equal heights.
+
+    :param boundary: The boundary.
+    :type boundary: Boundary
+    :param count: The number of strips, at most the height of the boundary.
+    :type count: int
+    :return: The first and last row of every strip.
+    :rtype: List[Tuple[int, int]]
+    """
+    count = max(1, min(count, boundary.height))
+    rows = []
+    first = boundary.position_1.y
+    for index in range(count):
+        height = boundary.height // count + (index < boundary.height % count)
+        rows.append((first, first + height - 1))
+        first += height
+    return rows
+
+
+def sight_rows(ants: List[Ant]) -> int:
+    """
+    Get the rows of the neighbouring strips the ants of a strip must see.
+
+    An ant looks as far as its speed, which grows with its role.
+
+    :param ants: The living ants of the universe.
+    :type ants: List[Ant]
+    :return: The highest speed of the ants, at least one row.
+    :rtype: int
+    """
+    return max((ant.speed for ant in ants), default=1) or 1
+
+
+def strip_boundary(boundary: Boundary, first: int, last: int) -> Boundary:
+    """
+    Create the boundary of a strip of rows of a boundary.
+
+    :param boundary: The boundary.
+    :type boundary: Boundary
+    :param first: The first row of the strip.
+    :type first: int
+    :param last: The last row of the strip.
+    :type last: int
+    :return: The boundary of the strip.
+    :rtype: Boundary
+    """
+    strip = Boundary()
+    strip.set_boundary(boundary.position_1.x, first, boundary.width, last - first + 1)
+    return strip
+
+
+class RegionView:
+    """
+    Class representing what the ants of a strip see at the start of a tick.
+
+    The view copies the rows of the strip and the rows in sight on each side
+    from the shared grids, so the ants near a border also sense the enemies and
+    the food of the neighbouring strips. It is used like a
+    :class:`universe.tick.Snapshot` by :meth:`Ant.decide_move`.
+
+    :var boundary: The boundary of the universe.
+    :type boundary: Boundary
+    :var objects: The objects of the copied rows.
+    :type objects: ObjectGrid
+    :var nest_field: The field of the nearest nest.
+    :type nest_field: NestField
+    :var pheromones: Always None, pheromones are not partitioned.
+    :type pheromones: None
+    """
+
+    def __init__(
+        self,
+        universe: Universe,
+        rows: Tuple[int, int],
+        ghost_rows: int,
+        occupancy: memoryview,
+        object_types: memoryview,
+    ):
+        """
+        Copy the view of a strip from the shared grids.
+
+        :param universe: The universe of the strip.
+        :type universe: Universe
+        :param rows: The first and last row of the strip.
+        :type rows: Tuple[int, int]
+        :param ghost_rows: The rows of the neighbouring strips in sight.
+        :type ghost_rows: int
+        :param occupancy: The shared grid of the species masks.
+        :type occupancy: memoryview
+        :param object_types: The shared grid of the object type codes.
+        :type object_types: memoryview
+        """
+        boundary = universe.boundary
+        first = max(rows[0] - ghost_rows, boundary.position_1.y)
+        last = min(rows[1] + ghost_rows, boundary.position_2.y)
+        start = (first - boundary.position_1.y) * boundary.width
+        end = (last - boundary.position_1.y + 1) * boundary.width
+        self.boundary = boundary
+        self.nest_field = universe.nest_field
+        self.pheromones = None
+        self.objects = ObjectGrid(strip_boundary(boundary, first, last))
+        self.objects.types = bytearray(object_types[start:end])
+        self.__occupants = bytes(occupancy[start:end])
+
+    def has_enemy(self, key: Tuple[int, int], species: "Species") -> bool:
+        """
+        Check whether a living ant of another species is at a cell.
+
+        :param key: The (x, y) coordinates of the cell.
+        :type key: Tuple[int, int]
+        :param species: The species of the looking ant.
+        :type species: Species
+        :return: True if an enemy is at the cell, False otherwise.
+        :rtype: bool
+        """
+        region = self.objects.boundary
+        x = key[0] - region.position_1.x
+        y = key[1] - region.position_1.y
+        if not (0 <= x < region.width and 0 <= y < region.height):
+            return False
+        return bool(self.__occupants[y * region.width + x] & ~(1 << species.index))
+
+
+class RegionGrid(ObjectGrid):
+    """
+    Class representing the objects of a strip and of the rows around it.
+
+    The ants of the strip pick up the objects of the neighbouring rows from this
+    copy. The usages taken there are recorded for the owner of the rows, which
+    despawns the objects, so no despawn is reported for them here.
+
+    :var rows: The first and last row of the strip.
+    :type rows: Tuple[int, int]
+    :var consumed: The usages taken from every cell of the neighbouring rows,
+        by index in the boundary of the universe.
+    :type consumed: Dict[int, int]
+    """
+
+    def __init__(
+        self,
+        universe: Universe,
+        rows: Tuple[int, int],
+        reach: int,
+        object_types: memoryview,
+        object_usages: memoryview,
+    ):
+        """
+        Copy the objects of a strip and of the rows around it.
+
+        :param universe: The universe of the strip.
+        :type universe: Universe
+        :param rows: The first and last row of the strip.
+        :type rows: Tuple[int, int]
+        :param reach: The rows of the neighbouring strips to copy.
+        :type reach: int
+        :param object_types: The shared grid of the object type codes.
+        :type object_types: memoryview
+        :param object_usages: The shared grid of the usages left.
+        :type object_usages: memoryview
+        """
+        boundary = universe.boundary
+        first = max(rows[0] - reach, boundary.position_1.y)
+        last = min(rows[1] + reach, boundary.position_2.y)
+        super().__init__(strip_boundary(boundary, first, last))
+        start = (first - boundary.position_1.y) * boundary.width
+        end = (last - boundary.position_1.y + 1) * boundary.width
+        self.types = bytearray(object_types[start:end])
+        self.usages = bytearray(object_usages[start:end])
+        self.count = len(self.types) - self.types.count(0)
+        self.rows = rows
+        self.consumed: Dict[int, int] = {}
+        self.__offset = start
+
+    def update(self, target: Object) -> bool:
+        """
+        Store the usages left of an object.
+
+        An object of the strip is despawned if it is used up, one of the
+        neighbouring rows is only removed from the copy.
+
+        :param target: The object taken from the grid with :meth:`object_at`.
+        :type target: Object
+        :return: True if an object of the strip was despawned.
+        :rtype: bool
+        """
+        if self.rows[0] <= target.position.y <= self.rows[1]:
+            return super().update(target)
+        index = self.index(target.position)
+        used = self.usages[index] - max(0, target.usages_left)
+        super().update(target)
+        key = index + self.__offset
+        self.consumed[key] = self.consumed.get(key, 0) + used
+        return False
+
+    def strip_rows(self) -> Tuple[bytearray, bytearray]:
+        """
+        Get the objects of the rows of the strip.
+
+        :return: The object type codes and the usages left of the strip.
+        :rtype: Tuple[bytearray, bytearray]
+        """
+        width = self.boundary.width
+        start = (self.rows[0] - self.boundary.position_1.y) * width
+        end = (self.rows[1] - self.boundary.position_1.y + 1) * width
+        return self.types[start:end], self.usages[start:end]
+
+
+class Partition:
+    """
+    Class running a strip of the universe in a worker process.
+
+    The universe of the partition spans the whole boundary, so moves and nests
+    work as usual, but it only holds the ants and the objects of its rows.
+
+    :var index: The index of the partition.
+    :type index: int
+    :var rows: The first and last row of the strip.
+    :type rows: Tuple[int, int]
+    :var reach: The rows of the neighbouring strips the ants of the strip
+        interact with, their front cell and the neighborhood of the queens.
+    :type reach: int
+    :var universe: The universe of the strip.
+    :type universe: Universe
+    """
+
+    def __init__(
+        self,
+        index: int,
+        setup: Dict[str, Any],
+        grids: Tuple[memoryview, memoryview, memoryview],
+        barrier: multiprocessing.Barrier,
+    ):
+        """
+        Initialize the partition from the setup of the coordinator.
+
+        :param index: The index of the partition.
+        :type index: int
+        :param setup: The initial state of the strip.
+        :type setup: Dict[str, Any]
+        :param grids: The shared grids of the species masks, of the object type
+            codes and of the usages left.
+        :type grids: Tuple[memoryview, memoryview, memoryview]
+        :param barrier: The barrier between publishing and reading the grids.
+        :type barrier: multiprocessing.Barrier
+        """
+        self.index = index
+        self.rows = setup["rows"]
+        self.universe = universe = Universe()
+        universe.boundary = setup["boundary"]
+        universe.species = setup["species"]
+        universe.rules = setup["rules"]
+        universe.rng.set_seed(f"{setup['seed']}:{index}")
+        universe.nests = setup["nests"]
+        universe.nest_index = setup["nest_index"]
+        universe.nest_field = setup["nest_field"]
+        universe.objects = ObjectGrid(strip_boundary(universe.boundary, *self.rows))
+        universe.objects.types = bytearray(setup["object_types"])
+        universe.objects.usages = bytearray(setup["object_usages"])
+        universe.objects.count = len(universe.objects.types) - (
+            universe.objects.types.count(0)
+        )
+        universe.reindex(setup["ants"])
+        Ant.NEXT_ID = setup["next_id"] + (index + 1) * ID_BLOCK
+        self.reach = interaction_rows(universe.rules)
+
+        self.events = EventSink()
+        self.__occupancy, self.__object_types, self.__object_usages = grids
+        self.__barrier = barrier
+        self.__partitions = setup["partitions"]
+        width = universe.boundary.width
+        self.__start = (self.rows[0] - universe.boundary.position_1.y) * width
+        self.__end = (self.rows[1] - universe.boundary.position_1.y + 1) * width
+
+    def contains(self, ant: Ant) -> bool:
+        """
+        Check whether an ant is in the rows of the strip.
+
+        :param ant: The ant.
+        :type ant: Ant
+        :return: True if the ant is in the strip, False otherwise.
+        :rtype: bool
+        """
+        return self.rows[0] <= ant.position.y <= self.rows[1]
+
+    def move(self, ghost_rows: int) -> Tuple[List[Ant], List[Event], List[Ant]]:
+        """
+        Publish the strip, then decide and apply the moves of its ants.
+
+        The updates of the moves are held until the end of the tick, so they
+        carry the state of the ants after :meth:`process`. Those of the ants
+        leaving the strip go with them to their new owner.
+
+        :param ghost_rows: The rows of the neighbouring strips in sight.
+        :type ghost_rows: int
+        :return: The ants which left the strip, their updates and the ants
+            within :attr:`reach` of its borders.
+        :rtype: Tuple[List[Ant], List[Event], List[Ant]]
+        """
+        universe = self.universe
+        boundary = universe.boundary
+        ants = living_ants(universe)
+        occupants = bytearray(self.__end - self.__start)
+        for ant in ants:
+            # Ants pushed back by a rock or spawned across the border move out
+            # of the strip after their move
+            if self.contains(ant):
+                index = (ant.position.y - boundary.position_1.y) * boundary.width
+                index += ant.position.x - boundary.position_1.x - self.__start
+                occupants[index] |= 1 << ant.species.index
+        self.__occupancy[self.__start : self.__end] = occupants
+        self.__object_types[self.__start : self.__end] = universe.objects.types
+        self.__object_usages[self.__start : self.__end] = universe.objects.usages
+        self.__barrier.wait()
+
+        view = RegionView(
+            universe, self.rows, ghost_rows, self.__occupancy, self.__object_types
+        )
+        moves = sense(view, ants, universe.rng.randint(0, 2**31 - 1))
+        for ant, move in zip(ants, moves):
+            if move is not None:
+                ant.apply_move(universe, move, self.events)
+        emigrants = [ant for ant in ants if ant.alive and not self.contains(ant)]
+        leaving = {id(ant) for ant in emigrants}
+        handed = []
+        for event in self.events.drain():
+            if id(event[1]) in leaving:
+                handed.append(event)
+            else:
+                self.events.emit(*event)
+        # Ants starved during the moves stay until the end of the tick
+        universe.reindex(ant for ant in ants if self.contains(ant))
+        first, last = self.rows
+        border = [
+            ant
+            for ant in ants
+            if ant.alive
+            and self.contains(ant)
+            and min(ant.position.y - first, last - ant.position.y) < self.reach
+        ]
+        return emigrants, handed, border
+
+    def process(
+        self,
+        immigrants: List[Ant],
+        handed: List[Event],
+        ghosts: List[Ant],
+        ant_room: int,
+        object_room: int,
+        statistics: bool,
+    ) -> Tuple[List[Event], int, int, List[Tuple[int, int]], int, Optional[List[Ant]]]:
+        """
+        Let the ants of the strip fight, pick up objects and spawn.
+
+        The ants near the borders fight the ghosts, the copies of the ants of
+        the neighbouring strips, and pick up their objects from the shared grids.
+
+        :param immigrants: The ants which entered the strip.
+        :type immigrants: List[Ant]
+        :param handed: The updates of the moves of the immigrants.
+        :type handed: List[Event]
+        :param ghosts: The ants of the neighbouring strips within :attr:`reach`.
+        :type ghosts: List[Ant]
+        :param ant_room: The number of ants the strip may add by spawning.
+        :type ant_room: int
+        :param object_room: The number of objects the strip may add.
+        :type object_room: int
+        :param statistics: Whether to return the living ants for the statistics.
+        :type statistics: bool
+        :return: The updates of the tick, the number of ants and objects, the usages taken
+            from the objects of the neighbouring strips by cell index, the rows
+            in sight of the ants, and the living ants if the statistics were
+            requested.
+        :rtype: Tuple[List[Event], int, int, List[Tuple[int, int]], int,
+            Optional[List[Ant]]]
+        """
+        universe = self.universe
+        for event in handed:
+            self.events.emit(*event)
+        for ant in immigrants:
+            universe.ants[(ant.position.x, ant.position.y)].append(ant)
+        ants = living_ants(universe)
+        universe.ants_count = len(ants)
+        universe.MAX_ANTS = universe.ants_count + ant_room
+
+        # The ghosts are only looked at, every ant only changes itself
+        for ant in ghosts:
+            universe.ants[(ant.position.x, ant.position.y)].append(ant)
+        strip_objects = universe.objects
+        region = RegionGrid(
+            universe,
+            self.rows,
+            self.reach,
+            self.__object_types,
+            self.__object_usages,
+        )
+        universe.objects = region
+        for ant in ants:
+            if ant.alive:
+                ant.process(universe, self.events)
+        universe.objects = strip_objects
+        strip_objects.types, strip_objects.usages = region.strip_rows()
+        strip_objects.count = len(strip_objects.types) - strip_objects.types.count(0)
+
+        strip = strip_objects.boundary
+        if object_room > 0:
+            for _ in range(
+                universe.rng.randint(
+                    0, max(strip.size() // 2000, -(-10 // self.__partitions))
+                )
+            ):
+                create_random_object(universe, self.events, strip)
+
+        ghost_ids = {id(ant) for ant in ghosts}
+        ants = [ant for ant in living_ants(universe) if id(ant) not in ghost_ids]
+        universe.reindex(ants)
+        return (
+            self.events.drain(),
+            len(ants),
+            len(strip_objects),
+            sorted(region.consumed.items()),
+            sight_rows(ants),
+            ants if statistics else None,
+        )
+
+    def merge(self, consumed: List[Tuple[int, int]]) -> Tuple[List[Event], int]:
+        """
+        Take the usages the ants of the neighbouring strips took from the strip.
+
+        An object used up by several strips in the same tick gave each of them
+        its gain, it is despawned once.
+
+        :param consumed: The usages taken by cell index in the boundary.
+        :type consumed: List[Tuple[int, int]]
+        :return: The updates and the number of objects.
+        :rtype: Tuple[List[Event], int]
+        """
+        objects = self.universe.objects
+        boundary = self.universe.boundary
+        for index, used in consumed:
+            position = Position(
+                boundary.position_1.x + index % boundary.width,
+                boundary.position_1.y + index // boundary.width,
+            )
+            target = objects.object_at(position)
+            if target is None:
+                continue
+            target.usages_left = max(0, target.usages_left - used)
+            if objects.update(target):
+                self.events.emit(UpdateType.OBJECT_DESPAWN, target=target)
+        return self.events.drain(), len(objects)
+
+
+def interaction_rows(rules: "Rules") -> int:
+    """
+    Get the rows of the neighbouring strips the ants of a strip interact with.
+
+    An ant fights and picks up objects in its front cell, a queen counts the
+    ants of its species around it before spawning.
+
+    :param rules: The rules of the universe.
+    :type rules: Rules
+    :return: The number of rows.
+    :rtype: int
+    """
+    return max(1, rules.brood_radius)
+
+
+def serve_partition(
+    index: int,
+    setup: Dict[str, Any],
+    commands: multiprocessing.Queue,
+    results: multiprocessing.Queue,
+    barrier: multiprocessing.Barrier,
+    grids: Tuple[str, str, str],
+) -> None:
+    """
+    Run a partition in a worker process.
+
+    The command queue takes tuples of a :class:`Partition` method name and its
+    arguments, or None to stop. Every result is put on the result queue with
+    the index of the partition, an exception if the command failed.
+
+    :param index: The index of the partition.
+    :type index: int
+    :param setup: The initial state of the strip.
+    :type setup: Dict[str, Any]
+    :param commands: The queue of commands from the coordinator.
+    :type commands: multiprocessing.Queue
+    :param results: The queue of results to the coordinator.
+    :type results: multiprocessing.Queue
+    :param barrier: The barrier between publishing and reading the grids.
+    :type barrier: multiprocessing.Barrier
+    :param grids: The names of the shared memory blocks of the species masks, of
+        the object type codes and of the usages left.
+    :type grids: Tuple[str, str, str]
+    """
+    blocks = [shared_memory.SharedMemory(name=name) for name in grids]
+    try:
+        partition = Partition(
+            index, setup, tuple(block.buf for block in blocks), barrier
+        )
+    except Exception as error:
+        results.put((index, error))
+        partition = None
+    while partition is not None:
+        command = commands.get()
+        if command is None:
+            break
+        name, args = command
+        try:
+            results.put((index, getattr(partition, name)(*args)))
+        except Exception as error:
+            # Release the other partitions waiting for this one
+            barrier.abort()
+            results.put((index, error))
+    del partition
+    for block in blocks:
+        block.close()
+
+
+class PartitionedEngine:
+    """
+    Class coordinating the worker processes of a partitioned universe.
+
+    The boundary is split into strips of rows, each owned by a worker process
+    with its ants and objects. Every tick the workers publish their strips to
+    grids in shared memory, so the ants near a border sense the neighbouring
+    strip as far as the fastest ant sees, then decide and apply their moves.
+    The ants crossing a border are handed over to the owner of their new rows
+    before the ants fight, pick up objects and spawn. The ants near a border
+    fight copies of the ants across it and pick up its objects, the usages they
+    take are then merged into the owner of the objects. The updates of a tick
+    leave the workers at its end, with the state of the ants at that time, and
+    are merged in the order of the partitions, so a seed and a number of
+    partitions always give the same simulation.
+
+    :var universe: The universe of the coordinator, it holds the initial spawn.
+    :type universe: Universe
+    :var rows: The first and last row of every strip.
+    :type rows: List[Tuple[int, int]]
+    :var ants_count: The number of living ants.
+    :type ants_count: int
+    :var objects_count: The number of objects.
+    :type objects_count: int
+    :var ghost_rows: The rows of the neighbouring strips in sight of the ants.
+    :type ghost_rows: int
+    """
+
+    def __init__(self, universe: Universe, partitions: int):
+        """
+        Initialize the engine for a universe after its initial spawn.
+
+        :param universe: The universe.
+        :type universe: Universe
+        :param partitions: The number of worker processes.
+        :type partitions: int
+        """
+        self.universe = universe
+        self.rows = partition_rows(universe.boundary, partitions)
+        self.ants_count = len(living_ants(universe))
+        self.objects_count = len(universe.objects)
+        self.ghost_rows = sight_rows(living_ants(universe))
+        self.__reach = interaction_rows(universe.rules)
+        self.__processes: List[multiprocessing.Process] = []
+        self.__commands: List[multiprocessing.Queue] = []
+        self.__results: Optional[multiprocessing.Queue] = None
+        self.__blocks: List[shared_memory.SharedMemory] = []
+        self.__barrier: Optional[multiprocessing.Barrier] = None
+
+    def start(self) -> None:
+        """Start the worker processes and hand them their strips."""
+        universe = self.universe
+        boundary = universe.boundary
+        context = multiprocessing.get_context("spawn")
+        self.__blocks = [
+            shared_memory.SharedMemory(create=True, size=boundary.size())
+            for _ in range(3)
+        ]
+        # Kept until the workers stop, they rebuild it from its name
+        self.__barrier = context.Barrier(len(self.rows))
+        self.__results = context.Queue()
+        ants = living_ants(universe)
+        for index, rows in enumerate(self.rows):
+            start = (rows[0] - boundary.position_1.y) * boundary.width
+            end = (rows[1] - boundary.position_1.y + 1) * boundary.width
+            setup = {
+                "rows": rows,
+                "partitions": len(self.rows),
+                "boundary": boundary,
+                "species": universe.species,
+                "rules": universe.rules,
+                "seed": universe.rng.seed,
+                "nests": universe.nests,
+                "nest_index": universe.nest_index,
+                "nest_field": universe.nest_field,
+                "object_types": universe.objects.types[start:end],
+                "object_usages": universe.objects.usages[start:end],
+                "ants": [ant for ant in ants if rows[0] <= ant.position.y <= rows[1]],
+                "next_id": Ant.NEXT_ID,
+            }
+            commands = context.Queue()
+            process = context.Process(
+                target=serve_partition,
+                args=(
+                    index,
+                    setup,
+                    commands,
+                    self.__results,
+                    self.__barrier,
+                    tuple(block.name for block in self.__blocks),
+                ),
+                daemon=True,
+            )
+            process.start()
+            self.__commands.append(commands)
+            self.__processes.append(process)
+        # The ants now live in the workers
+        universe.reindex([])
+
+    async def tick(self, statistics: bool = False) -> Tuple[List[Event], List[Ant]]:
+        """
+        Run the ants of a tick in every partition.
+
+        :param statistics: Whether to collect the living ants for the statistics.
+        :type statistics: bool
+        :return: The updates of the tick and the living ants, an empty list if
+            the statistics were not requested.
+        :rtype: Tuple[List[Event], List[Ant]]
+        """
+        events: List[Event] = []
+        immigrants: List[List[Ant]] = [[] for _ in self.rows]
+        nearby: List[Ant] = []
+        moved = await self.__call("move", [(self.ghost_rows,)] * len(self.rows))
+        handed: List[List[Event]] = [[] for _ in self.rows]
+        for emigrants, updates, border in moved:
+            for ant in emigrants:
+                immigrants[self.__owner(ant.position.y)].append(ant)
+            # The updates are pickled with their ants to keep them the same
+            for event in updates:
+                handed[self.__owner(event[1].position.y)].append(event)
+            nearby.extend(border)
+            nearby.extend(emigrants)
+        ghosts: List[List[Ant]] = [[] for _ in self.rows]
+        for ant in nearby:
+            owner = self.__owner(ant.position.y)
+            for index, (first, last) in enumerate(self.rows):
+                if index != owner and (
+                    first - self.__reach <= ant.position.y <= last + self.__reach
+                ):
+                    ghosts[index].append(ant)
+
+        # Every strip may grow by the same share of the room left
+        ant_room = max(0, self.universe.MAX_ANTS - self.ants_count) // len(self.rows)
+        object_room = max(0, self.universe.MAX_OBJECTS - self.objects_count)
+        object_room //= len(self.rows)
+        results = await self.__call(
+            "process",
+            [
+                (ants, handed[index], ghosts[index], ant_room, object_room, statistics)
+                for index, ants in enumerate(immigrants)
+            ],
+        )
+        living: List[Ant] = []
+        consumed: List[List[Tuple[int, int]]] = [[] for _ in self.rows]
+        self.ants_count = self.objects_count = 0
+        self.ghost_rows = 1
+        for processed, ants_count, objects_count, used, sight, ants in results:
+            events.extend(processed)
+            self.ants_count += ants_count
+            self.objects_count += objects_count
+            self.ghost_rows = max(self.ghost_rows, sight)
+            living.extend(ants or [])
+            for index, count in used:
+                row = self.universe.boundary.position_1.y
+                row += index // self.universe.boundary.width
+                consumed[self.__owner(row)].append((index, count))
+
+        if any(consumed):
+            self.objects_count = 0
+            for merged, objects_count in await self.__call(
+                "merge", [(used,) for used in consumed]
+            ):
+                events.extend(merged)
+                self.objects_count += objects_count
+        return events, living
+
+    def close(self) -> None:
+        """Stop the worker processes and free the shared memory."""
+        for commands in self.__commands:
+            commands.put(None)
+        for process in self.__processes:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+        for block in self.__blocks:
+            block.close()
+            block.unlink()
+        self.__processes, self.__commands, self.__blocks = [], [], []
+        self.__barrier = None
+
+    def __owner(self, y: int) -> int:
+        """Return the index of the partition owning a row."""
+        for index, (first, last) in enumerate(self.rows):
+            if first <= y <= last:
+                return index
+        raise ValueError(f"Row out of the boundary: {y}")
+
+    async def __call(self, name: str, arguments: List[tuple]) -> List[Any]:
+        """Run a method on every partition and return the results in order."""
+        for commands, args in zip(self.__commands, arguments):
+            commands.put((name, args))
+        return await asyncio.to_thread(self.__collect)
+
+    def __collect(self) -> List[Any]:
+        """Wait for a result of every partition."""
+        results: List[Any] = [None] * len(self.rows)
+        for _ in self.rows:
+            while True:
+                try:
+                    index, result = self.__results.get(timeout=1)
+                    break
+                except queue.Empty:
+                    if not all(process.is_alive() for process in self.__processes):
+                        raise RuntimeError("A partition worker died") from None
+            if isinstance(result, Exception):
+                raise RuntimeError(f"Partition {index} failed") from result
+            results[index] = result
+        return results
+
+
+async def run_partitioned(
+    config: Union[SimulationConfig, dict], update_callback: Callable
+) -> int:
+    """
+    Run a simulation split across worker processes.
+
+    The ``partitions`` configuration key sets the number of workers. The options
+    of :data:`UNSUPPORTED_OPTIONS` need the whole universe in one process and are
+    not available. The workers are started with the spawn method, so a script
+    running a partitioned simulation must do it under
+    ``if __name__ == "__main__":``.
+
+    :param config: The configuration of the simulation.
+    :type config: Union[SimulationConfig, dict]
+    :param update_callback: The callback function to update the frontend.
+    :type update_callback: Callable
+    :return: A random number drawn at the end, as :func:`universe.engine.run`.
+    :rtype: int
+    :raises ValueError: If the configuration is invalid or enables an option of
+        :data:`UNSUPPORTED_OPTIONS`.
+    """
+    config = SimulationConfig.coerce(config)
+    unsupported = [
+        key for key in UNSUPPORTED_OPTIONS if getattr(config, key) is not None
+    ]
+    if unsupported:
+        raise ValueError(f"Options not available with partitions: {unsupported}")
+    tps = config.tps
+    pause = 1 / tps if tps > 0 else 0
+    universe = create_universe(config)
+    await update_callback(UpdateType.SIMULATION_START)
+
+    events = EventSink()
+    spawn(universe, events, config)
+    await events.flush(update_callback)
+    if config.nest_field:
+        await update_callback(UpdateType.NEST_FIELD, target=universe.nest_field)
+    await update_callback(UpdateType.SIMULATION_SET_TPS, state=tps)
+
+    engine = PartitionedEngine(universe, config.partitions)
+    try:
+        # Workers started before a failing one are stopped by the close
+        engine.start()
+        last_timestamp = datetime.now()
+        current_round = 1
+        while config.rounds >= current_round:
+            while config.pause:
+                await asyncio.sleep(0.1)
+                last_timestamp = datetime.now()
+            if config.tps != tps:
+                tps = config.tps
+                pause = 1 / tps if tps > 0 else 0
+
+            await update_callback(
+                UpdateType.SIMULATION_CURRENT_ROUND, state=current_round
+            )
+            statistics = config.statistics is not None and current_round % 20 == 0
+            updates, ants = await engine.tick(statistics=statistics)
+            for update_type, ant, target, state in updates:
+                await update_callback(update_type, ant, target, state)
+            if statistics:
+                save_statistics_to_csv(
+                    ants, config.statistics, current_round, universe.species
+                )
+
+            elapsed = (datetime.now() - last_timestamp).total_seconds()
+            temp_tps = round(1 / elapsed) if elapsed > 0 else 0
+            if temp_tps == 0 or temp_tps > tps:
+                temp_tps = tps
+            await update_callback(UpdateType.SIMULATION_TPS, state=temp_tps)
+            await asyncio.sleep(max(0, pause - elapsed))
+            last_timestamp = datetime.now()
+            current_round += 1
+    finally:
+        engine.close()
+
+    print("Game over!")
+    await update_callback(UpdateType.SIMULATION_END)
+    return universe.rng.randint(0, 1000)
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from universe.serializer import DEFAULT_SERIALIZER, Serializer
+from universe.update import UpdateType
+
+if TYPE_CHECKING:
+    from universe.ants import Ant
+
+# Binary updates, only the latest one is published
+FRAME_UPDATES = {UpdateType.RASTER_FRAME, UpdateType.HEATMAP_FRAME}
+
+
+class Publisher:
+    """
+    Class publishing the updates of a simulation at a fixed rate.
+
+    The simulation ticks at its own rate while the updates are buffered and sent
+    as one ``SIMULATION_BATCH`` message per period, carrying the last round and a
+    monotonic timestamp so clients can interpolate between batches. Updates made
+    obsolete within a period are coalesced: only the last move of an ant, the
+    last TPS and the last binary frame of each type are published.
+
+    :var hz: The number of batches published per second.
+    :type hz: float
+    :var serializer: The serializer of the batches.
+    :type serializer: Serializer
+    :var round: The last round reported by the simulation.
+    :type round: int
+    """
+
+    def __init__(
+        self,
+        send: Callable[[Any], Awaitable],
+        hz: float,
+        serializer: Serializer = DEFAULT_SERIALIZER,
+    ):
+        """
+        Initialize the publisher.
+
+        :param send: The coroutine function sending a message to the client.
+        :type send: Callable[[Any], Awaitable]
+        :param hz: The number of batches published per second.
+        :type hz: float
+        :param serializer: The serializer of the batches, defaults to the
+            byte-compatible one.
+        :type serializer: Serializer
+        :raises ValueError: If the rate is not positive.
+        """
+        if hz <= 0:
+            raise ValueError("The publish rate must be positive")
+        self.send = send
+        self.hz = hz
+        self.serializer = serializer
+        self.round = 0
+        self.__updates: List[Tuple[UpdateType, Optional["Ant"], Any, Any]] = []
+        # Index in the buffer of the coalesced updates, by key
+        self.__latest: Dict[Any, int] = {}
+        self.__frames: Dict[UpdateType, bytes] = {}
+
+    def publish(
+        self,
+        update_type: UpdateType,
+        ant: Optional["Ant"] = None,
+        target: Optional[Any] = None,
+        state: Optional[Any] = None,
+    ) -> None:
+        """
+        Buffer an update until the next batch.
+
+        :param update_type: The type of the update.
+        :type update_type: UpdateType
+        :param ant: The ant involved in the update.
+        :type ant: Optional[Ant]
+        :param target: The target of the update.
+        :type target: Optional[Any]
+        :param state: The state of the update.
+        :type state: Optional[Any]
+        """
+        if update_type == UpdateType.SIMULATION_CURRENT_ROUND:
+            self.round = state
+            return
+        if update_type in FRAME_UPDATES:
+            self.__frames[update_type] = state
+            return
+        if update_type == UpdateType.ANT_MOVE:
+            key = (update_type, ant.id)
+        elif update_type == UpdateType.SIMULATION_TPS:
+            key = update_type
+        else:
+            self.__updates.append((update_type, ant, target, state))
+            return
+        index = self.__latest.get(key)
+        if index is None:
+            self.__latest[key] = len(self.__updates)
+            self.__updates.append((update_type, ant, target, state))
+        else:
+            self.__updates[index] = (update_type, ant, target, state)
+
+    async def flush(self) -> None:
+        """Send the buffered updates as one batch, followed by the binary frames."""
+        updates, frames = self.__updates, self.__frames
+        if not updates and not frames:
+            return
+        self.__updates, self.__latest, self.__frames = [], {}, {}
+        if updates:
+            encode = self.serializer.update
+            await self.send(
+                self.serializer.batch(
+                    self.round,
+                    time.monotonic(),
+                    [encode(*update) for update in updates],
+                )
+            )
+        for frame in frames.values():
+            await self.send(frame)
+
+    async def run(self, simulation: asyncio.Task) -> None:
+        """
+        Publish batches until the simulation is done, then send the remainder.
+
+        :param simulation: The task running the simulation.
+        :type simulation: asyncio.Task
+        """
+        while not simulation.done():
+            await asyncio.sleep(1 / self.hz)
+            await self.flush()
+        await self.flush()
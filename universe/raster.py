@@ -0,0 +1,171 @@
+import math
+import re
+import struct
+from typing import TYPE_CHECKING, List
+
+from universe.ants.ant import Role
+from universe.map.object import ObjectType
+
+if TYPE_CHECKING:
+    from universe.universe import Universe
+
+FRAME_MAGIC = b"MOAF"
+# magic, round, width, height, scale, encoding
+FRAME_HEADER = struct.Struct("<4sIHHHB")
+
+ENCODING_RAW = 0
+ENCODING_RLE = 1
+
+BACKGROUND = 0
+NEST = 1
+QUEEN = 2
+# Palette index of every object type, ants of a species use FIRST_SPECIES + index
+OBJECT_COLORS = {
+    ObjectType.FOOD: 3,
+    ObjectType.WATER: 4,
+    ObjectType.ROCK: 5,
+}
+FIRST_SPECIES = 6
+
+_RUNS = re.compile(rb"(.)\1*", re.DOTALL)
+
+
+class Rasterizer:
+    """
+    Class rendering the universe into a downsampled palette image.
+
+    Each pixel of the frame covers a square of ``scale`` × ``scale`` cells, so the
+    size of a frame depends on the requested viewport and not on the population.
+    Ants are drawn over objects, which are drawn over nests.
+
+    :var width: The width of the frame in pixels.
+    :type width: int
+    :var height: The height of the frame in pixels.
+    :type height: int
+    :var scale: The number of cells per pixel along each axis.
+    :type scale: int
+    """
+
+    def __init__(self, universe: "Universe", max_width: int, max_height: int):
+        """
+        Initialize the rasterizer for a universe.
+
+        :param universe: The universe, its nests must be spawned already.
+        :type universe: Universe
+        :param max_width: The maximum width of the frame in pixels.
+        :type max_width: int
+        :param max_height: The maximum height of the frame in pixels.
+        :type max_height: int
+        :raises ValueError: If the maximum size is not positive.
+        """
+        if max_width <= 0 or max_height <= 0:
+            raise ValueError("The frame size must be positive")
+        boundary = universe.boundary
+        self.universe = universe
+        self.scale = max(
+            1,
+            math.ceil(boundary.width / max_width),
+            math.ceil(boundary.height / max_height),
+        )
+        self.width = math.ceil(boundary.width / self.scale)
+        self.height = math.ceil(boundary.height / self.scale)
+        self.__background = self.__render_nests()
+
+    def palette(self) -> List[str]:
+        """
+        Get the colors of the palette indexes used in the frames.
+
+        :return: The CSS color of every palette index.
+        :rtype: List[str]
+        """
+        colors = ["transparent", "lightgray", "gold", "green", "blue", "gray"]
+        species = self.universe.species
+        colors.extend(["white"] * (max((s.index for s in species), default=-1) + 1))
+        for s in species:
+            colors[FIRST_SPECIES + s.index] = s.color
+        return colors
+
+    def __render_nests(self) -> bytes:
+        """Render the static layer of the nests."""
+        boundary = self.universe.boundary
+        cells = self.universe.nest_index.cells
+        pixels = bytearray(self.width * self.height)
+        for y in range(boundary.height):
+            row = y * boundary.width
+            pixel_row = y // self.scale * self.width
+            for x in range(boundary.width):
+                if cells[row + x]:
+                    pixels[pixel_row + x // self.scale] = NEST
+        return bytes(pixels)
+
+    def render(self) -> bytearray:
+        """
+        Render the current state of the universe.
+
+        :return: The palette index of every pixel, row by row.
+        :rtype: bytearray
+        """
+        universe = self.universe
+        boundary = universe.boundary
+        scale, width = self.scale, self.width
+        pixels = bytearray(self.__background)
+
+        types = universe.objects.types
+        for object_type, color in OBJECT_COLORS.items():
+            code = object_type.value + 1
+            index = types.find(code)
+            while index >= 0:
+                y, x = divmod(index, boundary.width)
+                pixels[y // scale * width + x // scale] = color
+                index = types.find(code, index + 1)
+
+        x_0, y_0 = boundary.position_1.x, boundary.position_1.y
+        for ant_row in universe.ants.values():
+            for ant in ant_row:
+                if ant.alive:
+                    pixels[
+                        (ant.position.y - y_0) // scale * width
+                        + (ant.position.x - x_0) // scale
+                    ] = (
+                        QUEEN
+                        if ant.role is Role.QUEEN
+                        else FIRST_SPECIES + ant.species.index
+                    )
+        return pixels
+
+    def encode(self, pixels: bytearray, current_round: int) -> bytes:
+        """
+        Encode a frame as a binary message.
+
+        The header is followed by run-length encoded pixels, as pairs of the run
+        length (1-255) and the palette index, or by the raw pixels if that is
+        smaller.
+
+        :param pixels: The pixels returned by :meth:`render`.
+        :type pixels: bytearray
+        :param current_round: The round of the frame.
+        :type current_round: int
+        :return: The encoded frame.
+        :rtype: bytes
+        """
+        body = bytearray()
+        for run in _RUNS.finditer(pixels):
+            value = pixels[run.start()]
+            length = run.end() - run.start()
+            while length > 0:
+                body += bytes((min(length, 255), value))
+                length -= 255
+        encoding = ENCODING_RLE
+        if len(body) >= len(pixels):
+            body, encoding = pixels, ENCODING_RAW
+        return (
+            FRAME_HEADER.pack(
+                FRAME_MAGIC,
+                current_round,
+                self.width,
+                self.height,
+                self.scale,
+                encoding,
+            )
+            + body
+        )
@@ -0,0 +1,354 @@
+import hashlib
+import json
+import sqlite3
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from universe.config import SimulationConfig
+
+if TYPE_CHECKING:
+    from universe.universe import Universe
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    seed TEXT NOT NULL,
+    config TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    species TEXT NOT NULL,
+    rounds INTEGER NOT NULL,
+    winner TEXT,
+    margin INTEGER NOT NULL,
+    extinction_round INTEGER,
+    final_population INTEGER NOT NULL,
+    populations BLOB NOT NULL,
+    UNIQUE (config_hash, seed)
+);
+CREATE INDEX IF NOT EXISTS runs_winner ON runs (config_hash, winner, margin);
+CREATE INDEX IF NOT EXISTS runs_any_winner ON runs (winner, margin);
+CREATE INDEX IF NOT EXISTS runs_extinction ON runs (config_hash, extinction_round);
+"""
+
+
+def config_key(config: Union[SimulationConfig, dict]) -> str:
+    """
+    Get the canonical form of the model keys of a configuration.
+
+    The defaults are filled in, so a key left out and a key set to its default
+    give the same form.
+
+    :param config: The configuration of the simulation.
+    :type config: Union[SimulationConfig, dict]
+    :return: The JSON object of the model keys, with sorted keys.
+    :rtype: str
+    """
+    return json.dumps(
+        SimulationConfig.coerce(config).model(), sort_keys=True, separators=(",", ":")
+    )
+
+
+def config_hash(config: Union[SimulationConfig, dict]) -> str:
+    """
+    Get the hash identifying the model keys of a configuration.
+
+    :param config: The configuration of the simulation.
+    :type config: Union[SimulationConfig, dict]
+    :return: The hexadecimal SHA-1 of :func:`config_key`.
+    :rtype: str
+    """
+    return hashlib.sha1(config_key(config).encode()).hexdigest()
+
+
+class RunResult:
+    """
+    Class representing the population series of a run.
+
+    :var seed: The seed of the run.
+    :type seed: str
+    :var config: The canonical model keys of the configuration.
+    :type config: str
+    :var species: The names of the species of the run.
+    :type species: List[str]
+    :var populations: The living ants of every species after every round.
+    :type populations: List[Tuple[int, ...]]
+    """
+
+    def __init__(
+        self,
+        seed: str,
+        config: Union[SimulationConfig, dict],
+        species: List[str],
+        populations: Optional[List[Sequence[int]]] = None,
+    ):
+        """
+        Initialize the result of a run.
+
+        :param seed: The seed of the run.
+        :type seed: str
+        :param config: The configuration of the simulation.
+        :type config: Union[SimulationConfig, dict]
+        :param species: The names of the species of the run.
+        :type species: List[str]
+        :param populations: The living ants of every species after every round.
+        :type populations: Optional[List[Sequence[int]]]
+        """
+        self.seed = str(seed)
+        self.config = config_key(config)
+        self.species = species
+        self.populations: List[Tuple[int, ...]] = [
+            tuple(counts) for counts in populations or []
+        ]
+
+    def observe(self, universe: "Universe") -> Tuple[int, ...]:
+        """
+        Append the living ants of every species of a universe after a round.
+
+        :param universe: The universe.
+        :type universe: Universe
+        :return: The living ants of every species.
+        :rtype: Tuple[int, ...]
+        """
+        self.populations.append(universe.populations())
+        return self.populations[-1]
+
+    @property
+    def winner(self) -> Optional[str]:
+        """Return the species with the most ants at the end, None for a tie."""
+        if not self.populations:
+            return None
+        final = self.populations[-1]
+        best = max(final)
+        if best == 0 or final.count(best) > 1:
+            return None
+        return self.species[final.index(best)]
+
+    @property
+    def margin(self) -> int:
+        """Return the lead of the largest species over the next one at the end."""
+        if not self.populations:
+            return 0
+        final = sorted(self.populations[-1], reverse=True)
+        return final[0] - (final[1] if len(final) > 1 else 0)
+
+    @property
+    def extinction_round(self) -> Optional[int]:
+        """Return the first round a species has no ant left, None if none."""
+        for current_round, counts in enumerate(self.populations, 1):
+            if 0 in counts:
+                return current_round
+        return None
+
+
+class ResultStore:
+    """
+    Class storing the results of runs for comparisons across seeds.
+
+    Every run is a row of an SQLite database, unique per seed and configuration,
+    with its winner, margin and extinction round indexed, so the queries across
+    many runs never read the series of the runs they skip. The populations of a
+    run are stored as one ``int32`` array of rounds × species, and the
+    aggregates stack them into numpy arrays.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        Open or create a result database.
+
+        :param path: The path of the database, defaults to an in-memory one.
+        :type path: str
+        """
+        self.__connection = sqlite3.connect(path)
+        self.__connection.executescript(SCHEMA)
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add(self, result: RunResult) -> int:
+        """
+        Store the result of a run, replacing the one of the same seed and
+        configuration.
+
+        :param result: The result of the run.
+        :type result: RunResult
+        :return: The id of the stored run.
+        :rtype: int
+        """
+        populations = np.array(result.populations, dtype="<i4").reshape(
+            len(result.populations), len(result.species)
+        )
+        with self.__connection:
+            cursor = self.__connection.execute(
+                "INSERT OR REPLACE INTO runs (seed, config, config_hash, species, "
+                "rounds, winner, margin, extinction_round, final_population, "
+                "populations) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    result.seed,
+                    result.config,
+                    hashlib.sha1(result.config.encode()).hexdigest(),
+                    json.dumps(result.species),
+                    len(result.populations),
+                    result.winner,
+                    result.margin,
+                    result.extinction_round,
+                    int(populations[-1].sum()) if len(populations) else 0,
+                    populations.tobytes(),
+                ),
+            )
+        return cursor.lastrowid
+
+    def __len__(self) -> int:
+        """Return the number of stored runs."""
+        return self.__connection.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def seeds(self, config: Optional[dict] = None) -> List[str]:
+        """
+        Get the seeds of the stored runs.
+
+        :param config: The configuration of the runs, defaults to every one.
+        :type config: Optional[dict]
+        :return: The seeds, in the order they were last stored.
+        :rtype: List[str]
+        """
+        where, parameters = self.__filter(config)
+        return [
+            row[0]
+            for row in self.__connection.execute(
+                f"SELECT seed FROM runs{where} ORDER BY id", parameters
+            )
+        ]
+
+    def top_seeds(
+        self, winner: str, limit: int = 10, config: Optional[dict] = None
+    ) -> List[Tuple[str, int]]:
+        """
+        Get the seeds a species wins by the largest margins.
+
+        :param winner: The name of the winning species.
+        :type winner: str
+        :param limit: The maximum number of seeds.
+        :type limit: int
+        :param config: The configuration of the runs, defaults to every one.
+        :type config: Optional[dict]
+        :return: The seeds and their margins, largest first.
+        :rtype: List[Tuple[str, int]]
+        """
+        where, parameters = self.__filter(config, "winner = ?", winner)
+        return self.__connection.execute(
+            f"SELECT seed, margin FROM runs{where} ORDER BY margin DESC, id LIMIT ?",
+            (*parameters, limit),
+        ).fetchall()
+
+    def wins(self, config: Optional[dict] = None) -> Dict[Optional[str], int]:
+        """
+        Count the runs won by every species.
+
+        :param config: The configuration of the runs, defaults to every one.
+        :type config: Optional[dict]
+        :return: The number of runs per winner, None for the ties.
+        :rtype: Dict[Optional[str], int]
+        """
+        where, parameters = self.__filter(config)
+        return dict(
+            self.__connection.execute(
+                f"SELECT winner, COUNT(*) FROM runs{where} GROUP BY winner",
+                parameters,
+            ).fetchall()
+        )
+
+    def extinctions(
+        self, before: int, config: Optional[dict] = None
+    ) -> List[Tuple[str, int]]:
+        """
+        Get the seeds where a species went extinct before a round.
+
+        :param before: The round, excluded.
+        :type before: int
+        :param config: The configuration of the runs, defaults to every one.
+        :type config: Optional[dict]
+        :return: The seeds and their extinction rounds, earliest first.
+        :rtype: List[Tuple[str, int]]
+        """
+        where, parameters = self.__filter(config, "extinction_round < ?", before)
+        return self.__connection.execute(
+            f"SELECT seed, extinction_round FROM runs{where} "
+            "ORDER BY extinction_round, id",
+            parameters,
+        ).fetchall()
+
+    def population_curves(
+        self, species: Optional[str] = None, config: Optional[dict] = None
+    ) -> np.ndarray:
+        """
+        Stack the population series of the stored runs.
+
+        Runs shorter than the longest one are padded with NaN.
+
+        :param species: The name of the species, defaults to all the ants.
+        :type species: Optional[str]
+        :param config: The configuration of the runs, defaults to every one.
+        :type config: Optional[dict]
+        :return: The living ants of every run after every round, runs × rounds.
+        :rtype: numpy.ndarray
+        """
+        where, parameters = self.__filter(config)
+        rows = self.__connection.execute(
+            f"SELECT species, rounds, populations FROM runs{where} ORDER BY id",
+            parameters,
+        ).fetchall()
+        curves = np.full((len(rows), max((row[1] for row in rows), default=0)), np.nan)
+        for position, (names, rounds, blob) in enumerate(rows):
+            names = json.loads(names)
+            populations = np.frombuffer(blob, dtype="<i4").reshape(rounds, len(names))
+            if species is None:
+                curves[position, :rounds] = populations.sum(axis=1)
+            elif species in names:
+                curves[position, :rounds] = populations[:, names.index(species)]
+        return curves
+
+    def percentiles(
+        self,
+        percentiles: Sequence[float] = (5, 50, 95),
+        species: Optional[str] = None,
+        config: Optional[dict] = None,
+    ) -> np.ndarray:
+        """
+        Get percentiles of the population after every round across the runs.
+
+        :param percentiles: The percentiles, between 0 and 100.
+        :type percentiles: Sequence[float]
+        :param species: The name of the species, defaults to all the ants.
+        :type species: Optional[str]
+        :param config: The configuration of the runs, defaults to every one.
+        :type config: Optional[dict]
+        :return: The percentiles after every round, percentiles × rounds.
+        :rtype: numpy.ndarray
+        """
+        curves = self.population_curves(species, config)
+        if curves.size == 0:
+            return np.empty((len(percentiles), curves.shape[1]))
+        return np.nanpercentile(curves, percentiles, axis=0)
+
+    def close(self) -> None:
+        """Close the database."""
+        self.__connection.close()
+
+    @staticmethod
+    def __filter(
+        config: Optional[dict], condition: Optional[str] = None, *values
+    ) -> Tuple[str, tuple]:
+        """Build the WHERE clause of a configuration and an extra condition."""
+        conditions: List[str] = []
+        parameters: list = []
+        if config is not None:
+            conditions.append("config_hash = ?")
+            parameters.append(config_hash(config))
+        if condition is not None:
+            conditions.append(condition)
+            parameters.extend(values)
+        if not conditions:
+            return "", ()
+        return " WHERE " + " AND ".join(conditions), tuple(parameters)
@@ -0,0 +1,261 @@
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Union
+
+from universe.config import SimulationConfig
+from universe.engine import create_universe, play_round, spawn
+from universe.events import EventSink
+from universe.results import RunResult
+from universe.tick import TwoPhaseTick
+
+if TYPE_CHECKING:
+    from multiprocessing.synchronize import Event
+
+# A predicate takes the round just played and the living ants of every species,
+# it returns True once satisfied, False once impossible and None while undecided
+Predicate = Callable[[int, Dict[str, int]], Optional[bool]]
+
+# Set in the worker processes when the search has found its matches
+_CANCEL: Optional["Event"] = None
+# Marks the end of the candidate seeds
+_EXHAUSTED = object()
+
+
+class Extinction:
+    """
+    Predicate satisfied when a species has no ant left before a round.
+
+    :var species: The name of the species.
+    :type species: str
+    :var before: The round before which the species must be extinct.
+    :type before: int
+    """
+
+    def __init__(self, species: str, before: int):
+        """
+        Initialize the predicate.
+
+        :param species: The name of the species.
+        :type species: str
+        :param before: The round before which the species must be extinct.
+        :type before: int
+        """
+        self.species = species
+        self.before = before
+
+    def __call__(
+        self, current_round: int, populations: Dict[str, int]
+    ) -> Optional[bool]:
+        if populations[self.species] == 0 and current_round < self.before:
+            return True
+        if current_round + 1 >= self.before:
+            return False
+        return None
+
+
+class PopulationAbove:
+    """
+    Predicate satisfied when the living ants exceed a count.
+
+    :var count: The count to exceed.
+    :type count: int
+    :var species: The name of the species, all the ants if None.
+    :type species: Optional[str]
+    :var before: The round before which the count must be exceeded, the end of
+        the run if None.
+    :type before: Optional[int]
+    """
+
+    def __init__(
+        self, count: int, species: Optional[str] = None, before: Optional[int] = None
+    ):
+        """
+        Initialize the predicate.
+
+        :param count: The count to exceed.
+        :type count: int
+        :param species: The name of the species, defaults to all the ants.
+        :type species: Optional[str]
+        :param before: The round before which the count must be exceeded.
+        :type before: Optional[int]
+        """
+        self.count = count
+        self.species = species
+        self.before = before
+
+    def __call__(
+        self, current_round: int, populations: Dict[str, int]
+    ) -> Optional[bool]:
+        if self.species is None:
+            living = sum(populations.values())
+        else:
+            living = populations[self.species]
+        if living > self.count and (self.before is None or current_round < self.before):
+            return True
+        if self.before is not None and current_round + 1 >= self.before:
+            return False
+        return None
+
+
+class SeedResult:
+    """
+    Class representing the outcome of a predicate for a seed.
+
+    :var seed: The seed.
+    :type seed: str
+    :var matched: Whether the predicate was satisfied.
+    :type matched: bool
+    :var round: The round the predicate was decided, the last round if it was
+        still undecided at the end of the run.
+    :type round: int
+    """
+
+    def __init__(self, seed: str, matched: bool, current_round: int):
+        """
+        Initialize the outcome.
+
+        :param seed: The seed.
+        :type seed: str
+        :param matched: Whether the predicate was satisfied.
+        :type matched: bool
+        :param current_round: The round the predicate was decided.
+        :type current_round: int
+        """
+        self.seed = seed
+        self.matched = matched
+        self.round = current_round
+
+    def __repr__(self) -> str:
+        return f"SeedResult({self.seed!r}, {self.matched}, {self.round})"
+
+
+def evaluate_seed(
+    config: Union[SimulationConfig, dict], seed, predicate: Predicate
+) -> Optional[SeedResult]:
+    """
+    Play the rounds of a seed until a predicate is decided.
+
+    The rounds are played without an update callback, the updates are dropped.
+
+    :param config: The configuration of the simulation, without its seed.
+    :type config: Union[SimulationConfig, dict]
+    :param seed: The seed.
+    :type seed: Any
+    :param predicate: The predicate.
+    :type predicate: Predicate
+    :return: The outcome, None if the search was cancelled.
+    :rtype: Optional[SeedResult]
+    """
+    config = SimulationConfig.coerce(config).copy(seed=seed)
+    universe = create_universe(config)
+    events = EventSink()
+    spawn(universe, events, config)
+    events.drain()
+    # Decisions are made in this process, the search already runs in parallel
+    two_phase = TwoPhaseTick() if config.two_phase is not None else None
+    result = RunResult(seed, config, [species.name for species in universe.species])
+
+    rounds = config.rounds
+    for current_round in range(1, rounds + 1):
+        if _CANCEL is not None and _CANCEL.is_set():
+            return None
+        play_round(universe, events, two_phase)
+        events.drain()
+        populations = dict(zip(result.species, result.observe(universe)))
+        decision = predicate(current_round, populations)
+        if decision is not None:
+            return SeedResult(str(seed), decision, current_round)
+    return SeedResult(str(seed), False, rounds)
+
+
+def search_seeds(
+    config: Union[SimulationConfig, dict],
+    seeds: Iterable,
+    predicate: Predicate,
+    matches: int = 1,
+    workers: int = 0,
+) -> List[SeedResult]:
+    """
+    Find the first seeds whose run satisfies a predicate.
+
+    Every run stops as soon as its predicate is decided. With workers, the
+    seeds are played in a pool of processes and the search stops them all once
+    the seeds before the last wanted match are decided. The result is the same
+    as without workers.
+
+    :param config: The configuration of the simulation, without its seed.
+    :type config: Union[SimulationConfig, dict]
+    :param seeds: The candidate seeds, in order.
+    :type seeds: Iterable
+    :param predicate: The predicate, picklable when there are workers.
+    :type predicate: Predicate
+    :param matches: The number of matching seeds to find.
+    :type matches: int
+    :param workers: The number of worker processes, in this process below two.
+    :type workers: int
+    :return: The matching seeds, in the order of the candidates.
+    :rtype: List[SeedResult]
+    :raises ValueError: If the configuration is invalid.
+    """
+    config = SimulationConfig.coerce(config)
+    if workers < 2:
+        found: List[SeedResult] = []
+        for seed in seeds:
+            result = evaluate_seed(config, seed, predicate)
+            if result.matched:
+                found.append(result)
+                if len(found) == matches:
+                    break
+        return found
+
+    context = multiprocessing.get_context("spawn")
+    cancel = context.Event()
+    candidates = iter(seeds)
+    pending: Dict[Future, int] = {}
+    decided: Dict[int, SeedResult] = {}
+    submitted = 0
+    with ProcessPoolExecutor(
+        workers, mp_context=context, initializer=_start_worker, initargs=(cancel,)
+    ) as executor:
+        while True:
+            # Keep every worker busy, without submitting the whole search
+            while len(pending) < 2 * workers:
+                seed = next(candidates, _EXHAUSTED)
+                if seed is _EXHAUSTED:
+                    break
+                future = executor.submit(evaluate_seed, config, seed, predicate)
+                pending[future] = submitted
+                submitted += 1
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                decided[pending.pop(future)] = future.result()
+            found = _prefix_matches(decided, matches)
+            if found is not None:
+                cancel.set()
+                for future in pending:
+                    future.cancel()
+                return found
+    return [decided[index] for index in sorted(decided) if decided[index].matched]
+
+
+def _start_worker(cancel: "Event") -> None:
+    """Keep the cancellation event of the search in a worker process."""
+    global _CANCEL
+    _CANCEL = cancel
+
+
+def _prefix_matches(
+    decided: Dict[int, SeedResult], matches: int
+) -> Optional[List[SeedResult]]:
+    """Return the wanted matches once every seed before them is decided."""
+    found: List[SeedResult] = []
+    index = 0
+    while index in decided:
+        if decided[index].matched:
+            found.append(decided[index])
+            if len(found) == matches:
+                return found
+        index += 1
+    return None
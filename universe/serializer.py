@@ -0,0 +1,213 @@
+import json
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Optional
+
+from universe.ants.ant import Ant, Role
+from universe.map.object import Object, ObjectType
+from universe.map.position import Direction, Position
+from universe.update import Update, UpdateType
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the standard library is the fallback
+    orjson = None
+
+if TYPE_CHECKING:
+    from universe.ants.species import Species
+
+
+class Serializer:
+    """
+    Class encoding updates into the JSON messages of the websocket protocol.
+
+    Ants, objects and positions are written from precomputed fragments of their
+    enum names and angles instead of building a dictionary per update, other
+    targets and states go through the JSON encoder. The default output is byte
+    for byte the one of ``json.dumps(update.to_dict())``. The compact output
+    drops the spaces after separators and uses orjson when it is installed.
+
+    :var compact: Whether the output is compact.
+    :type compact: bool
+    """
+
+    def __init__(self, compact: bool = False):
+        """
+        Initialize the serializer and its fragments.
+
+        :param compact: Whether the output is compact, defaults to False.
+        :type compact: bool
+        """
+        self.compact = compact
+        item, key = (",", ":") if compact else (", ", ": ")
+        self.__dumps: Callable[[Any], str] = (
+            (lambda value: orjson.dumps(value).decode())
+            if compact and orjson is not None
+            else json.JSONEncoder(separators=(item, key)).encode
+        )
+        self.__item = item
+        self.__types = {
+            update_type: f'{{"type"{key}"{update_type.name}"{item}"ant"{key}'
+            for update_type in UpdateType
+        }
+        self.__target = f'{item}"target"{key}'
+        self.__state = f'{item}"state"{key}'
+        self.__roles = {
+            role: f'{item}"role"{key}"{role.name}"{item}"color"{key}' for role in Role
+        }
+        self.__colors: Dict[str, str] = {}
+        self.__angles = {
+            direction: f'{item}"direction"{key}{direction.to_angle()}}}'
+            for direction in Direction
+        }
+        self.__object_types = {
+            object_type: f'{item}"type"{key}"{object_type.name}"}}'
+            for object_type in ObjectType
+        }
+        self.__alive = {
+            True: f'{item}"alive"{key}true}}',
+            False: f'{item}"alive"{key}false}}',
+        }
+        self.__x = f'{{"x"{key}'
+        self.__y = f'{item}"y"{key}'
+        self.__id = f'{{"id"{key}'
+        self.__health = f'{item}"health"{key}'
+        self.__damage = f'{item}"damage"{key}'
+        self.__speed = f'{item}"speed"{key}'
+        self.__position = f'{item}"position"{key}'
+        self.__object = f'{{"position"{key}'
+
+    def update(
+        self,
+        update_type: UpdateType,
+        ant: Optional[Ant] = None,
+        target: Optional[Any] = None,
+        state: Optional[Any] = None,
+    ) -> str:
+        """
+        Encode an update.
+
+        :param update_type: The type of the update.
+        :type update_type: UpdateType
+        :param ant: The ant involved in the update.
+        :type ant: Optional[Ant]
+        :param target: The target of the update.
+        :type target: Optional[Any]
+        :param state: The state of the update.
+        :type state: Optional[Any]
+        :return: The JSON message.
+        :rtype: str
+        """
+        return (
+            f"{self.__types[update_type]}{self.ant(ant) if ant else 'null'}"
+            f"{self.__target}{self.__value(target) if target else 'null'}"
+            f"{self.__state}{self.__scalar(state)}}}"
+        )
+
+    def ant(self, ant: Ant) -> str:
+        """
+        Encode an ant.
+
+        :param ant: The ant.
+        :type ant: Ant
+        :return: The JSON object of the ant.
+        :rtype: str
+        """
+        return (
+            f"{self.__id}{ant.id}{self.__roles[ant.role]}{self.__color(ant.species)}"
+            f"{self.__health}{self.__number(ant.health)}"
+            f"{self.__damage}{self.__number(ant.damage)}"
+            f"{self.__speed}{self.__number(ant.speed)}"
+            f"{self.__position}{self.position(ant.position)}{self.__alive[ant.alive]}"
+        )
+
+    def position(self, position: Position) -> str:
+        """
+        Encode a position.
+
+        :param position: The position.
+        :type position: Position
+        :return: The JSON object of the position.
+        :rtype: str
+        """
+        return (
+            f"{self.__x}{position.x}{self.__y}{position.y}"
+            f"{self.__angles[position.direction]}"
+        )
+
+    def batch(self, current_round: int, timestamp: float, events: Iterable[str]) -> str:
+        """
+        Encode a ``SIMULATION_BATCH`` message from encoded updates.
+
+        :param current_round: The round of the batch.
+        :type current_round: int
+        :param timestamp: The monotonic time of the batch, in seconds.
+        :type timestamp: float
+        :param events: The encoded updates of the batch.
+        :type events: Iterable[str]
+        :return: The JSON message.
+        :rtype: str
+        """
+        state = self.__dumps(
+            {"round": current_round, "timestamp": timestamp, "events": []}
+        )
+        return "".join(
+            (
+                self.__types[UpdateType.SIMULATION_BATCH],
+                "null",
+                self.__target,
+                "null",
+                self.__state,
+                state[:-2],
+                self.__item.join(events),
+                "]}}",
+            )
+        )
+
+    def __value(self, value: Any) -> str:
+        """Encode a target, or any object with a ``to_dict`` method."""
+        if isinstance(value, Ant):
+            return self.ant(value)
+        if type(value) is Object:
+            return (
+                f"{self.__object}{self.position(value.position)}"
+                f"{self.__object_types[value.object_type]}"
+            )
+        return self.__dumps(value.to_dict())
+
+    def __scalar(self, value: Any) -> str:
+        """Encode a state, the common integer and null states directly."""
+        if value is None:
+            return "null"
+        if type(value) is int:
+            return str(value)
+        return self.__dumps(value)
+
+    def __number(self, value: Any) -> str:
+        """Encode a number, floats through the encoder for its special values."""
+        return str(value) if type(value) is int else self.__dumps(value)
+
+    def __color(self, species: "Species") -> str:
+        """Encode the color of a species, once per color."""
+        try:
+            return self.__colors[species.color]
+        except KeyError:
+            fragment = self.__dumps(species.color)
+            self.__colors[species.color] = fragment
+            return fragment
+
+
+# The serializer of the default, byte-compatible protocol
+DEFAULT_SERIALIZER = Serializer()
+
+
+def encode_update(update: Update, serializer: Serializer = DEFAULT_SERIALIZER) -> str:
+    """
+    Encode an update, the equivalent of ``json.dumps(update.to_dict())``.
+
+    :param update: The update.
+    :type update: Update
+    :param serializer: The serializer, defaults to the byte-compatible one.
+    :type serializer: Serializer
+    :return: The JSON message.
+    :rtype: str
+    """
+    return serializer.update(update.type, update.ant, update.target, update.state)
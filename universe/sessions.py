@@ -0,0 +1,285 @@
+import asyncio
+import enum
+import itertools
+import os
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Union
+
+from universe.config import SimulationConfig
+from universe.worker import Message, SimulationWorker, join_messages
+
+# The largest boundary accepted along each axis
+MAX_BOUNDARY_SIZE = 4000
+
+
+def estimate_cost(config: Union[SimulationConfig, dict]) -> int:
+    """
+    Estimate the cost of a simulation as area × rounds × expected ants.
+
+    The population is bounded by the ``max_ants`` key, which is used as the
+    expected number of ants. The configuration keeps the initial ants, nests and
+    objects within the limits, so they add nothing to the estimate.
+
+    :param config: The configuration of the simulation.
+    :type config: Union[SimulationConfig, dict]
+    :return: The estimated cost.
+    :rtype: int
+    :raises ValueError: If the configuration is invalid.
+    """
+    config = SimulationConfig.coerce(config)
+    return config.width * config.height * config.rounds * config.max_ants
+
+
+# The most expensive simulation accepted, a 1000x1000 board for 10000 rounds
+MAX_SESSION_COST = estimate_cost(
+    {"boundary": {"width": 1000, "height": 1000}, "rounds": 10000}
+)
+
+
+class SessionState(enum.Enum):
+    """Enum class for session states."""
+
+    QUEUED = 0
+    RUNNING = 1
+    FINISHED = 2
+
+
+class Session:
+    """
+    Class representing a simulation requested by a client.
+
+    :var id: The id of the session.
+    :type id: int
+    :var config: The configuration of the simulation.
+    :type config: SimulationConfig
+    :var cost: The estimated cost of the simulation.
+    :type cost: int
+    :var state: The state of the session.
+    :type state: SessionState
+    :var worker: The worker running the simulation, None while queued.
+    :type worker: Optional[SimulationWorker]
+    :var cancelled: Whether the client stopped the simulation.
+    :type cancelled: bool
+    """
+
+    def __init__(
+        self,
+        session_id: int,
+        config: Union[SimulationConfig, dict],
+        send: Callable[[Message], Awaitable],
+    ):
+        """
+        Initialize a queued session.
+
+        :param session_id: The id of the session.
+        :type session_id: int
+        :param config: The configuration of the simulation, it is copied.
+        :type config: Union[SimulationConfig, dict]
+        :param send: The coroutine function sending a message to the client.
+        :type send: Callable[[Message], Awaitable]
+        :raises ValueError: If the configuration is invalid.
+        """
+        self.id = session_id
+        self.config = SimulationConfig.coerce(config).copy()
+        self.cost = estimate_cost(self.config)
+        self.send = send
+        self.state = SessionState.QUEUED
+        self.worker: Optional[SimulationWorker] = None
+        self.cancelled = False
+
+    @property
+    def active(self) -> bool:
+        """Return True if the session is queued or running."""
+        return self.state is not SessionState.FINISHED and not self.cancelled
+
+    def control(self, **changes) -> None:
+        """
+        Change the configuration of the simulation.
+
+        :param changes: The configuration keys to change.
+        :raises ValueError: If a key is unknown or a value is invalid.
+        """
+        self.config.update(changes)
+        if self.worker is not None:
+            self.worker.control(**changes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the session to a dictionary for the status command.
+
+        :return: The dictionary representation of the session.
+        :rtype: Dict[str, Any]
+        """
+        return {
+            "id": self.id,
+            "state": self.state.name,
+            "round": self.worker.round if self.worker else 0,
+            "rounds": self.config.rounds,
+            "tps": self.worker.tps if self.worker else 0,
+            "width": self.config.width,
+            "height": self.config.height,
+            "cost": self.cost,
+        }
+
+
+class SessionManager:
+    """
+    Class admitting the simulations of every client of the server.
+
+    At most ``max_running`` sessions run at once and the sum of their estimated
+    costs stays within ``cost_budget``. Other sessions wait in a first in, first
+    out queue, so a huge request waits for room instead of starving the host, and
+    requests costing more than ``max_session_cost`` are rejected.
+
+    :var max_running: The maximum number of running sessions.
+    :type max_running: int
+    :var cost_budget: The maximum total cost of the running sessions.
+    :type cost_budget: int
+    :var max_session_cost: The maximum cost of a single session.
+    :type max_session_cost: int
+    :var sessions: The queued and running sessions, by id.
+    :type sessions: Dict[int, Session]
+    """
+
+    def __init__(
+        self,
+        max_running: Optional[int] = None,
+        cost_budget: Optional[int] = None,
+        max_session_cost: int = MAX_SESSION_COST,
+    ):
+        """
+        Initialize the session manager.
+
+        :param max_running: The maximum number of running sessions, defaults to
+            the number of CPUs.
+        :type max_running: Optional[int]
+        :param cost_budget: The maximum total cost of the running sessions,
+            defaults to twice the maximum cost of a session.
+        :type cost_budget: Optional[int]
+        :param max_session_cost: The maximum cost of a single session.
+        :type max_session_cost: int
+        """
+        self.max_running = max_running or os.cpu_count() or 1
+        self.max_session_cost = max_session_cost
+        self.cost_budget = max(
+            cost_budget if cost_budget is not None else 2 * max_session_cost,
+            max_session_cost,
+        )
+        self.sessions: Dict[int, Session] = {}
+        self.__queue: Deque[Session] = deque()
+        self.__ids = itertools.count(1)
+
+    def running(self) -> List[Session]:
+        """
+        Get the running sessions.
+
+        :return: The running sessions.
+        :rtype: List[Session]
+        """
+        return [
+            session
+            for session in self.sessions.values()
+            if session.state is SessionState.RUNNING
+        ]
+
+    def position(self, session: Session) -> int:
+        """
+        Get the position of a session in the queue.
+
+        :param session: The session.
+        :type session: Session
+        :return: The number of sessions before it, -1 if it is not queued.
+        :rtype: int
+        """
+        try:
+            return self.__queue.index(session)
+        except ValueError:
+            return -1
+
+    def submit(
+        self,
+        config: Union[SimulationConfig, dict],
+        send: Callable[[Message], Awaitable],
+    ) -> Session:
+        """
+        Submit a simulation, it starts as soon as there is room for it.
+
+        :param config: The configuration of the simulation.
+        :type config: Union[SimulationConfig, dict]
+        :param send: The coroutine function sending a message to the client.
+        :type send: Callable[[Message], Awaitable]
+        :return: The session of the simulation.
+        :rtype: Session
+        :raises ValueError: If the configuration is invalid or the simulation
+            costs more than a session may.
+        """
+        session = Session(next(self.__ids), config, send)
+        if session.cost > self.max_session_cost:
+            raise ValueError("The simulation is too costly")
+        self.sessions[session.id] = session
+        self.__queue.append(session)
+        self.__admit()
+        return session
+
+    def stop(self, session: Session) -> None:
+        """
+        Stop a session, its remaining messages are not sent anymore.
+
+        :param session: The session.
+        :type session: Session
+        """
+        session.cancelled = True
+        if session.worker is not None:
+            session.worker.stop()
+        elif session in self.__queue:
+            self.__queue.remove(session)
+            session.state = SessionState.FINISHED
+            del self.sessions[session.id]
+            self.__admit()
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Get the status of the sessions.
+
+        :return: The limits and every queued or running session.
+        :rtype: Dict[str, Any]
+        """
+        running = self.running()
+        return {
+            "running": len(running),
+            "queued": len(self.__queue),
+            "max_running": self.max_running,
+            "cost": sum(session.cost for session in running),
+            "cost_budget": self.cost_budget,
+            "sessions": [session.to_dict() for session in self.sessions.values()],
+        }
+
+    def __admit(self) -> None:
+        """Start the queued sessions in order while they fit in the limits."""
+        while self.__queue:
+            running = self.running()
+            session = self.__queue[0]
+            if len(running) >= self.max_running or (
+                sum(other.cost for other in running) + session.cost > self.cost_budget
+            ):
+                return
+            self.__queue.popleft()
+            session.state = SessionState.RUNNING
+            session.worker = SimulationWorker(session.config)
+            session.worker.start()
+            asyncio.create_task(self.__forward(session))
+
+    async def __forward(self, session: Session) -> None:
+        """Send the batches of a running session until it is over."""
+        try:
+            async for messages in session.worker.batches():
+                if session.cancelled:
+                    continue
+                if session.config.batch_messages:
+                    messages = join_messages(session.worker.round, messages)
+                for message in messages:
+                    await session.send(message)
+        finally:
+            session.state = SessionState.FINISHED
+            self.sessions.pop(session.id, None)
+            self.__admit()
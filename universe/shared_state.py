@@ -0,0 +1,344 @@
+import multiprocessing
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Iterator,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from universe.universe import Universe
+
+STATE_MAGIC = b"MOAS"
+STATE_VERSION = 1
+# magic, version, generation, round, ants, living, capacity, x, y, width, height
+STATE_HEADER = struct.Struct("<4sIQQIIIiiII")
+# Generation counter, then round, ants and living ants, at their header offsets
+GENERATION = struct.Struct("<Q")
+GENERATION_OFFSET = 8
+COUNTS = struct.Struct("<QII")
+COUNTS_OFFSET = 16
+# id, x, y, health, food, species index, role, direction
+ANT_RECORD = struct.Struct("<qiiiiBBBx")
+
+# The blocks created by this process, which its resource tracker removes
+_OWNED_BLOCKS: Set[str] = set()
+
+T = TypeVar("T")
+
+
+class StateSnapshot:
+    """
+    Class representing a consistent state of the shared world.
+
+    The state is a copy, or views into the shared memory block during a
+    :meth:`SharedStateReader.read`.
+
+    :var generation: The generation of the copy, even and growing with every
+        publication.
+    :type generation: int
+    :var round: The round of the copy, 0 after the initial spawn.
+    :type round: int
+    :var living: The number of living ants, which may exceed the records.
+    :type living: int
+    :var boundary: The x, y, width and height of the boundary.
+    :type boundary: Tuple[int, int, int, int]
+    :var ant_records: The packed :data:`ANT_RECORD` records of the ants.
+    :type ant_records: Union[bytes, memoryview]
+    :var object_types: The object type code of each cell, in the layout of
+        :attr:`ObjectGrid.types`.
+    :type object_types: Union[bytes, memoryview]
+    """
+
+    def __init__(
+        self,
+        generation: int,
+        current_round: int,
+        living: int,
+        boundary: Tuple[int, int, int, int],
+        ant_records: Union[bytes, memoryview],
+        object_types: Union[bytes, memoryview],
+    ):
+        """
+        Initialize the snapshot.
+
+        :param generation: The generation of the copy.
+        :type generation: int
+        :param current_round: The round of the copy.
+        :type current_round: int
+        :param living: The number of living ants.
+        :type living: int
+        :param boundary: The x, y, width and height of the boundary.
+        :type boundary: Tuple[int, int, int, int]
+        :param ant_records: The packed records of the ants.
+        :type ant_records: Union[bytes, memoryview]
+        :param object_types: The object type code of each cell.
+        :type object_types: Union[bytes, memoryview]
+        """
+        self.generation = generation
+        self.round = current_round
+        self.living = living
+        self.boundary = boundary
+        self.ant_records = ant_records
+        self.object_types = object_types
+
+    def ants(self) -> Iterator[Tuple[int, int, int, int, int, int, int, int]]:
+        """
+        Iterate over the ant records.
+
+        :return: The id, x, y, health, food, species index, role value and
+            direction angle divided by 90 of every ant.
+        :rtype: Iterator[Tuple[int, int, int, int, int, int, int, int]]
+        """
+        return ANT_RECORD.iter_unpack(self.ant_records)
+
+    def copy(self) -> "StateSnapshot":
+        """
+        Copy the state out of the views into the shared memory block.
+
+        :return: The snapshot holding bytes.
+        :rtype: StateSnapshot
+        """
+        return StateSnapshot(
+            self.generation,
+            self.round,
+            self.living,
+            self.boundary,
+            bytes(self.ant_records),
+            bytes(self.object_types),
+        )
+
+
+class SharedState:
+    """
+    Class publishing the world state into a shared memory block.
+
+    The block starts with a :data:`STATE_HEADER`, followed by ``capacity`` ant
+    records of :data:`ANT_RECORD` and by one object type code per cell of the
+    boundary. The generation counter of the header is a sequence lock: it is odd
+    while the simulation writes, and a reader whose copy starts and ends on the
+    same even generation has a consistent state. Other processes attach with a
+    :class:`SharedStateReader` and never pickle the universe.
+
+    :var name: The name of the shared memory block.
+    :type name: str
+    :var capacity: The number of ant records, extra ants are left out.
+    :type capacity: int
+    """
+
+    def __init__(
+        self,
+        universe: "Universe",
+        capacity: Optional[int] = None,
+        name: Optional[str] = None,
+    ):
+        """
+        Create the shared memory block of a universe.
+
+        :param universe: The universe.
+        :type universe: Universe
+        :param capacity: The number of ant records, defaults to twice the maximum
+            number of ants.
+        :type capacity: Optional[int]
+        :param name: The name of the block, a free name is picked by default.
+        :type name: Optional[str]
+        """
+        boundary = universe.boundary
+        self.capacity = capacity if capacity is not None else 2 * universe.MAX_ANTS
+        self.__objects = STATE_HEADER.size + self.capacity * ANT_RECORD.size
+        self.__block = shared_memory.SharedMemory(
+            name=name, create=True, size=self.__objects + boundary.size()
+        )
+        self.name = self.__block.name
+        _OWNED_BLOCKS.add(self.name)
+        self.__generation = 0
+        STATE_HEADER.pack_into(
+            self.__block.buf,
+            0,
+            STATE_MAGIC,
+            STATE_VERSION,
+            0,
+            0,
+            0,
+            0,
+            self.capacity,
+            boundary.position_1.x,
+            boundary.position_1.y,
+            boundary.width,
+            boundary.height,
+        )
+
+    def publish(self, universe: "Universe", current_round: int) -> None:
+        """
+        Write the state of a universe after a tick.
+
+        :param universe: The universe.
+        :type universe: Universe
+        :param current_round: The round just played.
+        :type current_round: int
+        """
+        buffer = self.__block.buf
+        self.__set_generation(self.__generation + 1)
+
+        offset = STATE_HEADER.size
+        written = living = 0
+        for ant_row in universe.ants.values():
+            for ant in ant_row:
+                if not ant.alive:
+                    continue
+                living += 1
+                if written == self.capacity:
+                    continue
+                ANT_RECORD.pack_into(
+                    buffer,
+                    offset,
+                    ant.id,
+                    ant.position.x,
+                    ant.position.y,
+                    ant.health,
+                    ant.food,
+                    ant.species.index,
+                    ant.role.value,
+                    ant.position.direction.value // 90,
+                )
+                offset += ANT_RECORD.size
+                written += 1
+        buffer[self.__objects : self.__objects + len(universe.objects.types)] = (
+            universe.objects.types
+        )
+        COUNTS.pack_into(buffer, COUNTS_OFFSET, current_round, written, living)
+
+        self.__set_generation(self.__generation + 1)
+
+    def close(self) -> None:
+        """Release and remove the shared memory block."""
+        self.__block.close()
+        self.__block.unlink()
+        _OWNED_BLOCKS.discard(self.name)
+
+    def __set_generation(self, generation: int) -> None:
+        """Write the generation counter of the header."""
+        self.__generation = generation
+        GENERATION.pack_into(self.__block.buf, GENERATION_OFFSET, generation)
+
+
+class SharedStateReader:
+    """
+    Class reading the world state published by a :class:`SharedState`.
+
+    The reader only maps the block, the simulation keeps owning it and removes
+    it when the run ends. :meth:`snapshot` copies the whole state on every call,
+    :meth:`read` hands views into the block to a function instead, so a reader
+    looking at part of the state copies nothing.
+
+    :var name: The name of the shared memory block.
+    :type name: str
+    """
+
+    def __init__(self, name: str):
+        """
+        Attach to a shared memory block.
+
+        :param name: The name of the block.
+        :type name: str
+        :raises ValueError: If the block does not hold a world state.
+        """
+        if sys.version_info >= (3, 13):
+            self.__block = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            self.__block = shared_memory.SharedMemory(name=name)
+            if multiprocessing.parent_process() is None and name not in _OWNED_BLOCKS:
+                # The own resource tracker of an independent process would
+                # remove the block at exit, children share the one of the owner
+                # and the owner keeps its registration to remove the block
+                resource_tracker.unregister(self.__block._name, "shared_memory")
+        self.name = name
+        header = STATE_HEADER.unpack_from(self.__block.buf, 0)
+        if header[0] != STATE_MAGIC or header[1] != STATE_VERSION:
+            self.__block.close()
+            raise ValueError(f"Not a world state block: {name}")
+        self.__capacity = header[6]
+        self.__boundary = header[7:11]
+
+    @property
+    def generation(self) -> int:
+        """Return the current generation, odd while the simulation writes."""
+        return GENERATION.unpack_from(self.__block.buf, GENERATION_OFFSET)[0]
+
+    def snapshot(self, timeout: float = 1.0) -> StateSnapshot:
+        """
+        Copy a consistent state, retrying while the simulation writes.
+
+        :param timeout: The maximum time to retry, in seconds.
+        :type timeout: float
+        :return: The copy of the state.
+        :rtype: StateSnapshot
+        :raises TimeoutError: If no consistent copy was made in time.
+        """
+        return self.read(StateSnapshot.copy, timeout)
+
+    def read(self, function: Callable[[StateSnapshot], T], timeout: float = 1.0) -> T:
+        """
+        Run a function on a consistent state without copying it.
+
+        The function gets a snapshot of memoryviews into the block, which are
+        released when it returns, so its result must not keep them. The
+        generation is checked again after the call, and the function is called
+        again if the simulation wrote meanwhile, so it must not have side
+        effects.
+
+        :param function: The function reading the state.
+        :type function: Callable[[StateSnapshot], T]
+        :param timeout: The maximum time to retry, in seconds.
+        :type timeout: float
+        :return: The result of the function on a consistent state.
+        :rtype: T
+        :raises TimeoutError: If no consistent state was read in time.
+        """
+        buffer = self.__block.buf
+        objects = STATE_HEADER.size + self.__capacity * ANT_RECORD.size
+        size = self.__boundary[2] * self.__boundary[3]
+        deadline = time.monotonic() + timeout
+        while True:
+            generation = self.generation
+            if generation % 2 == 0:
+                header = STATE_HEADER.unpack_from(buffer, 0)
+                end = STATE_HEADER.size + header[4] * ANT_RECORD.size
+                ant_records = buffer[STATE_HEADER.size : end]
+                object_types = buffer[objects : objects + size]
+                try:
+                    result = function(
+                        StateSnapshot(
+                            generation,
+                            header[3],
+                            header[5],
+                            self.__boundary,
+                            ant_records,
+                            object_types,
+                        )
+                    )
+                except Exception:
+                    # A torn state may fail the function, a consistent one not
+                    if self.generation == generation:
+                        raise
+                else:
+                    if self.generation == generation:
+                        return result
+                finally:
+                    ant_records.release()
+                    object_types.release()
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"No consistent state in {self.name}")
+            time.sleep(0)
+
+    def close(self) -> None:
+        """Detach from the shared memory block."""
+        self.__block.close()
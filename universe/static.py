@@ -0,0 +1,148 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from http import HTTPStatus
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, gzip is always available
+    brotli = None
+
+# The files of the frontend, nothing else of the working directory is served
+STATIC_FILES = (
+    "index.html",
+    "universe.html",
+    "universe.js",
+    "universe.css",
+    "picker.js",
+    "picker.css",
+    "old.html",
+)
+
+Response = Tuple[HTTPStatus, List[Tuple[str, str]], bytes]
+
+
+class StaticFile:
+    """
+    Class representing a frontend file held in memory.
+
+    :var content_type: The media type of the file.
+    :type content_type: str
+    :var etag: The entity tag of the file, a hash of its content.
+    :type etag: str
+    :var cache_control: The caching policy, pages are always revalidated.
+    :type cache_control: str
+    :var bodies: The content of the file by content coding, "identity" for the
+        uncompressed content.
+    :type bodies: Dict[str, bytes]
+    """
+
+    def __init__(self, name: str, content: bytes):
+        """
+        Initialize the file and precompress its content.
+
+        :param name: The name of the file.
+        :type name: str
+        :param content: The content of the file.
+        :type content: bytes
+        """
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type.endswith("javascript"):
+            content_type += "; charset=utf-8"
+        self.content_type = content_type
+        self.etag = f'"{hashlib.sha1(content).hexdigest()[:20]}"'
+        self.cache_control = (
+            "no-cache" if name.endswith(".html") else "public, max-age=300"
+        )
+        self.bodies: Dict[str, bytes] = {"identity": content}
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) < len(content):
+            self.bodies["gzip"] = compressed
+        if brotli is not None:
+            compressed = brotli.compress(content)
+            if len(compressed) < len(content):
+                self.bodies["br"] = compressed
+
+    def response(self, request_headers) -> Response:
+        """
+        Build the response to a request of the file.
+
+        :param request_headers: The headers of the request.
+        :type request_headers: websockets.datastructures.Headers
+        :return: The status, the headers and the body of the response.
+        :rtype: Response
+        """
+        headers = [
+            ("Content-Type", self.content_type),
+            ("Cache-Control", self.cache_control),
+            ("ETag", self.etag),
+            ("Vary", "Accept-Encoding"),
+        ]
+        if_none_match = request_headers.get("If-None-Match", "")
+        if self.etag in (tag.strip() for tag in if_none_match.split(",")):
+            return HTTPStatus.NOT_MODIFIED, headers, b""
+        accepted = {
+            coding.split(";")[0].strip()
+            for coding in request_headers.get("Accept-Encoding", "").split(",")
+        }
+        for coding in ("br", "gzip"):
+            if coding in accepted and coding in self.bodies:
+                headers.append(("Content-Encoding", coding))
+                return HTTPStatus.OK, headers, self.bodies[coding]
+        return HTTPStatus.OK, headers, self.bodies["identity"]
+
+
+class StaticFiles:
+    """
+    Class serving the frontend from memory on a websockets server.
+
+    Every file is read and compressed once, so a page load only costs a
+    dictionary lookup, and unchanged files are revalidated with their ETag.
+
+    :var files: The served files by path.
+    :type files: Dict[str, StaticFile]
+    """
+
+    def __init__(
+        self, root: str, names: Iterable[str] = STATIC_FILES, index: str = "index.html"
+    ):
+        """
+        Load the files of the frontend.
+
+        :param root: The directory of the files.
+        :type root: str
+        :param names: The names of the files to serve, missing ones are skipped.
+        :type names: Iterable[str]
+        :param index: The file served for the root path.
+        :type index: str
+        """
+        self.files: Dict[str, StaticFile] = {}
+        for name in names:
+            path = os.path.join(root, name)
+            if os.path.isfile(path):
+                with open(path, "rb") as file:
+                    self.files[f"/{name}"] = StaticFile(name, file.read())
+        if f"/{index}" in self.files:
+            self.files["/"] = self.files[f"/{index}"]
+
+    def process_request(self, path: str, request_headers) -> Response:
+        """
+        Answer an HTTP request, used as the process_request hook of the server.
+
+        :param path: The path of the request, with its query string.
+        :type path: str
+        :param request_headers: The headers of the request.
+        :type request_headers: websockets.datastructures.Headers
+        :return: The status, the headers and the body of the response.
+        :rtype: Response
+        """
+        static_file = self.files.get(path.split("?", 1)[0])
+        if static_file is None:
+            return (
+                HTTPStatus.NOT_FOUND,
+                [("Content-Type", "text/plain; charset=utf-8")],
+                b"Not found\n",
+            )
+        return static_file.response(request_headers)
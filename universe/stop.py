@@ -0,0 +1,107 @@
+import statistics
+from collections import deque
+from typing import Deque, Optional, Sequence, Tuple
+
+# The reasons of an early end, sent as the state of SIMULATION_END
+EMPTY = "empty"
+EXTINCTION = "extinction"
+# A plateau of the populations, the ants may still move and eat
+STEADY = "steady"
+LOW_VARIANCE = "low_variance"
+
+
+class StopConditions:
+    """
+    Class deciding whether a simulation can end before its last round.
+
+    The conditions look at the living ants of every species after each round.
+    Each one is enabled by its parameter and the first one met gives the reason
+    of the end. They only see the population counts: the ``steady`` condition
+    is a population plateau, met while the ants keep moving and using up the
+    objects as long as the population of every species stays the same.
+
+    :var empty: Whether to stop when no ant is alive.
+    :type empty: bool
+    :var extinction: Whether to stop when a single species is left.
+    :type extinction: bool
+    :var steady_rounds: The number of rounds without any change of the
+        population of a species after which to stop, 0 to never stop.
+    :type steady_rounds: int
+    :var variance: The variance of the total population over the window below
+        which to stop, None to never stop.
+    :type variance: Optional[float]
+    :var window: The number of rounds of the variance.
+    :type window: int
+    """
+
+    def __init__(
+        self,
+        empty: bool = True,
+        extinction: bool = True,
+        steady_rounds: int = 0,
+        variance: Optional[float] = None,
+        window: int = 50,
+    ):
+        """
+        Initialize the conditions.
+
+        :param empty: Whether to stop when no ant is alive.
+        :type empty: bool
+        :param extinction: Whether to stop when a single species is left.
+        :type extinction: bool
+        :param steady_rounds: The number of rounds with unchanged populations
+            after which to stop.
+        :type steady_rounds: int
+        :param variance: The variance of the total population below which to stop.
+        :type variance: Optional[float]
+        :param window: The number of rounds of the variance.
+        :type window: int
+        :raises ValueError: If the window is shorter than two rounds.
+        """
+        if window < 2:
+            raise ValueError(f"Invalid variance window: {window}")
+        self.empty = empty
+        self.extinction = extinction
+        self.steady_rounds = steady_rounds
+        self.variance = variance
+        self.window = window
+        self.__last: Optional[Tuple[int, ...]] = None
+        self.__unchanged = 0
+        self.__totals: Deque[int] = deque(maxlen=window)
+
+    def check(self, populations: Sequence[int]) -> Optional[str]:
+        """
+        Check the conditions after a round.
+
+        :param populations: The living ants of every species.
+        :type populations: Sequence[int]
+        :return: The reason to stop, None to go on.
+        :rtype: Optional[str]
+        """
+        populations = tuple(populations)
+        total = sum(populations)
+        if self.empty and total == 0:
+            return EMPTY
+        if (
+            self.extinction
+            and len(populations) > 1
+            and sum(1 for count in populations if count) == 1
+        ):
+            return EXTINCTION
+
+        if populations == self.__last:
+            self.__unchanged += 1
+        else:
+            self.__last = populations
+            self.__unchanged = 0
+        if self.steady_rounds and self.__unchanged >= self.steady_rounds:
+            return STEADY
+
+        self.__totals.append(total)
+        if (
+            self.variance is not None
+            and len(self.__totals) == self.window
+            and statistics.pvariance(self.__totals) <= self.variance
+        ):
+            return LOW_VARIANCE
+        return None
@@ -0,0 +1,436 @@
+import random
+import sys
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing.shared_memory import SharedMemory
+
+    from universe.ants import Ant, Species
+    from universe.events import EventSink
+    from universe.map.boundary import Boundary
+    from universe.map.nest_field import NestField
+    from universe.map.object_grid import ObjectGrid
+    from universe.map.pheromone import PheromoneField
+    from universe.universe import Universe
+
+# The smallest population whose decisions are split across worker processes
+MIN_PARALLEL_ANTS = 200
+
+Occupants = Dict[Tuple[int, int], int]
+
+
+class Snapshot:
+    """
+    Class representing the universe as the ants see it at the start of a tick.
+
+    The snapshot holds what :meth:`Ant.decide_move` looks at, and knows the
+    species at every cell occupied by a living ant. Nothing changes it during the
+    sense phase, so it can be shared by every decision.
+
+    :var boundary: The boundary of the universe.
+    :type boundary: Boundary
+    :var objects: The grid of objects.
+    :type objects: ObjectGrid
+    :var nest_field: The field of the nearest nest.
+    :type nest_field: Optional[NestField]
+    :var pheromones: The scent layer, None when pheromones are disabled.
+    :type pheromones: Optional[PheromoneField]
+    :var occupants: The bit mask of the species indices at every occupied cell.
+    :type occupants: Dict[Tuple[int, int], int]
+    """
+
+    def __init__(
+        self,
+        boundary: "Boundary",
+        objects: "ObjectGrid",
+        nest_field: Optional["NestField"],
+        pheromones: Optional["PheromoneField"],
+        occupants: Occupants,
+    ):
+        """
+        Initialize a snapshot of layers.
+
+        :param boundary: The boundary of the universe.
+        :type boundary: Boundary
+        :param objects: The grid of objects.
+        :type objects: ObjectGrid
+        :param nest_field: The field of the nearest nest.
+        :type nest_field: Optional[NestField]
+        :param pheromones: The scent layer, None when pheromones are disabled.
+        :type pheromones: Optional[PheromoneField]
+        :param occupants: The bit mask of the species indices at every occupied
+            cell.
+        :type occupants: Dict[Tuple[int, int], int]
+        """
+        self.boundary = boundary
+        self.objects = objects
+        self.nest_field = nest_field
+        self.pheromones = pheromones
+        self.occupants = occupants
+
+    @classmethod
+    def take(cls, universe: "Universe", ants: List["Ant"]) -> "Snapshot":
+        """
+        Take the snapshot of a universe.
+
+        :param universe: The universe.
+        :type universe: Universe
+        :param ants: The living ants.
+        :type ants: List[Ant]
+        :return: The snapshot.
+        :rtype: Snapshot
+        """
+        return cls(
+            universe.boundary,
+            universe.objects,
+            universe.nest_field,
+            universe.pheromones,
+            occupants_of(ants),
+        )
+
+    def has_enemy(self, key: Tuple[int, int], species: "Species") -> bool:
+        """
+        Check whether a living ant of another species is at a cell.
+
+        :param key: The (x, y) coordinates of the cell.
+        :type key: Tuple[int, int]
+        :param species: The species of the looking ant.
+        :type species: Species
+        :return: True if an enemy is at the cell, False otherwise.
+        :rtype: bool
+        """
+        return bool(self.occupants.get(key, 0) & ~(1 << species.index))
+
+
+def sense(
+    snapshot: Snapshot, ants: List["Ant"], seed: int, offset: int = 0
+) -> List[Optional[dict]]:
+    """
+    Decide the moves of ants from a snapshot.
+
+    Every decision draws from its own generator, seeded by the tick and the rank
+    of the ant, so any split of the ants gives the same moves.
+
+    :param snapshot: The snapshot of the universe.
+    :type snapshot: Snapshot
+    :param ants: The ants, sorted by id.
+    :type ants: List[Ant]
+    :param seed: The seed of the tick.
+    :type seed: int
+    :param offset: The rank of the first ant among all the ants of the tick.
+    :type offset: int
+    :return: The move of every ant, None for an ant that cannot move.
+    :rtype: List[Optional[dict]]
+    """
+    return [
+        ant.decide_move(snapshot, random.Random(seed << 32 | offset + rank))
+        for rank, ant in enumerate(ants)
+    ]
+
+
+class SharedLayers:
+    """
+    Class sharing the layers read by the sense phase with the worker processes.
+
+    The layers are kept in shared memory blocks, so the tasks of the workers
+    only carry the occupants and the ants of a chunk. The steps of the nest
+    field never change and are written once, the object types and the pheromone
+    scents are copied into the blocks before every parallel sense phase. The
+    arguments of :func:`attach` stay small, since a spawned worker failing to
+    start never reads them.
+
+    :var initargs: The arguments of :func:`attach` in a worker process.
+    :type initargs: tuple
+    """
+
+    def __init__(self, universe: "Universe"):
+        """
+        Create the shared memory blocks of the layers of a universe.
+
+        :param universe: The universe, after the initial spawn.
+        :type universe: Universe
+        """
+        from multiprocessing import shared_memory
+
+        area = len(universe.objects.types)
+        # The object types, then the directions and runs of the nest field
+        self.__grids = shared_memory.SharedMemory(create=True, size=3 * area)
+        self.__grids.buf[area : 2 * area] = universe.nest_field.directions
+        self.__grids.buf[2 * area :] = universe.nest_field.runs
+        self.__pheromones: Optional["SharedMemory"] = None
+        pheromones = universe.pheromones
+        scent = None
+        if pheromones is not None:
+            self.__pheromones = shared_memory.SharedMemory(
+                create=True, size=pheromones.fields.nbytes + pheromones.total.nbytes
+            )
+            scent = (
+                self.__pheromones.name,
+                pheromones.fields.shape[0] - 1,
+                pheromones.diffusion,
+                pheromones.evaporation,
+                pheromones.deposit,
+            )
+        self.initargs = (universe.boundary, self.__grids.name, scent)
+
+    def publish(self, universe: "Universe") -> None:
+        """
+        Copy the object types and the scents of a universe into the blocks.
+
+        :param universe: The universe.
+        :type universe: Universe
+        """
+        types = universe.objects.types
+        self.__grids.buf[: len(types)] = types
+        pheromones = universe.pheromones
+        if pheromones is not None and self.__pheromones is not None:
+            fields, total = _scent_arrays(self.__pheromones, pheromones.fields.shape)
+            fields[...] = pheromones.fields
+            total[...] = pheromones.total
+
+    def close(self) -> None:
+        """Release and remove the shared memory blocks."""
+        for block in (self.__grids, self.__pheromones):
+            if block is not None:
+                block.close()
+                block.unlink()
+        self.__pheromones = None
+
+
+def _attach_block(name: str) -> "SharedMemory":
+    """Attach to a block of the simulation process, which removes it."""
+    from multiprocessing import shared_memory
+
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Children share the resource tracker of the simulation process
+    return shared_memory.SharedMemory(name=name)
+
+
+def _scent_arrays(block: "SharedMemory", shape: Tuple[int, ...]):
+    """Map the scent fields and their total onto a shared memory block."""
+    import numpy as np
+
+    fields = np.ndarray(shape, dtype=np.float32, buffer=block.buf)
+    total = np.ndarray(
+        shape[1:], dtype=np.float32, buffer=block.buf, offset=fields.nbytes
+    )
+    return fields, total
+
+
+# The snapshot and the attached blocks of a worker process, set by attach
+_worker_layers: Optional[Tuple[Snapshot, List["SharedMemory"]]] = None
+
+
+def attach(boundary: "Boundary", grids_name: str, scent: Optional[tuple]) -> None:
+    """
+    Attach a worker process to the layers of a :class:`SharedLayers`.
+
+    :param boundary: The boundary of the universe.
+    :type boundary: Boundary
+    :param grids_name: The name of the block of the object types and nest field.
+    :type grids_name: str
+    :param scent: The block name, species count, diffusion, evaporation and
+        deposit of the pheromone field, None when pheromones are disabled.
+    :type scent: Optional[tuple]
+    """
+    global _worker_layers
+    from universe.map.nest_field import NestField
+    from universe.map.object_grid import ObjectGrid
+
+    blocks = [_attach_block(grids_name)]
+    objects = ObjectGrid(boundary)
+    area = len(objects.types)
+    nest_field = NestField.from_steps(
+        boundary, blocks[0].buf[area : 2 * area], blocks[0].buf[2 * area :]
+    )
+    pheromones = None
+    if scent is not None:
+        from universe.map.pheromone import PheromoneField
+
+        name, species_count, diffusion, evaporation, deposit = scent
+        pheromones = PheromoneField(
+            boundary, species_count, diffusion, evaporation, deposit
+        )
+        blocks.append(_attach_block(name))
+        pheromones.fields, pheromones.total = _scent_arrays(
+            blocks[1], pheromones.fields.shape
+        )
+    _worker_layers = (Snapshot(boundary, objects, nest_field, pheromones, {}), blocks)
+
+
+def sense_shared(
+    occupants: Occupants, ants: List["Ant"], seed: int, offset: int
+) -> List[Optional[dict]]:
+    """
+    Decide the moves of ants in a worker process attached by :func:`attach`.
+
+    :param occupants: The bit mask of the species indices at every occupied cell.
+    :type occupants: Dict[Tuple[int, int], int]
+    :param ants: The ants, sorted by id.
+    :type ants: List[Ant]
+    :param seed: The seed of the tick.
+    :type seed: int
+    :param offset: The rank of the first ant among all the ants of the tick.
+    :type offset: int
+    :return: The move of every ant, None for an ant that cannot move.
+    :rtype: List[Optional[dict]]
+    """
+    snapshot, blocks = _worker_layers
+    types = snapshot.objects.types
+    types[:] = blocks[0].buf[: len(types)]
+    snapshot.occupants = occupants
+    return sense(snapshot, ants, seed, offset)
+
+
+class TwoPhaseTick:
+    """
+    Class running the ants of a tick in two phases.
+
+    In the sense phase every living ant decides its move from the same
+    :class:`Snapshot`, optionally in worker processes. In the resolve phase the
+    moves are applied, then every ant fights, picks up objects and spawns,
+    always in the order of the ant ids. The outcome does not depend on the
+    order of the ants dictionary, which is rebuilt from the current positions.
+
+    The worker processes are started with the spawn method, which imports the
+    main module again: a script running a simulation with workers must do it
+    under ``if __name__ == "__main__":``.
+
+    :var workers: The number of worker processes of the sense phase, the
+        decisions are made in the simulation process below two.
+    :type workers: int
+    """
+
+    def __init__(self, workers: int = 0):
+        """
+        Initialize the tick.
+
+        :param workers: The number of worker processes of the sense phase.
+        :type workers: int
+        """
+        self.workers = workers
+        self.__executor: Optional["ProcessPoolExecutor"] = None
+        self.__layers: Optional[SharedLayers] = None
+
+    def tick(self, universe: "Universe", events: "EventSink") -> None:
+        """
+        Run the ants of a tick.
+
+        :param universe: The universe.
+        :type universe: Universe
+        :param events: The sink of the updates.
+        :type events: EventSink
+        """
+        ants = living_ants(universe)
+        seed = universe.rng.randint(0, 2**31 - 1)
+        moves = self.sense(universe, ants, seed)
+
+        for ant, move in zip(ants, moves):
+            if move is not None:
+                ant.apply_move(universe, move, events)
+        # Ants starved during the moves stay until the end of the tick
+        universe.reindex(ants)
+        for ant in ants:
+            if ant.alive:
+                ant.process(universe, events)
+        universe.reindex(living_ants(universe))
+
+    def sense(
+        self, universe: "Universe", ants: List["Ant"], seed: int
+    ) -> List[Optional[dict]]:
+        """
+        Decide the moves of ants, in the worker processes if there are any.
+
+        :param universe: The universe.
+        :type universe: Universe
+        :param ants: The living ants, sorted by id.
+        :type ants: List[Ant]
+        :param seed: The seed of the tick.
+        :type seed: int
+        :return: The move of every ant, None for an ant that cannot move.
+        :rtype: List[Optional[dict]]
+        :raises RuntimeError: If the worker processes could not start.
+        """
+        if self.workers < 2 or len(ants) < MIN_PARALLEL_ANTS:
+            return sense(Snapshot.take(universe, ants), ants, seed)
+        # The pool is only loaded by the parallel sense phase
+        from concurrent.futures.process import BrokenProcessPool
+
+        if self.__executor is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            self.__layers = SharedLayers(universe)
+            self.__executor = ProcessPoolExecutor(
+                self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=attach,
+                initargs=self.__layers.initargs,
+            )
+        self.__layers.publish(universe)
+        occupants = occupants_of(ants)
+        size = -(-len(ants) // self.workers)
+        try:
+            futures = [
+                self.__executor.submit(
+                    sense_shared, occupants, ants[start : start + size], seed, start
+                )
+                for start in range(0, len(ants), size)
+            ]
+            return [move for future in futures for move in future.result()]
+        except BaseException as error:
+            # A pool whose processes could not start is not waited for
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+            self.__executor = None
+            # The next pool gets new layers, the attached workers keep their map
+            self.__layers.close()
+            self.__layers = None
+            if isinstance(error, (BrokenProcessPool, BrokenPipeError)):
+                raise RuntimeError(
+                    "The worker processes of the two-phase tick could not start, "
+                    "a script running a simulation with workers must do it under "
+                    'if __name__ == "__main__":'
+                ) from error
+            raise
+
+    def close(self) -> None:
+        """Stop the worker processes and remove the shared layers."""
+        if self.__executor is not None:
+            self.__executor.shutdown(cancel_futures=True)
+            self.__executor = None
+        if self.__layers is not None:
+            self.__layers.close()
+            self.__layers = None
+
+
+def occupants_of(ants: List["Ant"]) -> Occupants:
+    """
+    Get the bit mask of the species indices at every cell occupied by ants.
+
+    :param ants: The living ants.
+    :type ants: List[Ant]
+    :return: The bit mask of every occupied cell.
+    :rtype: Dict[Tuple[int, int], int]
+    """
+    occupants: Occupants = {}
+    for ant in ants:
+        key = (ant.position.x, ant.position.y)
+        occupants[key] = occupants.get(key, 0) | 1 << ant.species.index
+    return occupants
+
+
+def living_ants(universe: "Universe") -> List["Ant"]:
+    """
+    Get the living ants of a universe, sorted by id.
+
+    :param universe: The universe.
+    :type universe: Universe
+    :return: The living ants.
+    :rtype: List[Ant]
+    """
+    return sorted(
+        (ant for ant_row in universe.ants.values() for ant in ant_row if ant.alive),
+        key=lambda ant: ant.id,
+    )
@@ -0,0 +1,281 @@
+import struct
+from typing import TYPE_CHECKING, BinaryIO, Dict, List, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from universe.ants import Ant
+    from universe.universe import Universe
+
+TRAJECTORY_MAGIC = b"MOAT"
+TRAJECTORY_VERSION = 1
+# magic, version, record size, reserved
+TRAJECTORY_HEADER = struct.Struct("<4sIII")
+
+# The record of an ant in a round, the direction is the angle divided by 90
+RECORD = np.dtype(
+    [
+        ("id", "<i8"),
+        ("x", "<i4"),
+        ("y", "<i4"),
+        ("health", "<i4"),
+        ("food", "<i4"),
+        ("direction", "u1"),
+        ("role", "u1"),
+        ("alive", "u1"),
+        ("reserved", "u1"),
+    ]
+)
+# The index entry of a round: round, first record, records, smallest and largest id
+INDEX = np.dtype(
+    [
+        ("round", "<i8"),
+        ("first", "<i8"),
+        ("count", "<i8"),
+        ("min_id", "<i8"),
+        ("max_id", "<i8"),
+    ]
+)
+
+
+def index_path(path: str) -> str:
+    """
+    Get the path of the round index of a trajectory file.
+
+    :param path: The path of the trajectory file.
+    :type path: str
+    :return: The path of the index file.
+    :rtype: str
+    """
+    return path + ".index"
+
+
+class TrajectoryRecorder:
+    """
+    Class appending the state of every ant after each round to a file.
+
+    The trajectory file holds a :data:`TRAJECTORY_HEADER` followed by
+    :data:`RECORD` records, those of a round contiguous and sorted by ant id.
+    An ant is recorded every round it ends alive, and once more with ``alive``
+    set to 0 in the round it dies, so an ant killed in the round it was born in
+    is never recorded. The index file next to it gets an :data:`INDEX`
+    entry per round once the records of the round are written, so a reader never
+    sees a partial round.
+
+    :var path: The path of the trajectory file.
+    :type path: str
+    :var records: The number of records written.
+    :type records: int
+    """
+
+    def __init__(self, path: str):
+        """
+        Create the trajectory and index files, replacing existing ones.
+
+        :param path: The path of the trajectory file.
+        :type path: str
+        """
+        self.path = path
+        self.records = 0
+        self.__data: BinaryIO = open(path, "wb")
+        self.__index: BinaryIO = open(index_path(path), "wb")
+        self.__data.write(
+            TRAJECTORY_HEADER.pack(
+                TRAJECTORY_MAGIC, TRAJECTORY_VERSION, RECORD.itemsize, 0
+            )
+        )
+        self.__alive: Dict[int, "Ant"] = {}
+
+    def record(self, universe: "Universe", current_round: int) -> None:
+        """
+        Append the ants of a round.
+
+        :param universe: The universe.
+        :type universe: Universe
+        :param current_round: The round just played.
+        :type current_round: int
+        """
+        alive: Dict[int, "Ant"] = {
+            ant.id: ant
+            for ant_row in universe.ants.values()
+            for ant in ant_row
+            if ant.alive
+        }
+        # Ants alive in the last round and gone now are recorded once as dead
+        ants: List["Ant"] = list(alive.values())
+        ants.extend(ant for ant_id, ant in self.__alive.items() if ant_id not in alive)
+        ants.sort(key=lambda ant: ant.id)
+        self.__alive = alive
+
+        records = np.fromiter(
+            (
+                (
+                    ant.id,
+                    ant.position.x,
+                    ant.position.y,
+                    ant.health,
+                    ant.food,
+                    ant.position.direction.value // 90,
+                    ant.role.value,
+                    ant.id in alive,
+                    0,
+                )
+                for ant in ants
+            ),
+            dtype=RECORD,
+            count=len(ants),
+        )
+        self.__data.write(records.tobytes())
+        self.__data.flush()
+        entry = np.array(
+            [
+                (
+                    current_round,
+                    self.records,
+                    len(ants),
+                    ants[0].id if ants else 0,
+                    ants[-1].id if ants else -1,
+                )
+            ],
+            dtype=INDEX,
+        )
+        self.__index.write(entry.tobytes())
+        self.__index.flush()
+        self.records += len(ants)
+
+    def close(self) -> None:
+        """Close the trajectory and index files."""
+        self.__data.close()
+        self.__index.close()
+
+
+class TrajectoryReader:
+    """
+    Class reading a trajectory file through memory maps.
+
+    Only the pages of the requested rounds are read from the disk. The rounds
+    recorded when the reader was opened are visible.
+
+    :var path: The path of the trajectory file.
+    :type path: str
+    :var index: The index entries of the rounds.
+    :type index: numpy.ndarray
+    """
+
+    def __init__(self, path: str):
+        """
+        Map a trajectory file and its index.
+
+        :param path: The path of the trajectory file.
+        :type path: str
+        :raises ValueError: If the file is not a trajectory file.
+        """
+        self.path = path
+        with open(path, "rb") as data:
+            header = data.read(TRAJECTORY_HEADER.size)
+        expected = (TRAJECTORY_MAGIC, TRAJECTORY_VERSION, RECORD.itemsize)
+        if (
+            len(header) < TRAJECTORY_HEADER.size
+            or TRAJECTORY_HEADER.unpack(header)[:3] != expected
+        ):
+            raise ValueError(f"Not a trajectory file: {path}")
+
+        self.index = self.__map(index_path(path), INDEX, 0)
+        # Records written after the last index entry belong to no round yet
+        records = (
+            int(self.index["first"][-1] + self.index["count"][-1])
+            if len(self.index)
+            else 0
+        )
+        self.__records = self.__map(path, RECORD, TRAJECTORY_HEADER.size, records)
+        self.__rounds: Dict[int, int] = {
+            int(current_round): position
+            for position, current_round in enumerate(self.index["round"])
+        }
+
+    def __len__(self) -> int:
+        """Return the number of recorded rounds."""
+        return len(self.index)
+
+    @property
+    def rounds(self) -> np.ndarray:
+        """Return the recorded rounds."""
+        return self.index["round"]
+
+    def round(self, current_round: int) -> np.ndarray:
+        """
+        Get the records of a round.
+
+        :param current_round: The round.
+        :type current_round: int
+        :return: The view of the records of the round, sorted by ant id.
+        :rtype: numpy.ndarray
+        :raises KeyError: If the round was not recorded.
+        """
+        return self.range(current_round, current_round)
+
+    def range(self, first: int, last: int) -> np.ndarray:
+        """
+        Get the records of a range of rounds.
+
+        :param first: The first round.
+        :type first: int
+        :param last: The last round, included.
+        :type last: int
+        :return: The view of the records of the rounds, in round order.
+        :rtype: numpy.ndarray
+        :raises KeyError: If a bound of the range was not recorded.
+        """
+        start = self.index[self.__rounds[first]]
+        end = self.index[self.__rounds[last]]
+        return self.__records[start["first"] : end["first"] + end["count"]]
+
+    def ant(self, ant_id: int) -> np.ndarray:
+        """
+        Get the records of an ant in every round it was recorded.
+
+        Only the rounds whose id range holds the ant are searched.
+
+        :param ant_id: The id of the ant.
+        :type ant_id: int
+        :return: A copy of the records of the ant, in round order.
+        :rtype: numpy.ndarray
+        """
+        candidates = np.flatnonzero(
+            (self.index["min_id"] <= ant_id) & (self.index["max_id"] >= ant_id)
+        )
+        positions: List[int] = []
+        for entry in self.index[candidates]:
+            first = int(entry["first"])
+            ids = self.__records["id"][first : first + int(entry["count"])]
+            position = int(np.searchsorted(ids, ant_id))
+            if position < len(ids) and ids[position] == ant_id:
+                positions.append(first + position)
+        return self.__records[positions]
+
+    def range_rounds(self, first: int, last: int) -> np.ndarray:
+        """
+        Get the round of every record of a range of rounds.
+
+        :param first: The first round.
+        :type first: int
+        :param last: The last round, included.
+        :type last: int
+        :return: The round of every record returned by :meth:`range`.
+        :rtype: numpy.ndarray
+        :raises KeyError: If a bound of the range was not recorded.
+        """
+        entries = self.index[self.__rounds[first] : self.__rounds[last] + 1]
+        return np.repeat(entries["round"], entries["count"])
+
+    @staticmethod
+    def __map(
+        path: str, dtype: np.dtype, offset: int, count: Optional[int] = None
+    ) -> np.ndarray:
+        """Map the records of a file, an empty array if there are none."""
+        if count is None:
+            with open(path, "rb") as file:
+                count = (file.seek(0, 2) - offset) // dtype.itemsize
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
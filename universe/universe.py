@@ -1,10 +1,14 @@
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 
-from .ants import Ant
-from .map import Boundary, Nest, Object
+from .ants import SPECIES, Ant, Species
+from .config import DEFAULT_MAX_ANTS, DEFAULT_MAX_OBJECTS, Rules
+from .map import Boundary, Nest, NestField, NestIndex, ObjectGrid
 from .rng import RNG
 
+if TYPE_CHECKING:
+    from .map.pheromone import PheromoneField
+
 
 class Universe:
     """
@@ -18,27 +22,94 @@ class Universe:
     :type boundary: Boundary
     :var ants: A dictionary of ants.
     :type ants: Dict[Tuple[int, int], List[Ant]]
-    :var objects: A dictionary of objects.
-    :type objects: Dict[Tuple[int, int], List[Object]]
+    :var objects: The grid of objects.
+    :type objects: ObjectGrid
     :var nests: A list of nests.
     :type nests: List[Nest]
+    :var nest_index: The spatial index of the nests.
+    :type nest_index: NestIndex
+    :var nest_field: The field of the nearest nest, built once all nests spawned.
+    :type nest_field: Optional[NestField]
+    :var pheromones: The scent layer, None when pheromones are disabled.
+    :type pheromones: Optional[PheromoneField]
+    :var species: The species taking part in the simulation.
+    :type species: List[Species]
+    :var rules: The numbers of the model read by the ants.
+    :type rules: Rules
     """
 
     rng: RNG
     boundary: Boundary
     ants: Dict[Tuple[int, int], List[Ant]]
-    objects: Dict[Tuple[int, int], List[Object]]
+    objects: ObjectGrid
     nests: List[Nest]
+    nest_index: NestIndex
+    nest_field: Optional[NestField] = None
+    pheromones: Optional["PheromoneField"] = None
+    species: List[Species]
+    rules: Rules
 
-    MAX_ANTS = 500
-    MAX_OBJECTS = 500
+    MAX_ANTS = DEFAULT_MAX_ANTS
+    MAX_OBJECTS = DEFAULT_MAX_OBJECTS
     ants_count = 0
-    objects_count = 0
 
     def __init__(self):
         """Initialize the universe."""
         self.rng = RNG()
         self.boundary = Boundary()
         self.ants = defaultdict(list)
-        self.objects = defaultdict(list)
+        self.objects = ObjectGrid(self.boundary)
         self.nests = []
+        self.nest_index = NestIndex(self.boundary)
+        self.species = list(SPECIES)
+        self.rules = Rules()
+
+    def has_enemy(self, key: Tuple[int, int], species: Species) -> bool:
+        """
+        Check whether an ant of another species is listed at a cell.
+
+        :param key: The (x, y) coordinates of the cell.
+        :type key: Tuple[int, int]
+        :param species: The species of the looking ant.
+        :type species: Species
+        :return: True if an enemy is at the cell, False otherwise.
+        :rtype: bool
+        """
+        ants = self.ants.get(key)
+        return bool(ants) and any(ant.species is not species for ant in ants)
+
+    def reindex(self, ants: Iterable[Ant]) -> None:
+        """
+        Rebuild the ants dictionary from the current positions of ants.
+
+        :param ants: The ants to index, in the order of the lists of a cell.
+        :type ants: Iterable[Ant]
+        """
+        self.ants = defaultdict(list)
+        for ant in ants:
+            self.ants[(ant.position.x, ant.position.y)].append(ant)
+        self.ants_count = sum(len(row) for row in self.ants.values())
+
+    def populations(self) -> Tuple[int, ...]:
+        """
+        Count the living ants of every species taking part in the simulation.
+
+        :return: The living ants of every species, in the order of the species.
+        :rtype: Tuple[int, ...]
+        """
+        counts = dict.fromkeys(self.species, 0)
+        for ant_row in self.ants.values():
+            for ant in ant_row:
+                if ant.alive and ant.species in counts:
+                    counts[ant.species] += 1
+        return tuple(counts.values())
+
+    def add_nest(self, nest: Nest) -> None:
+        """
+        Add a nest to the universe and to the nest index.
+
+        :param nest: The nest to add.
+        :type nest: Nest
+        """
+        self.nests.append(nest)
+        self.nest_index.add(nest)
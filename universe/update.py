@@ -27,6 +27,7 @@ class UpdateType(enum.Enum):
     ANT_PROMOTE = 14
 
     NEST_SPAWN = 20
+    NEST_FIELD = 21
 
     OBJECT_SPAWN = 30
     OBJECT_DESPAWN = 31
@@ -34,6 +35,24 @@ class UpdateType(enum.Enum):
     ERROR_INVALID_TPS = 40
     ERROR_INVALID_ROUNDS = 41
     ERROR_SIMULATION_NOT_RUNNING = 42
+    ERROR_INVALID_BOUNDARIES = 43
+    ERROR_SIMULATION_TOO_COSTLY = 44
+    ERROR_SIMULATION_FAILED = 45
+
+    RASTER_PALETTE = 50
+    RASTER_FRAME = 51
+    SIMULATION_SET_RASTER = 52
+    SIMULATION_SET_VIEWPORT = 53
+    VIEWPORT_SUMMARY = 54
+    HEATMAP_CHANNELS = 55
+    HEATMAP_FRAME = 56
+    SIMULATION_SET_HEATMAP = 57
+
+    SIMULATION_BATCH = 60
+    SIMULATION_SET_PUBLISH_HZ = 61
+    SIMULATION_QUEUED = 62
+    SIMULATION_STATUS = 63
+    SHARED_STATE = 64
 
 
 class Update:
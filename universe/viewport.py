@@ -0,0 +1,177 @@
+import math
+from typing import TYPE_CHECKING, Any, Dict, Optional, Set, Tuple
+
+from universe.map.area import Area
+from universe.map.position import Position
+from universe.update import UpdateType
+
+if TYPE_CHECKING:
+    from universe.ants import Ant
+    from universe.universe import Universe
+
+# Size in cells of the summary tiles at zoom level 1
+BASE_TILE_SIZE = 16
+
+Tile = Tuple[int, int]
+
+
+class Viewport:
+    """
+    Class representing the region of the universe visible to a client.
+
+    Updates inside the viewport are streamed one by one, activity outside of it
+    is only sent as coarse per-tile summaries, so the bandwidth of a client
+    depends on what it actually shows. The ants of every tile are indexed from
+    the updates passing through :meth:`accepts`, so a summary only looks at the
+    ants of the tiles crossing the edge of the viewport.
+
+    :var area: The visible area.
+    :type area: Area
+    :var zoom: The zoom level of the client, the number of pixels per cell.
+    :type zoom: float
+    :var tile_size: The size in cells of the summary tiles.
+    :type tile_size: int
+    :var visible_ants: The ids of the ants last sent inside the viewport.
+    :type visible_ants: Set[int]
+    """
+
+    def __init__(self, x: int, y: int, width: int, height: int, zoom: float = 1.0):
+        """
+        Initialize the viewport.
+
+        :param x: The x-coordinate of the top left cell.
+        :type x: int
+        :param y: The y-coordinate of the top left cell.
+        :type y: int
+        :param width: The width in cells.
+        :type width: int
+        :param height: The height in cells.
+        :type height: int
+        :param zoom: The zoom level, defaults to 1.0.
+        :type zoom: float
+        :raises ValueError: If the size or the zoom level is not positive.
+        """
+        if width <= 0 or height <= 0 or zoom <= 0:
+            raise ValueError("The viewport size and zoom must be positive")
+        self.area = Area(Position(x, y), Position(x + width - 1, y + height - 1))
+        self.zoom = zoom
+        self.tile_size = max(1, math.ceil(BASE_TILE_SIZE / zoom))
+        self.visible_ants: Set[int] = set()
+        # The living ants of every tile by id, built by the first summary
+        self.__tiles: Optional[Dict[Tile, Dict[int, "Ant"]]] = None
+        self.__ant_tiles: Dict[int, Tile] = {}
+
+    def __tile(self, ant: "Ant") -> Tile:
+        """Return the tile of an ant."""
+        return ant.position.x // self.tile_size, ant.position.y // self.tile_size
+
+    def __index(self, ant: "Ant") -> None:
+        """Move an ant to the tile of its position in the index."""
+        tile = self.__tile(ant)
+        previous = self.__ant_tiles.get(ant.id)
+        if previous == tile:
+            return
+        if previous is not None:
+            del self.__tiles[previous][ant.id]
+        self.__ant_tiles[ant.id] = tile
+        self.__tiles.setdefault(tile, {})[ant.id] = ant
+
+    def apply(self, update_type: UpdateType, ant: Optional["Ant"] = None) -> None:
+        """
+        Update the index of the ants for an update of the simulation.
+
+        :param update_type: The type of the update.
+        :type update_type: UpdateType
+        :param ant: The ant involved in the update.
+        :type ant: Optional[Ant]
+        """
+        if self.__tiles is None or ant is None:
+            return
+        if update_type in (
+            UpdateType.ANT_SPAWN,
+            UpdateType.ANT_MOVE,
+            UpdateType.ANT_PROMOTE,
+        ):
+            if ant.alive:
+                self.__index(ant)
+        elif update_type == UpdateType.ANT_DEATH:
+            previous = self.__ant_tiles.pop(ant.id, None)
+            if previous is not None:
+                del self.__tiles[previous][ant.id]
+
+    def accepts(
+        self,
+        update_type: UpdateType,
+        ant: Optional["Ant"] = None,
+        target: Optional[Any] = None,
+    ) -> bool:
+        """
+        Check if an update should be sent to the client.
+
+        Updates without a position are always sent. An ant leaving the viewport
+        is sent once more so the client can move it out of sight. Every update
+        of the simulation must pass through here to keep the index of the ants.
+
+        :param update_type: The type of the update.
+        :type update_type: UpdateType
+        :param ant: The ant involved in the update.
+        :type ant: Optional[Ant]
+        :param target: The target of the update.
+        :type target: Optional[Any]
+        :return: True if the update should be sent.
+        :rtype: bool
+        """
+        self.apply(update_type, ant)
+        if ant is not None:
+            if ant.position in self.area:
+                if update_type == UpdateType.ANT_DEATH:
+                    self.visible_ants.discard(ant.id)
+                else:
+                    self.visible_ants.add(ant.id)
+                return True
+            if ant.id in self.visible_ants:
+                self.visible_ants.discard(ant.id)
+                return True
+            return False
+        position = getattr(target, "position", None)
+        return not isinstance(position, Position) or position in self.area
+
+    def summarize(self, universe: "Universe") -> Dict[str, Any]:
+        """
+        Summarize the ants outside the viewport per tile.
+
+        :param universe: The universe.
+        :type universe: Universe
+        :return: The tile size and the [tile x, tile y, ants] of every tile with
+            ants outside of the viewport.
+        :rtype: Dict[str, Any]
+        """
+        if self.__tiles is None:
+            self.__tiles = {}
+            for ant_row in universe.ants.values():
+                for ant in ant_row:
+                    if ant.alive:
+                        self.__index(ant)
+        tile_size = self.tile_size
+        area = self.area
+        tiles = []
+        for (x, y), ants in sorted(self.__tiles.items()):
+            if not ants:
+                continue
+            first = Position(x * tile_size, y * tile_size)
+            last = Position(first.x + tile_size - 1, first.y + tile_size - 1)
+            if first in area and last in area:
+                continue
+            if (
+                last.x < area.position_1.x
+                or first.x > area.position_2.x
+                or last.y < area.position_1.y
+                or first.y > area.position_2.y
+            ):
+                count = len(ants)
+            else:
+                # Only the tiles crossing the edge look at their ants
+                count = sum(ant.position not in area for ant in ants.values())
+            if count:
+                tiles.append([x, y, count])
+        return {"tile": tile_size, "tiles": tiles}
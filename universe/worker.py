@@ -0,0 +1,310 @@
+import asyncio
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from universe.config import SimulationConfig
+from universe.engine import run
+from universe.publisher import FRAME_UPDATES, Publisher
+from universe.serializer import DEFAULT_SERIALIZER, Serializer
+from universe.update import UpdateType
+
+if TYPE_CHECKING:
+    from universe.ants import Ant
+
+# Updates replaced by the raster frames when the server renders the universe
+RASTER_SKIPPED_UPDATES = {
+    UpdateType.ANT_SPAWN,
+    UpdateType.ANT_MOVE,
+    UpdateType.ANT_DEATH,
+    UpdateType.ANT_ATTACK,
+    UpdateType.ANT_PROMOTE,
+    UpdateType.OBJECT_SPAWN,
+    UpdateType.OBJECT_DESPAWN,
+}
+
+Message = Union[str, bytes]
+
+
+def serializer_for(config: Union[SimulationConfig, dict]) -> Serializer:
+    """
+    Get the serializer of a simulation.
+
+    :param config: The configuration of the simulation.
+    :type config: Union[SimulationConfig, dict]
+    :return: The compact serializer if the ``compact_json`` key is set, the
+        byte-compatible one otherwise.
+    :rtype: Serializer
+    """
+    if SimulationConfig.coerce(config).compact_json:
+        return Serializer(compact=True)
+    return DEFAULT_SERIALIZER
+
+
+def stream_callback(
+    config: Union[SimulationConfig, dict],
+    send: Callable[[Message], Awaitable],
+    publisher: Optional[Publisher] = None,
+) -> Callable:
+    """
+    Create the update callback streaming a simulation to a client.
+
+    Updates hidden by the raster mode or outside of the viewport are dropped, the
+    others are serialized and sent, or buffered in the publisher if there is one.
+    The ``compact_json`` configuration key selects the compact serializer.
+
+    :param config: The configuration of the simulation, a
+        :class:`SimulationConfig` passed in keeps its viewport updates.
+    :type config: Union[SimulationConfig, dict]
+    :param send: The coroutine function sending a message to the client.
+    :type send: Callable[[Message], Awaitable]
+    :param publisher: The publisher batching the updates, if any.
+    :type publisher: Optional[Publisher]
+    :return: The update callback.
+    :rtype: Callable
+    """
+    config = SimulationConfig.coerce(config)
+    encode = serializer_for(config).update
+
+    async def callback(
+        update_type: UpdateType,
+        ant: Optional["Ant"] = None,
+        target: Optional[Any] = None,
+        state: Optional[Any] = None,
+    ):
+        # The viewport sees every update to keep the index of its summaries
+        viewport = config.viewport
+        if viewport is not None and not viewport.accepts(update_type, ant, target):
+            return
+        if config.raster is not None and update_type in RASTER_SKIPPED_UPDATES:
+            return
+        if publisher is not None:
+            publisher.publish(update_type, ant, target, state)
+        elif update_type in FRAME_UPDATES:
+            await send(state)
+        else:
+            await send(encode(update_type, ant, target, state))
+
+    return callback
+
+
+def join_messages(current_round: int, messages: List[Message]) -> List[Message]:
+    """
+    Join the text messages of a round into one ``SIMULATION_BATCH`` message.
+
+    A compressed connection then compresses the updates of a round as a unit.
+    The messages are concatenated as they are, the binary frames follow the
+    batch.
+
+    :param current_round: The round of the messages.
+    :type current_round: int
+    :param messages: The messages of the round.
+    :type messages: List[Message]
+    :return: The batch followed by the binary messages.
+    :rtype: List[Message]
+    """
+    texts = [message for message in messages if isinstance(message, str)]
+    frames = [message for message in messages if not isinstance(message, str)]
+    if len(texts) < 2:
+        return messages
+    return [DEFAULT_SERIALIZER.batch(current_round, time.monotonic(), texts), *frames]
+
+
+def simulate(
+    config: SimulationConfig,
+    commands: multiprocessing.Queue,
+    events: multiprocessing.Queue,
+) -> None:
+    """
+    Run a simulation in a worker process.
+
+    The serialized messages are put on the event queue in one batch per round,
+    as tuples of the round, the last TPS and the messages, followed by None once
+    the simulation is over. A failed simulation ends with an
+    ``ERROR_SIMULATION_FAILED`` update holding the error, then a
+    ``SIMULATION_END``. The command queue takes
+    dictionaries of configuration changes, or None to stop the simulation.
+
+    :param config: The configuration of the simulation.
+    :type config: SimulationConfig
+    :param commands: The queue of control messages from the server.
+    :type commands: multiprocessing.Queue
+    :param events: The queue of batches to the server.
+    :type events: multiprocessing.Queue
+    """
+    asyncio.run(_simulate(config, commands, events))
+
+
+async def _simulate(
+    config: SimulationConfig,
+    commands: multiprocessing.Queue,
+    events: multiprocessing.Queue,
+) -> None:
+    """Run a simulation in the event loop of the worker process."""
+    loop = asyncio.get_running_loop()
+    batch: List[Message] = []
+    status = {"round": 0, "tps": 0}
+
+    async def send(message: Message):
+        batch.append(message)
+
+    publisher = (
+        Publisher(send, config.publish_hz, serializer_for(config))
+        if config.publish_hz is not None
+        else None
+    )
+    stream = stream_callback(config, send, publisher)
+
+    async def callback(
+        update_type: UpdateType,
+        ant: Optional["Ant"] = None,
+        target: Optional[Any] = None,
+        state: Optional[Any] = None,
+    ):
+        if update_type == UpdateType.SIMULATION_CURRENT_ROUND:
+            if batch:
+                events.put((status["round"], status["tps"], batch.copy()))
+                batch.clear()
+            status["round"] = state
+        elif update_type == UpdateType.SIMULATION_TPS:
+            status["tps"] = state
+        await stream(update_type, ant, target, state)
+
+    simulation = asyncio.create_task(run(config, callback))
+    publishing = asyncio.create_task(publisher.run(simulation)) if publisher else None
+
+    def read_commands():
+        """Apply the control messages in the event loop until the simulation stops."""
+        while True:
+            command = commands.get()
+            try:
+                if command is None:
+                    loop.call_soon_threadsafe(simulation.cancel)
+                    return
+                loop.call_soon_threadsafe(config.update, command)
+            except RuntimeError:
+                return  # The event loop is closed, the simulation is over
+
+    threading.Thread(target=read_commands, daemon=True).start()
+    failure = None
+    try:
+        await simulation
+    except asyncio.CancelledError:
+        pass
+    except Exception as error:
+        failure = f"{type(error).__name__}: {error}"
+    if publishing is not None:
+        await publishing
+    if failure is not None:
+        # Sent past the publisher, which stopped with the simulation
+        encode = serializer_for(config).update
+        batch.append(encode(UpdateType.ERROR_SIMULATION_FAILED, state=failure))
+        batch.append(encode(UpdateType.SIMULATION_END))
+    if batch:
+        events.put((status["round"], status["tps"], batch))
+    events.put(None)
+
+
+class SimulationWorker:
+    """
+    Class running a simulation in a separate process.
+
+    The server event loop only forwards the batches of messages of the worker to
+    the client, so a heavy simulation never delays the networking of the other
+    connections, and concurrent simulations run on separate cores.
+
+    :var process: The worker process.
+    :type process: multiprocessing.Process
+    :var finished: Whether the simulation is over and every batch was received.
+    :type finished: bool
+    :var round: The round of the last received batch.
+    :type round: int
+    :var tps: The last TPS reported by the simulation.
+    :type tps: int
+    """
+
+    def __init__(self, config: Union[SimulationConfig, dict]):
+        """
+        Initialize the worker, the configuration is copied into the process.
+
+        :param config: The configuration of the simulation.
+        :type config: Union[SimulationConfig, dict]
+        :raises ValueError: If the configuration is invalid.
+        """
+        # Forking a process running an event loop and threads is unsafe
+        context = multiprocessing.get_context("spawn")
+        self.commands = context.Queue()
+        self.events = context.Queue()
+        # Concurrent workers would mix their rows in the same statistics file
+        config = SimulationConfig.coerce(config).copy(statistics=None)
+        self.process = context.Process(
+            target=simulate,
+            args=(config, self.commands, self.events),
+            daemon=True,
+        )
+        self.finished = False
+        self.round = 0
+        self.tps = 0
+        self.__reader = ThreadPoolExecutor(max_workers=1)
+
+    def start(self) -> None:
+        """Start the worker process."""
+        self.process.start()
+
+    def control(self, **changes) -> None:
+        """
+        Change the configuration of the running simulation.
+
+        :param changes: The configuration keys to change, e.g. pause or tps.
+        """
+        if not self.finished:
+            self.commands.put(changes)
+
+    def stop(self) -> None:
+        """Stop the simulation, the remaining batches are still delivered."""
+        if not self.finished:
+            self.commands.put(None)
+
+    def __receive(self) -> Optional[Tuple[int, int, List[Message]]]:
+        """Wait for the next batch, None if the simulation is over or crashed."""
+        while True:
+            try:
+                return self.events.get(timeout=1)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    return None
+
+    async def batches(self) -> AsyncIterator[List[Message]]:
+        """
+        Receive the batches of messages of the simulation.
+
+        :return: The batches, until the simulation is over.
+        :rtype: AsyncIterator[List[Message]]
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                batch = await loop.run_in_executor(self.__reader, self.__receive)
+                if batch is None:
+                    break
+                self.round, self.tps, messages = batch
+                yield messages
+        finally:
+            self.finished = True
+            await loop.run_in_executor(self.__reader, self.process.join, 5)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.__reader.shutdown(wait=False)